@@ -1,5 +1,6 @@
 package com.example.demo.dto;
 
+import java.util.ArrayList;
 import java.util.List;
 
 import com.example.demo.model.ReviewItem;
@@ -20,4 +21,8 @@ public class CodeReviewResponse {
 
  @JsonProperty("review_items")
  private List<ReviewItem> reviewItems;
+
+ @JsonProperty("skipped_stages")
+ @Builder.Default
+ private List<String> skippedStages = new ArrayList<>();
 }
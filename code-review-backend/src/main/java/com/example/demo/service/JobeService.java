@@ -3,6 +3,7 @@ package com.example.demo.service;
 import org.springframework.beans.factory.annotation.Value;
 import org.springframework.core.io.ClassPathResource;
 import org.springframework.http.*;
+import org.springframework.http.client.SimpleClientHttpRequestFactory;
 import org.springframework.stereotype.Service;
 import org.springframework.web.client.RestTemplate;
 
@@ -13,13 +14,16 @@ import com.example.demo.dto.RunResponse;
 import com.example.demo.dto.TestcaseResult;
 import com.example.demo.model.Testcase;
 
+import jakarta.annotation.PostConstruct;
 import lombok.extern.slf4j.Slf4j;
 
 import java.io.InputStream;
+import java.time.Duration;
 import java.nio.charset.StandardCharsets;
 import java.util.ArrayList;
 import java.util.List;
 import java.util.Map;
+import java.util.concurrent.ThreadLocalRandom;
 
 @Service
 @Slf4j
@@ -31,8 +35,22 @@ public class JobeService {
     @Value("${review.url}")
     private String reviewUrl;
 
+    @Value("${review.time-budget-seconds:60}")
+    private int reviewTimeBudgetSeconds;
+
     private final RestTemplate restTemplate = new RestTemplate();
 
+    private RestTemplate reviewRestTemplate;
+
+    @PostConstruct
+    void initReviewRestTemplate() {
+        SimpleClientHttpRequestFactory factory = new SimpleClientHttpRequestFactory();
+        factory.setConnectTimeout((int) Duration.ofSeconds(5).toMillis());
+        // The agent answers by its deadline; leave some slack for the response itself.
+        factory.setReadTimeout((int) Duration.ofSeconds(reviewTimeBudgetSeconds + 10).toMillis());
+        reviewRestTemplate = new RestTemplate(factory);
+    }
+
     public String getLanguages() {
         String url = jobeBaseUrl + "/languages";
         return restTemplate.getForObject(url, String.class);
@@ -169,17 +187,27 @@ public class JobeService {
         Map<String, Object> body = Map.of(
             "assignment", runRequest.getAssignment(),
             "student_submission", runRequest.getSubmission(),
-            "test_results", runResponse.getTestcaseResults()
+            "test_results", runResponse.getTestcaseResults(),
+            "time_budget_seconds", reviewTimeBudgetSeconds
         );
 
         HttpHeaders headers = new HttpHeaders();
         headers.setContentType(MediaType.APPLICATION_JSON);
+        // W3C trace context: the review service parents its spans to this id.
+        String traceparent = newTraceparent();
+        headers.set("traceparent", traceparent);
+        log.info("Requesting review, traceparent {}", traceparent);
         HttpEntity<Map<String, Object>> request = new HttpEntity<>(body, headers);
 
-        ResponseEntity<CodeReviewResponse> response = restTemplate.postForEntity(reviewUrl, request, CodeReviewResponse.class);
+        ResponseEntity<CodeReviewResponse> response = reviewRestTemplate.postForEntity(reviewUrl, request, CodeReviewResponse.class);
         log.info("Review response: {}", response.getBody());
         return response.getBody();
     }
 
-
+    private static String newTraceparent() {
+        ThreadLocalRandom random = ThreadLocalRandom.current();
+        String traceId = String.format("%016x%016x", random.nextLong(), random.nextLong());
+        String spanId = String.format("%016x", random.nextLong() | 1L);
+        return "00-" + traceId + "-" + spanId + "-01";
+    }
 }
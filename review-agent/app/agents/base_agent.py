@@ -0,0 +1,189 @@
+import logging
+import time
+from typing import Any, Dict, List, Optional, Tuple
+
+from app.utils.deadline import DeadlineExceeded
+from app.utils.llm_resilience import CallPolicy, CircuitOpenError
+from app.utils.metrics import (
+    LLM_BATCHES,
+    LLM_CALL_DURATION,
+    LLM_COMPLETION_TOKENS,
+    LLM_PROMPT_TOKENS,
+    PROMPT_CACHE_REQUESTS,
+)
+from app.utils.model_router import ModelRouter
+from app.utils.parse_json_response import parse_json_response
+from app.utils.prompt_budget import count_message_tokens
+from app.utils.prompt_cache import PromptCache
+from app.utils.tracing import Span, tracer
+
+logger = logging.getLogger(__name__)
+
+
+def max_output_tokens(params: Dict[str, Any]) -> int:
+    """The output budget of a call; agents pass it as ``max_output_tokens``."""
+    return int(params.get("max_output_tokens") or params.get("max_tokens") or 0)
+
+
+class LLMAgent:
+    """Base class for agents that talk to a chat-completions model.
+
+    ``complete`` is the single call site every agent uses, so cross-cutting
+    behaviour around the model call lives here instead of in each agent.
+    """
+
+    name = "agent"
+
+    def __init__(
+        self,
+        client,
+        model_name: str,
+        prompt_cache: Optional[PromptCache] = None,
+        call_policy: Optional[CallPolicy] = None,
+        model_router: Optional[ModelRouter] = None,
+    ):
+        self.client = client
+        self.model_name = model_name
+        self.prompt_cache = prompt_cache
+        # Timeouts, retries, hedging and circuit breaking for the provider call.
+        self.call_policy = call_policy or CallPolicy()
+        # Which model serves each call; model_name is the primary.
+        self.model_router = model_router or ModelRouter(model_name)
+
+    async def complete(
+        self,
+        messages: List[Dict[str, str]],
+        batch_size: Optional[int] = None,
+        **params: Any,
+    ) -> str:
+        """Send ``messages`` to the model and return the text of the first choice.
+
+        ``batch_size`` (items packed into the prompt) only annotates the trace.
+        """
+        text, _ = await self._complete(messages, params, batch_size)
+        return text
+
+    async def complete_json(
+        self,
+        messages: List[Dict[str, str]],
+        batch_size: Optional[int] = None,
+        **params: Any,
+    ) -> Dict[str, Any]:
+        """Like ``complete`` but extracts the JSON object from the response.
+
+        Fenced, prefixed or truncated output is repaired where possible. An
+        unparseable response is returned as ``{"raw": text}`` and dropped from
+        the prompt cache so a retry asks the model again.
+        """
+        text, request = await self._complete(messages, params, batch_size)
+        parsed = parse_json_response(text, self.name, request["model"])
+        if parsed is not None:
+            return parsed
+
+        if self.prompt_cache is not None:
+            self.prompt_cache.discard(request)
+        return {"raw": str(text)}
+
+    async def _complete(
+        self,
+        messages: List[Dict[str, str]],
+        params: Dict[str, Any],
+        batch_size: Optional[int] = None,
+    ) -> Tuple[str, Dict[str, Any]]:
+        model = self.model_router.choose()
+        try:
+            return await self._complete_with(model, messages, params, batch_size)
+        except (CircuitOpenError, DeadlineExceeded):
+            raise
+        except Exception as e:
+            fallback = self.model_router.failover(model)
+            if fallback is None:
+                raise
+            logger.warning(f"{self.name}: {model} failed ({e!r}); trying {fallback}")
+            return await self._complete_with(fallback, messages, params, batch_size)
+
+    async def _complete_with(
+        self,
+        model: str,
+        messages: List[Dict[str, str]],
+        params: Dict[str, Any],
+        batch_size: Optional[int] = None,
+    ) -> Tuple[str, Dict[str, Any]]:
+        attributes = {"llm.agent": self.name, "llm.model": model}
+        if batch_size is not None:
+            attributes["llm.batch_size"] = batch_size
+        with tracer.start_span(f"llm {self.name}", attributes) as span:
+            return await self._call_model(model, messages, params, span)
+
+    async def _call_model(
+        self,
+        model: str,
+        messages: List[Dict[str, str]],
+        params: Dict[str, Any],
+        span: Span,
+    ) -> Tuple[str, Dict[str, Any]]:
+        request = {"model": model, "messages": messages, **params}
+        # What the rate limiter charges up front (prompt plus output budget);
+        # settled with the real usage once the response arrives.
+        tokens = count_message_tokens(messages) + max_output_tokens(params)
+        scheduler = self.call_policy.scheduler
+
+        async def create() -> str:
+            response = await self.client.chat.completions.create(**request)
+            usage = getattr(response, "usage", None)
+            if usage is not None:
+                if scheduler is not None:
+                    scheduler.settle(
+                        tokens,
+                        (usage.prompt_tokens or 0) + (usage.completion_tokens or 0),
+                    )
+                labels = {"agent": self.name, "model": model}
+                LLM_PROMPT_TOKENS.inc(usage.prompt_tokens or 0, **labels)
+                LLM_COMPLETION_TOKENS.inc(usage.completion_tokens or 0, **labels)
+                span.set_attribute("llm.prompt_tokens", usage.prompt_tokens or 0)
+                span.set_attribute(
+                    "llm.completion_tokens", usage.completion_tokens or 0
+                )
+            return response.choices[0].message.content
+
+        called = False
+
+        async def call() -> str:
+            nonlocal called
+            called = True
+            started = time.monotonic()
+            try:
+                text = await self.call_policy.call(
+                    create, label=self.name, tokens=tokens
+                )
+            except CircuitOpenError:
+                self.record_call(model, started, "circuit_open")
+                raise
+            except DeadlineExceeded:
+                self.record_call(model, started, "deadline")
+                raise
+            except Exception:
+                self.model_router.record(model, time.monotonic() - started, ok=False)
+                self.record_call(model, started, "error")
+                raise
+            self.model_router.record(model, time.monotonic() - started, ok=True)
+            self.record_call(model, started, "ok")
+            return text
+
+        if self.prompt_cache is None:
+            return await call(), request
+        text = await self.prompt_cache.get_or_call(request, call)
+        PROMPT_CACHE_REQUESTS.inc(
+            agent=self.name, model=model, result="miss" if called else "hit"
+        )
+        span.set_attribute("llm.cache_hit", not called)
+        return text, request
+
+    def record_call(self, model: str, started: float, outcome: str) -> None:
+        LLM_CALL_DURATION.observe(
+            time.monotonic() - started, agent=self.name, model=model, outcome=outcome
+        )
+
+    def record_batches(self, count: int) -> None:
+        """Count the prompt batches an agent split its input into."""
+        LLM_BATCHES.inc(count, agent=self.name, model=self.model_router.primary)
@@ -0,0 +1,239 @@
+import asyncio
+import logging
+from typing import Any, Dict, List, Optional, Tuple
+
+from app.agents.base_agent import LLMAgent
+from app.models.review_state import LogicIssue, ReviewState
+from app.utils.prompt_budget import (
+    count_message_tokens,
+    count_tokens,
+    get_token_budget,
+    pack_batches,
+    truncate_text,
+)
+from app.utils.llm_resilience import CallPolicy
+from app.utils.model_router import ModelRouter
+from app.utils.prompt_cache import PromptCache
+from app.utils.state_logging import log_state
+
+logger = logging.getLogger(__name__)
+
+
+class ConceptFixAgent(LLMAgent):
+    """Maps logic issues to CS1 concepts and writes their fix hints in one call per batch.
+
+    Fused replacement for the ConceptMappingAgent -> FixHintAgent pair.
+    """
+
+    name = "concept_fix"
+
+    def __init__(
+        self,
+        client,
+        model_name: str,
+        prompt_cache: Optional[PromptCache] = None,
+        max_concurrency: int = 4,
+        token_budget: Optional[int] = None,
+        max_batch_items: int = 8,
+        max_field_tokens: int = 256,
+        call_policy: Optional[CallPolicy] = None,
+        model_router: Optional[ModelRouter] = None,
+    ):
+        super().__init__(
+            client, model_name, prompt_cache, call_policy, model_router
+        )
+        self.max_concurrency = max_concurrency
+        self.token_budget = token_budget or get_token_budget(model_name)
+        self.max_batch_items = max_batch_items
+        self.max_field_tokens = max_field_tokens
+
+    def format_issue(self, issue: LogicIssue) -> str:
+        """Format a LogicIssue into a concise string for the prompt."""
+        return (
+            f"Issue ID: {issue['evidence']} | "
+            f"Summary: {truncate_text(issue['issue'], self.max_field_tokens)} | "
+            f"Code snippet: {truncate_text(issue['code_snippet'], self.max_field_tokens)}"
+        )
+
+    def generate_messages(
+        self,
+        issues_batch: List[LogicIssue],
+        expected_concepts: List[str],
+        assignment_requirements: str,
+    ) -> List[dict]:
+        """Return system + user messages asking for concepts and a hint per issue."""
+        system_msg = {
+            "role": "system",
+            "content": (
+                "You are a CS1 tutoring assistant. For each logic issue you map it to "
+                "CS1 concepts and write a conceptual fix hint. "
+                "Do not reveal the full code solution. "
+                "Always respond in valid JSON format."
+            ),
+        }
+
+        formatted_issues_str = "\n".join(
+            self.format_issue(issue) for issue in issues_batch
+        )
+
+        user_msg_content = f"""
+        Assignment requirements: {assignment_requirements}
+        Expected concepts: {expected_concepts}
+
+        Logic issues in this batch:
+        {formatted_issues_str}
+
+        Task, for every issue:
+        1. If the issue relates to an expected concept, append it to "relevant_concept".
+        2. If the issue relates to other valid CS1 concepts, append it to "other_concept".
+        3. Write "fix_suggestion": a short hint explaining what is conceptually wrong
+           and what steps the student should take, without giving the solution.
+        4. Set "issue_ref" to the Issue ID exactly as given.
+
+        Output JSON format:
+        {{
+            "concept_issues": [
+                {{
+                    "issue_ref": <Issue ID>,
+                    "relevant_concept": ["concept1", ...],
+                    "other_concept": ["conceptX", ...],
+                    "fix_suggestion": "your suggestion here",
+                    "explanation": "brief explanation"
+                }}
+            ]
+        }}
+
+        Notes:
+        - Do NOT invent new failing cases.
+        - Keep JSON valid.
+        """
+        user_msg = {"role": "user", "content": user_msg_content}
+
+        return [system_msg, user_msg]
+
+    def chunk_issues(
+        self,
+        issues: Dict[int, LogicIssue],
+        expected_concepts: List[str],
+        assignment_requirements: str,
+    ) -> List[Dict[int, LogicIssue]]:
+        """Pack logic issues into batches that fit the prompt token budget."""
+        if not issues:
+            return []
+
+        overhead = count_message_tokens(
+            self.generate_messages([], expected_concepts, assignment_requirements)
+        )
+        batches, fill_ratio = pack_batches(
+            list(issues.items()),
+            cost=lambda item: count_tokens(self.format_issue(item[1])) + 1,
+            budget=self.token_budget - overhead,
+            max_items=self.max_batch_items,
+        )
+        self.record_batches(len(batches))
+        logger.info(
+            f"ConceptFixAgent packed {len(issues)} issues into {len(batches)} "
+            f"batches (fill ratio {fill_ratio:.2f}, budget {self.token_budget} tokens)"
+        )
+        return [dict(batch) for batch in batches]
+
+    async def analyze_batch(
+        self,
+        batch: Dict[int, LogicIssue],
+        expected_concepts: List[str],
+        assignment_req: str,
+        semaphore: asyncio.Semaphore,
+    ) -> Tuple[List[Dict[str, Any]], Dict[int, Dict[str, Any]], bool]:
+        """Return one batch's concept entries, changed fields per issue and success."""
+        messages = self.generate_messages(
+            list(batch.values()), expected_concepts, assignment_req
+        )
+        concept_issues: List[Dict[str, Any]] = []
+        issue_updates: Dict[int, Dict[str, Any]] = {}
+        ok = True
+
+        try:
+            async with semaphore:
+                parsed = await self.complete_json(
+                    messages,
+                    batch_size=len(batch),
+                    temperature=0.3,
+                    max_output_tokens=2048,
+                )
+
+            for ci in parsed.get("concept_issues", []):
+                try:
+                    issue_ref = int(ci.get("issue_ref"))
+                except (TypeError, ValueError):
+                    continue
+                if issue_ref not in batch:
+                    continue
+
+                current = issue_updates.get(issue_ref) or batch[issue_ref]
+                fields: Dict[str, Any] = {
+                    "relevant_concept": [
+                        *current["relevant_concept"],
+                        *ci.get("relevant_concept", []),
+                    ],
+                    "other_concept": [
+                        *current["other_concept"],
+                        *ci.get("other_concept", []),
+                    ],
+                }
+                if fields["relevant_concept"]:
+                    fields["fix_suggestion"] = (
+                        str(ci.get("fix_suggestion", "")).strip()
+                        or "No fix suggestion generated."
+                    )
+                issue_updates[issue_ref] = {**issue_updates.get(issue_ref, {}), **fields}
+                concept_issues.append(ci)
+
+        except Exception as e:
+            logger.error(f"ConceptFixAgent error on batch: {e}")
+            ok = False
+            for issue_ref in batch:
+                issue_updates[issue_ref] = {"relevant_concept": [], "other_concept": []}
+                concept_issues.append(
+                    {
+                        "issue_ref": issue_ref,
+                        "relevant_concept": [],
+                        "other_concept": [],
+                        "explanation": "Error processing batch",
+                    }
+                )
+
+        return concept_issues, issue_updates, ok
+
+    async def analyze(self, state: ReviewState) -> Dict[str, Any]:
+        """Map concepts and generate fix hints for all logic issues."""
+        logger.debug("Starting ConceptFixAgent")
+
+        logic_issues: Dict[int, LogicIssue] = state.get("logic_issues", {})
+        expected_concepts: List[str] = state.get("expected_concepts", [])
+        assignment_req: str = truncate_text(
+            state.get("assignment_requirements", ""), self.token_budget // 4
+        )
+
+        semaphore = asyncio.Semaphore(max(1, self.max_concurrency))
+        batch_results = await asyncio.gather(
+            *(
+                self.analyze_batch(batch, expected_concepts, assignment_req, semaphore)
+                for batch in self.chunk_issues(
+                    logic_issues, expected_concepts, assignment_req
+                )
+            )
+        )
+
+        update: Dict[str, Any] = {
+            # Only the changed fields; the logic_issues reducer merges them.
+            "logic_issues": {
+                issue_id: fields
+                for _, issue_updates, _ in batch_results
+                for issue_id, fields in issue_updates.items()
+            },
+            "concept_issues": [ci for entries, _, _ in batch_results for ci in entries],
+        }
+        if not all(ok for _, _, ok in batch_results):
+            update["failed_stages"] = [self.name]
+        log_state(logger, "ConceptFixAgent output update", update)
+        return update
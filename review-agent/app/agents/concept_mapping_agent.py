@@ -1,30 +1,71 @@
 import logging
-from typing import Any, Dict, List
+from typing import Any, Dict, List, Optional
 
+from app.agents.base_agent import LLMAgent
 from app.models.review_state import LogicIssue, ReviewState
-from app.utils.parse_json_response import safe_parse_json_response
+from app.utils.prompt_budget import (
+    count_message_tokens,
+    count_tokens,
+    get_token_budget,
+    pack_batches,
+    truncate_text,
+)
+from app.utils.llm_resilience import CallPolicy
+from app.utils.model_router import ModelRouter
+from app.utils.prompt_cache import PromptCache
+from app.utils.state_logging import log_state
 
 logger = logging.getLogger(__name__)
 
 
-class ConceptMappingAgent:
+class ConceptMappingAgent(LLMAgent):
     """Maps logic issues to CS1 concepts using chat-based messages."""
 
-    def __init__(self, client, model_name: str, batch_size: int = 5):
-        self.client = client
-        self.model_name = model_name
-        self.batch_size = batch_size
+    name = "concept_map"
 
-    def chunk_issues(self, issues: Dict[int, LogicIssue]):
-        """Split logic issues dict into batches."""
-        if not issues:
-            return
+    def __init__(
+        self,
+        client,
+        model_name: str,
+        prompt_cache: Optional[PromptCache] = None,
+        token_budget: Optional[int] = None,
+        max_batch_items: int = 12,
+        max_field_tokens: int = 256,
+        call_policy: Optional[CallPolicy] = None,
+        model_router: Optional[ModelRouter] = None,
+    ):
+        super().__init__(
+            client, model_name, prompt_cache, call_policy, model_router
+        )
+        self.token_budget = token_budget or get_token_budget(model_name)
+        self.max_batch_items = max_batch_items
+        self.max_field_tokens = max_field_tokens
 
-        issue_items = list(issues.items())
-        batch_size = max(1, self.batch_size)
+    def chunk_issues(
+        self,
+        issues: Dict[int, LogicIssue],
+        expected_concepts: List[str],
+        assignment_requirements: str,
+    ) -> List[Dict[int, LogicIssue]]:
+        """Pack logic issues into batches that fit the prompt token budget."""
+        if not issues:
+            return []
 
-        for i in range(0, len(issue_items), batch_size):
-            yield dict(issue_items[i : i + batch_size])
+        overhead = count_message_tokens(
+            self.generate_messages([], expected_concepts, assignment_requirements)
+        )
+        batches, fill_ratio = pack_batches(
+            list(issues.items()),
+            cost=lambda item: count_tokens(self.format_issue(item[1])) + 1,
+            budget=self.token_budget - overhead,
+            max_items=self.max_batch_items,
+        )
+        self.record_batches(len(batches))
+        logger.info(
+            f"ConceptMappingAgent packed {len(issues)} issues into {len(batches)} "
+            f"batches (fill ratio {fill_ratio:.2f}, budget {self.token_budget} tokens)"
+        )
+        return [dict(batch) for batch in batches]
 
     def format_issue(self, issue: LogicIssue) -> str:
         """Format a LogicIssue into a concise string for the prompt."""
@@ -35,9 +76,10 @@ class ConceptMappingAgent:
 
         return (
             f"Issue {issue['evidence']} | "
-            f"Summary: {issue['issue']} | "
+            f"Summary: {truncate_text(issue['issue'], self.max_field_tokens)} | "
             f"Evidence (test case ID): {issue['evidence']} | "
-            f"Code snippet: {issue['code_snippet']}{location_str}"
+            f"Code snippet: {truncate_text(issue['code_snippet'], self.max_field_tokens)}"
+            f"{location_str}"
         )
 
     def generate_messages(
@@ -93,31 +135,33 @@ class ConceptMappingAgent:
 
         return [system_msg, user_msg]
 
-    def analyze(self, state: ReviewState) -> ReviewState:
-        """Run concept mapping analysis on a submission state with batching and update original issues."""
+    async def analyze(self, state: ReviewState) -> Dict[str, Any]:
+        """Map logic issues to CS1 concepts; returns only the changed issue fields."""
         logger.debug("Starting ConceptMappingAgent")
-        new_state: ReviewState = dict(state)
 
-        logic_issues: Dict[int, LogicIssue] = new_state.get("logic_issues", {})
-        expected_concepts: List[str] = new_state.get("expected_concepts", [])
-        assignment_req: str = new_state.get("assignment_requirements", "")
+        logic_issues: Dict[int, LogicIssue] = state.get("logic_issues", {})
+        expected_concepts: List[str] = state.get("expected_concepts", [])
+        assignment_req: str = truncate_text(
+            state.get("assignment_requirements", ""), self.token_budget // 4
+        )
 
         all_concept_issues: List[Dict[str, Any]] = []
+        # Only the concept fields of each issue; the logic_issues reducer merges them.
+        issue_updates: Dict[int, Dict[str, Any]] = {}
+        failed = False
 
-        for batch in self.chunk_issues(logic_issues):
+        for batch in self.chunk_issues(logic_issues, expected_concepts, assignment_req):
             messages = self.generate_messages(
                 list(batch.values()), expected_concepts, assignment_req
             )
 
             try:
-                response = self.client.chat.completions.create(
-                    model=self.model_name,
-                    messages=messages,
+                parsed = await self.complete_json(
+                    messages,
+                    batch_size=len(batch),
                     temperature=0.3,
                     max_output_tokens=2048,
                 )
-                model_text = response.choices[0].message.content
-                parsed = safe_parse_json_response(model_text)
 
                 concept_issues = parsed.get("concept_issues", [])
                 for ci in concept_issues:
@@ -125,19 +169,28 @@ class ConceptMappingAgent:
                     if issue_ref is None or issue_ref not in batch:
                         continue
 
-                    original_issue = batch[issue_ref]
-                    original_issue["relevant_concept"].extend(
-                        ci.get("relevant_concept", [])
-                    )
-                    original_issue["other_concept"].extend(ci.get("other_concept", []))
+                    current = issue_updates.get(issue_ref) or batch[issue_ref]
+                    issue_updates[issue_ref] = {
+                        "relevant_concept": [
+                            *current["relevant_concept"],
+                            *ci.get("relevant_concept", []),
+                        ],
+                        "other_concept": [
+                            *current["other_concept"],
+                            *ci.get("other_concept", []),
+                        ],
+                    }
 
                     all_concept_issues.append(ci)
 
             except Exception as e:
                 logger.error(f"ConceptMappingAgent error on batch: {e}")
-                for issue_ref, issue in batch.items():
-                    issue["relevant_concept"] = []
-                    issue["other_concept"] = []
+                failed = True
+                for issue_ref in batch:
+                    issue_updates[issue_ref] = {
+                        "relevant_concept": [],
+                        "other_concept": [],
+                    }
                     all_concept_issues.append(
                         {
                             "issue_ref": issue_ref,
@@ -147,8 +200,11 @@ class ConceptMappingAgent:
                         }
                     )
 
-        # Update the state with enriched issues
-        new_state["logic_issues"] = logic_issues  # dict updated in-place
-        new_state["concept_issues"] = all_concept_issues
-        logger.debug(f"ConceptMappingAgent output state: {new_state}")
-        return new_state
+        update = {
+            "logic_issues": issue_updates,
+            "concept_issues": all_concept_issues,
+        }
+        if failed:
+            update["failed_stages"] = [self.name]
+        log_state(logger, "ConceptMappingAgent output update", update)
+        return update
@@ -0,0 +1,229 @@
+import copy
+import logging
+from typing import Any, Dict, List, Optional, Tuple
+
+from app.agents.base_agent import LLMAgent
+from app.agents.overview_agent import build_review_items, template_overview
+from app.analysis.static_analyzer import format_static_findings
+from app.models.review_state import (
+    LogicIssue,
+    ReviewState,
+    SandBoxResult,
+    create_logic_issue,
+)
+from app.utils.prompt_budget import (
+    count_message_tokens,
+    count_tokens,
+    get_token_budget,
+    pack_batches,
+    truncate_text,
+)
+from app.utils.llm_resilience import CallPolicy
+from app.utils.model_router import ModelRouter
+from app.utils.prompt_cache import PromptCache
+from app.utils.snippet_locator import resolve_locations
+from app.utils.state_logging import log_state
+from app.utils.failure_clustering import cluster_failing_tests
+
+logger = logging.getLogger(__name__)
+
+
+class ExpressReviewAgent(LLMAgent):
+    """Produces a complete review (errors, warnings and overview) in a single call."""
+
+    name = "express"
+
+    def __init__(
+        self,
+        client,
+        model_name: str,
+        prompt_cache: Optional[PromptCache] = None,
+        token_budget: Optional[int] = None,
+        max_tests: Optional[int] = None,
+        max_field_tokens: int = 128,
+        call_policy: Optional[CallPolicy] = None,
+        model_router: Optional[ModelRouter] = None,
+    ):
+        super().__init__(
+            client, model_name, prompt_cache, call_policy, model_router
+        )
+        self.token_budget = token_budget or get_token_budget(model_name)
+        self.max_tests = max_tests
+        self.max_field_tokens = max_field_tokens
+
+    def format_test_case(self, tc: SandBoxResult) -> str:
+        """Format one failing test for the prompt, truncating oversized fields."""
+        limit = self.max_field_tokens
+        return (
+            f"ID: {tc['id']} | Input: {truncate_text(tc['input'], limit)} | "
+            f"Expected: {truncate_text(tc['expected'], limit)} | "
+            f"Actual: {truncate_text(tc['actual'], limit)}"
+        )
+
+    def pack_clusters(
+        self, clusters: List[List[SandBoxResult]], messages: List[Dict[str, str]]
+    ) -> Tuple[List[List[SandBoxResult]], List[List[SandBoxResult]]]:
+        """Split failing-test clusters into those that fit the prompt and the rest.
+
+        ``messages`` is the prompt without any tests. Clusters are packed by
+        their representative, in order, the same way LogicAgent packs batches.
+        """
+        batches, _ = pack_batches(
+            clusters,
+            cost=lambda cluster: count_tokens(self.format_test_case(cluster[0])) + 1,
+            budget=self.token_budget - count_message_tokens(messages),
+            max_items=self.max_tests,
+        )
+        if not batches:
+            return [], []
+        return batches[0], [cluster for batch in batches[1:] for cluster in batch]
+
+    def generate_messages(
+        self,
+        code: str,
+        failed_tests: List[SandBoxResult],
+        assignment_requirements: str,
+        expected_concepts: List[str],
+        static_notes: str = "",
+    ) -> List[Dict[str, str]]:
+        """Build one prompt covering logic errors, style warnings and the overview."""
+        system_msg = {
+            "role": "system",
+            "content": (
+                "You are a CS1 teacher giving quick formative feedback on student code. "
+                "You find the causes of failing tests, point out the most important "
+                "style issues and summarize the review for a beginner. "
+                "You must respond in valid JSON only."
+            ),
+        }
+
+        tests_str = "\n".join(self.format_test_case(tc) for tc in failed_tests)
+
+        user_msg = {
+            "role": "user",
+            "content": f"""
+                Assignment requirements: {assignment_requirements}
+                Expected concepts: {expected_concepts}
+
+                Student code:
+                {code}
+
+                Failing test cases:
+                {tests_str or "None"}
+
+                Possible problems found by static checks (exact line numbers;
+                report only those you confirm):
+                {static_notes or "None"}
+
+                Return valid JSON with this structure:
+                {{
+                    "logic_issues": [
+                        {{
+                            "issue": "short explanation of why the test failed",
+                            "evidence": "failing test case id",
+                            "code_snippet": "the code that causes the failure",
+                            "location": {{"start_line": line_number, "end_line": line_number}},
+                            "relevant_concept": ["expected concept involved", ...],
+                            "fix_suggestion": "a hint, not the full solution"
+                        }}
+                    ],
+                    "improvement_notes": [
+                        {{
+                            "issue": "style or quality problem in simple terms",
+                            "code_snippet": "exact code lines related to the issue",
+                            "location": {{"start_line": line_number, "end_line": line_number}},
+                            "fix_suggestion": "specific and actionable improvement"
+                        }}
+                    ],
+                    "overview": "a short, encouraging overview paragraph"
+                }}
+
+                Guidelines:
+                - One logic issue per failing test case; do NOT invent new failures.
+                - At most 3 improvement notes, only the most useful ones.
+                - Keep everything concise and beginner-friendly.
+                """,
+        }
+
+        return [system_msg, user_msg]
+
+    async def analyze(self, state: ReviewState) -> Dict[str, Any]:
+        """Run the whole review in one model call and return the final review keys."""
+        logger.debug("Starting ExpressReviewAgent")
+
+        code = truncate_text(state.get("code", ""), self.token_budget // 2)
+        assignment_req = truncate_text(
+            state.get("assignment_requirements", ""), self.token_budget // 4
+        )
+        expected_concepts = state.get("expected_concepts", [])
+        static_notes = format_static_findings(state.get("static_issues", []))
+
+        # One call only: failing tests that do not fit its prompt go unreviewed.
+        clusters, left_out = self.pack_clusters(
+            cluster_failing_tests(state.get("sandbox_results", [])),
+            self.generate_messages(
+                code, [], assignment_req, expected_concepts, static_notes
+            ),
+        )
+        members = {cluster[0]["id"]: cluster for cluster in clusters}
+        if left_out:
+            logger.warning(
+                f"ExpressReviewAgent: {sum(map(len, left_out))} failing tests "
+                "did not fit the prompt and were not analysed"
+            )
+
+        logic_issues: Dict[int, LogicIssue] = {}
+        improvement_notes: List[Dict[str, Any]] = []
+        overview = ""
+        failed = False
+
+        try:
+            messages = self.generate_messages(
+                code,
+                [cluster[0] for cluster in clusters],
+                assignment_req,
+                expected_concepts,
+                static_notes,
+            )
+            parsed = await self.complete_json(
+                messages, temperature=0.3, max_output_tokens=3072
+            )
+
+            for issue_data in parsed.get("logic_issues") or []:
+                issue = create_logic_issue(
+                    issue=issue_data.get("issue", ""),
+                    evidence=int(issue_data.get("evidence", -1)),
+                    code_snippet=issue_data.get("code_snippet", ""),
+                    location=issue_data.get("location"),
+                )
+                issue["relevant_concept"] = list(issue_data.get("relevant_concept") or [])
+                issue["fix_suggestion"] = issue_data.get("fix_suggestion", "")
+                logic_issues[issue["evidence"]] = issue
+                for case in members.get(issue["evidence"], [])[1:]:
+                    member_issue = copy.deepcopy(issue)
+                    member_issue["evidence"] = case["id"]
+                    logic_issues[case["id"]] = member_issue
+
+            improvement_notes = parsed.get("improvement_notes") or []
+            resolve_locations(state.get("code", ""), logic_issues.values())
+            resolve_locations(state.get("code", ""), improvement_notes)
+            overview = str(parsed.get("overview") or "").strip()
+
+        except Exception as e:
+            logger.error(f"ExpressReviewAgent error: {e}")
+            failed = True
+
+        review_items = build_review_items(logic_issues, improvement_notes)
+        complete = not failed and not left_out
+        update = {
+            "logic_issues": logic_issues,
+            "improvement_notes": improvement_notes,
+            "overview": overview or template_overview(review_items, complete),
+            "review_items": review_items,
+        }
+        if left_out:
+            update["skipped_stages"] = [f"{self.name}_tests"]
+        if failed:
+            update["failed_stages"] = [self.name]
+        log_state(logger, "ExpressReviewAgent output update", update)
+        return update
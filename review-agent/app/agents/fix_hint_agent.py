@@ -1,18 +1,35 @@
+import asyncio
 import logging
-from typing import Any, Dict
+from typing import Any, Dict, Optional
 
+from app.agents.base_agent import LLMAgent
 from app.models.review_state import LogicIssue, ReviewState
-from app.utils.parse_json_response import safe_parse_json_response
+from app.utils.llm_resilience import CallPolicy
+from app.utils.model_router import ModelRouter
+from app.utils.prompt_cache import PromptCache
+from app.utils.state_logging import log_state
 
 logger = logging.getLogger(__name__)
 
 
-class FixHintAgent:
+class FixHintAgent(LLMAgent):
     """Generates fix suggestions for each relevant concept in CS1 submissions with assignment context."""
 
-    def __init__(self, client, model_name: str):
-        self.client = client
-        self.model_name = model_name
+    name = "fix_hint"
+
+    def __init__(
+        self,
+        client,
+        model_name: str,
+        max_concurrency: int = 4,
+        prompt_cache: Optional[PromptCache] = None,
+        call_policy: Optional[CallPolicy] = None,
+        model_router: Optional[ModelRouter] = None,
+    ):
+        super().__init__(
+            client, model_name, prompt_cache, call_policy, model_router
+        )
+        self.max_concurrency = max_concurrency
 
     def generate_messages(
         self, issue: LogicIssue, assignment: str
@@ -59,42 +76,67 @@ class FixHintAgent:
 
         return [system_message, user_message]
 
-    def analyze(self, state: ReviewState) -> ReviewState:
-        """Generate fix suggestions for all relevant logic issues."""
-        logger.debug("Starting FixHintAgent with separated system/user messages")
-
-        new_state: ReviewState = dict(state)
-        logic_issues: Dict[int, LogicIssue] = new_state.get("logic_issues", {})
-        assignment = new_state.get("assignment", "No assignment description provided.")
+    async def generate_hint(
+        self,
+        issue_id: int,
+        issue: LogicIssue,
+        assignment: str,
+        semaphore: asyncio.Semaphore,
+    ) -> Optional[str]:
+        """Return the fix suggestion for a single issue, or None if the call failed."""
+        messages = self.generate_messages(issue, assignment)
+
+        try:
+            # Timeouts come from the call policy and the review deadline; an
+            # outer timeout here would cut its retries off part-way.
+            async with semaphore:
+                parsed = await self.complete_json(
+                    messages, temperature=0.4, max_output_tokens=512
+                )
 
-        for issue_id, issue in logic_issues.items():
-            if not issue.get("relevant_concept"):
-                continue  # Skip if no relevant concept
+            return (
+                parsed.get("fix_suggestion", "").strip()
+                or "No fix suggestion generated."
+            )
 
-            messages = self.generate_messages(issue, assignment)
+        except Exception as e:
+            logger.error(f"FixHintAgent error for issue {issue_id}: {e!r}")
+            return None
 
-            try:
-                response = self.client.chat.completions.create(
-                    model=self.model_name,
-                    messages=messages,
-                    temperature=0.4,
-                    max_output_tokens=512,
-                )
+    async def analyze(self, state: ReviewState) -> Dict[str, Any]:
+        """Generate fix suggestions for all relevant logic issues.
 
-                model_text = response.choices[0].message.content
-                parsed = safe_parse_json_response(model_text)
+        Returns only ``{issue_id: {"fix_suggestion": ...}}``; the logic_issues
+        reducer merges it into the issues.
+        """
+        logger.debug("Starting FixHintAgent with separated system/user messages")
 
-                issue["fix_suggestion"] = (
-                    parsed.get("fix_suggestion", "").strip()
-                    or "No fix suggestion generated."
+        logic_issues: Dict[int, LogicIssue] = state.get("logic_issues", {})
+        assignment = state.get("assignment", "No assignment description provided.")
+
+        # Each issue is independent: a failure only marks that issue.
+        semaphore = asyncio.Semaphore(max(1, self.max_concurrency))
+        issue_ids = [
+            issue_id
+            for issue_id, issue in logic_issues.items()
+            if issue.get("relevant_concept")  # Skip if no relevant concept
+        ]
+        hints = await asyncio.gather(
+            *(
+                self.generate_hint(
+                    issue_id, logic_issues[issue_id], assignment, semaphore
                 )
-                logic_issues[issue_id] = issue
-
-            except Exception as e:
-                logger.error(f"FixHintAgent error for issue {issue_id}: {e}")
-                issue["fix_suggestion"] = "Error generating fix suggestion."
-                logic_issues[issue_id] = issue
-
-        new_state["logic_issues"] = logic_issues
-        logger.debug(f"FixHintAgent output state: {new_state}")
-        return new_state
+                for issue_id in issue_ids
+            )
+        )
+
+        update: Dict[str, Any] = {
+            "logic_issues": {
+                issue_id: {"fix_suggestion": hint or "Error generating fix suggestion."}
+                for issue_id, hint in zip(issue_ids, hints)
+            }
+        }
+        if any(hint is None for hint in hints):
+            update["failed_stages"] = [self.name]
+        log_state(logger, "FixHintAgent output update", update)
+        return update
@@ -1,23 +1,40 @@
-from ast import List
 import logging
-from typing import Any, Dict
+from typing import Any, Dict, List, Optional
 from google.genai import types
-from together import Together
+from together import AsyncTogether
 
+from app.agents.base_agent import LLMAgent
+from app.analysis.static_analyzer import format_static_findings
 from app.models.review_state import ReviewState
-from app.utils.parse_json_response import safe_parse_json_response
+from app.utils.llm_resilience import CallPolicy
+from app.utils.model_router import ModelRouter
+from app.utils.prompt_cache import PromptCache
+from app.utils.snippet_locator import resolve_locations
+from app.utils.state_logging import log_state
 
 logger = logging.getLogger(__name__)
 
 
-class ImprovementAgent:
+class ImprovementAgent(LLMAgent):
     """Analyzes code style and quality using Together AI (e.g., Qwen or Llama)."""
 
-    def __init__(self, client: Together, model_name: str):
-        self.client = client
-        self.model_name = model_name
-
-    def generate_messages(self, code: str) -> List[Dict[str, str]]:
+    name = "improve"
+
+    def __init__(
+        self,
+        client: AsyncTogether,
+        model_name: str,
+        prompt_cache: Optional[PromptCache] = None,
+        call_policy: Optional[CallPolicy] = None,
+        model_router: Optional[ModelRouter] = None,
+    ):
+        super().__init__(
+            client, model_name, prompt_cache, call_policy, model_router
+        )
+
+    def generate_messages(
+        self, code: str, static_notes: str = ""
+    ) -> List[Dict[str, str]]:
         """
         Build the conversation messages for Together AI, separating system and user roles.
         The model acts as a CS1 code-style coach.
@@ -42,6 +59,10 @@ class ImprovementAgent:
                 CODE:
                 {code}
 
+                POSSIBLE ISSUES FOUND BY STATIC CHECKS (exact line numbers; include
+                the ones you confirm as notes, skip the rest):
+                {static_notes or "None"}
+
                 Return valid JSON with this structure:
                 {{
                     "improvement_notes": [
@@ -70,31 +91,34 @@ class ImprovementAgent:
 
         return [system_msg, user_msg]
 
-    def analyze(self, state: ReviewState) -> Dict[str, Any]:
-        """Run style/quality analysis and update the review state."""
+    async def analyze(self, state: ReviewState) -> Dict[str, Any]:
+        """Run style/quality analysis and return the improvement_notes update.
+
+        Only the modified key is returned because this node runs in parallel with
+        the logic branch.
+        """
         logger.debug("Starting ImprovementAgent (Together AI)")
 
-        new_state: ReviewState = dict(state)
+        update: Dict[str, Any] = {}
         code = state["code"]
 
         try:
-            messages = self.generate_messages(code)
-
-            response = self.client.chat.completions.create(
-                model=self.model_name,
-                messages=messages,
-                temperature=0.3,
-                max_output_tokens=2048,
+            messages = self.generate_messages(
+                code, format_static_findings(state.get("static_issues", []))
             )
 
-            model_text = response.choices[0].message.content
-            parsed = safe_parse_json_response(model_text)
+            parsed = await self.complete_json(
+                messages, temperature=0.3, max_output_tokens=2048
+            )
 
-            new_state["improvement_notes"] = parsed.get("improvement_notes", [])
+            notes = parsed.get("improvement_notes", [])
+            resolve_locations(code, notes)
+            update["improvement_notes"] = notes
 
         except Exception as e:
             logger.error(f"ImprovementAgent error: {e}")
-            new_state["improvement_notes"] = []
+            update["improvement_notes"] = []
+            update["failed_stages"] = [self.name]
 
-        logger.debug(f"ImprovementAgent output state: {new_state}")
-        return new_state
+        log_state(logger, "ImprovementAgent output update", update)
+        return update
@@ -1,33 +1,97 @@
-from ast import List
+import asyncio
+import copy
 import logging
-from typing import Any, Dict
-from together import Together
+from typing import Any, Dict, List, Optional
+from together import AsyncTogether
 
+from app.agents.base_agent import LLMAgent
+from app.analysis.static_analyzer import format_static_findings
 from app.models.review_state import (
     LogicIssue,
     ReviewState,
     SandBoxResult,
     create_logic_issue,
 )
-from app.utils.parse_json_response import safe_parse_json_response
+from app.utils.prompt_budget import (
+    count_message_tokens,
+    count_tokens,
+    get_token_budget,
+    pack_batches,
+    truncate_text,
+)
+from app.utils.llm_resilience import CallPolicy
+from app.utils.model_router import ModelRouter
+from app.utils.prompt_cache import PromptCache
+from app.utils.snippet_locator import resolve_locations
+from app.utils.state_logging import log_state
+from app.utils.failure_clustering import cluster_failing_tests
 
 logger = logging.getLogger(__name__)
 
 
-class LogicAgent:
+class LogicAgent(LLMAgent):
     """Analyzes sandbox outputs and produces logic_issues using Qwen Coder via Together AI."""
 
-    def __init__(self, client: Together, model_name: str):
-        self.client = client
-        self.model_name = model_name
-        self.batch_size = 5
+    name = "logic"
+
+    def __init__(
+        self,
+        client: AsyncTogether,
+        model_name: str,
+        max_concurrency: int = 4,
+        prompt_cache: Optional[PromptCache] = None,
+        cluster_tests: bool = True,
+        token_budget: Optional[int] = None,
+        max_batch_items: int = 12,
+        max_field_tokens: int = 256,
+        call_policy: Optional[CallPolicy] = None,
+        model_router: Optional[ModelRouter] = None,
+    ):
+        super().__init__(
+            client, model_name, prompt_cache, call_policy, model_router
+        )
+        self.max_concurrency = max_concurrency
+        self.cluster_tests = cluster_tests
+        self.token_budget = token_budget or get_token_budget(model_name)
+        self.max_batch_items = max_batch_items
+        self.max_field_tokens = max_field_tokens
+
+    def format_test_case(self, tc: SandBoxResult) -> str:
+        """Format one failing test for the prompt, truncating oversized fields."""
+        limit = self.max_field_tokens
+        return (
+            f"ID: {tc["id"]} | Input: {truncate_text(tc["input"], limit)} | "
+            f"Expected: {truncate_text(tc["expected"], limit)} | "
+            f"Actual: {truncate_text(tc["actual"], limit)}"
+        )
+
+    def prepare_code(self, code: str) -> str:
+        """Cap the code at half the budget so there is always room for tests."""
+        return truncate_text(code, self.token_budget // 2)
 
-    def chunk_test_cases(self, cases: list):
-        """Yield successive batches of test cases."""
-        for i in range(0, len(cases), self.batch_size):
-            yield cases[i : i + self.batch_size]
+    def chunk_test_cases(
+        self, code: str, cases: list, static_notes: str = ""
+    ) -> List[list]:
+        """Pack test cases into batches that fit the prompt token budget."""
+        overhead = count_message_tokens(
+            self.generate_messages(code, [], static_notes)
+        )
+        batches, fill_ratio = pack_batches(
+            cases,
+            cost=lambda tc: count_tokens(self.format_test_case(tc)) + 1,
+            budget=self.token_budget - overhead,
+            max_items=self.max_batch_items,
+        )
+        self.record_batches(len(batches))
+        logger.info(
+            f"LogicAgent packed {len(cases)} tests into {len(batches)} batches "
+            f"(fill ratio {fill_ratio:.2f}, budget {self.token_budget} tokens)"
+        )
+        return batches
 
-    def generate_messages(self, code: str, failed_tests: list[SandBoxResult]) -> list:
+    def generate_messages(
+        self, code: str, failed_tests: list[SandBoxResult], static_notes: str = ""
+    ) -> list:
         """
         Generate messages to instruct the model to detect errors from failing test cases
         and link each failure to the code snippet causing it.
@@ -44,12 +108,7 @@ class LogicAgent:
         }
 
         # Format the failing tests
-        tests_str = "\n".join(
-            [
-                f"ID: {tc["id"]} | Input: {tc["input"]} | Expected: {tc["expected"]} | Actual: {tc["actual"]}"
-                for tc in failed_tests
-            ]
-        )
+        tests_str = "\n".join([self.format_test_case(tc) for tc in failed_tests])
 
         user_msg = {
             "role": "user",
@@ -60,12 +119,16 @@ class LogicAgent:
                 Failing test cases:
                 {tests_str}
 
+                Found by static checks (exact line numbers):
+                {static_notes or "None"}
+
                 Instructions:
                 1) For each failing test case, produce a JSON object containing:
                 - "issue": a short explanation of why the test failed
                 - "evidence": the 'id' of the failing test case
                 - "code_snippet": the part of the student's code that likely caused this failure
                 - "location": line/column start and end of the code snippet if known (otherwise null)
+                - If a static finding explains the failure, reuse its line numbers.
                 2) Respond only in JSON format, matching this schema:
                 {{
                     "logic_issues": [
@@ -88,40 +151,94 @@ class LogicAgent:
 
         return [system_msg, user_msg]
 
-    def analyze(self, state: ReviewState) -> Dict[str, Any]:
-        """Run logic analysis on a submission state and return updated state."""
-        logger.debug("Starting LogicAgent (Together AI / Qwen Coder)")
-
-        new_state: ReviewState = dict(state)
-        cases = state.get("sandbox_results", [])
-        all_issues: Dict[int, LogicIssue] = {}
-
-        for batch in self.chunk_test_cases(cases):
-            messages = self.generate_messages(state.get("code", ""), batch)
+    async def analyze_batch(
+        self,
+        code: str,
+        batch: list[SandBoxResult],
+        semaphore: asyncio.Semaphore,
+        static_notes: str = "",
+    ) -> Optional[List[LogicIssue]]:
+        """Send one batch of failing tests to the model and return its issues.
 
-            try:
-                response = self.client.chat.completions.create(
-                    model=self.model_name,
-                    messages=messages,
+        Returns None when the model call failed.
+        """
+        messages = self.generate_messages(code, batch, static_notes)
+        issues: List[LogicIssue] = []
+
+        try:
+            async with semaphore:
+                parsed = await self.complete_json(
+                    messages,
+                    batch_size=len(batch),
                     temperature=0.3,
                     max_output_tokens=2048,
                 )
 
-                model_text = response.choices[0].message.content
-                parsed = safe_parse_json_response(model_text)
-                for issue_data in parsed.get("logic_issues") or []:
-                    issue = create_logic_issue(
+            for issue_data in parsed.get("logic_issues") or []:
+                issues.append(
+                    create_logic_issue(
                         issue=issue_data.get("issue", ""),
                         evidence=int(issue_data.get("evidence", -1)),
                         code_snippet=issue_data.get("code_snippet", ""),
                         location=issue_data.get("location"),
                     )
-                    all_issues[issue["evidence"]] = issue
+                )
+
+        except Exception as e:
+            logger.error(f"LogicAgent batch error: {e}")
+            return None
 
-            except Exception as e:
-                logger.error(f"LogicAgent batch error: {e}")
+        return issues
 
-        new_state["logic_issues"] = all_issues
+    async def analyze(self, state: ReviewState) -> Dict[str, Any]:
+        """Run logic analysis on a submission state and return the logic_issues update.
+
+        Only the modified key is returned because this node runs in parallel with
+        the improvement branch, and both writing the full state would conflict.
+        """
+        logger.debug("Starting LogicAgent (Together AI / Qwen Coder)")
 
-        logger.debug(f"LogicAgent output state: {new_state}")
-        return new_state
+        cases = state.get("sandbox_results", [])
+        code = self.prepare_code(state.get("code", ""))
+        static_notes = format_static_findings(state.get("static_issues", []))
+        all_issues: Dict[int, LogicIssue] = {}
+
+        # Only one representative per cluster of equivalent failures is sent to
+        # the model; its issue is fanned back out to every test in the cluster.
+        if self.cluster_tests:
+            clusters = cluster_failing_tests(cases)
+        else:
+            clusters = [[case] for case in cases]
+        members = {cluster[0]["id"]: cluster for cluster in clusters}
+        representatives = [cluster[0] for cluster in clusters]
+        logger.debug(
+            f"LogicAgent clustered {len(cases)} failing tests into {len(clusters)}"
+        )
+
+        # Batches run concurrently; gather keeps results in batch order so the
+        # merge below is deterministic regardless of completion order.
+        semaphore = asyncio.Semaphore(max(1, self.max_concurrency))
+        batch_results = await asyncio.gather(
+            *(
+                self.analyze_batch(code, batch, semaphore, static_notes)
+                for batch in self.chunk_test_cases(code, representatives, static_notes)
+            )
+        )
+        for issues in batch_results:
+            for issue in issues or []:
+                all_issues[issue["evidence"]] = issue
+                for case in members.get(issue["evidence"], [])[1:]:
+                    member_issue = copy.deepcopy(issue)
+                    member_issue["evidence"] = case["id"]
+                    all_issues[case["id"]] = member_issue
+
+        # Replace the model's line/column guesses with the snippet's real span.
+        resolved = resolve_locations(state.get("code", ""), all_issues.values())
+        logger.debug(f"LogicAgent resolved {resolved}/{len(all_issues)} locations")
+
+        update: Dict[str, Any] = {"logic_issues": all_issues}
+        if any(issues is None for issues in batch_results):
+            update["failed_stages"] = [self.name]
+
+        log_state(logger, "LogicAgent output update", update)
+        return update
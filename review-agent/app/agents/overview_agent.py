@@ -1,18 +1,123 @@
-from ast import List
 import logging
+from typing import Any, Dict, List, Optional
 
+from app.agents.base_agent import LLMAgent
 from app.api.review_code_schema import ReviewItem
-from app.models.review_state import ReviewState
+from app.models.review_state import (
+    ImprovementNote,
+    LogicIssue,
+    ReviewState,
+    StaticFinding,
+)
+from app.utils.deadline import remaining_seconds
+from app.utils.llm_resilience import CallPolicy
+from app.utils.model_router import ModelRouter
+from app.utils.prompt_cache import PromptCache
+from app.utils.state_logging import log_state
 
 logger = logging.getLogger(__name__)
 
 
-class OverviewAgent:
+def build_review_items(
+    logic_issues: Dict[int, LogicIssue],
+    improvement_notes: List[ImprovementNote],
+    static_issues: Optional[List[StaticFinding]] = None,
+) -> List[ReviewItem]:
+    """Merge static findings, logic issues (Errors) and improvement notes (Warnings) into review items."""
+    review_items: List[ReviewItem] = []
+
+    # Findings passed in are shown as they are, first; their locations are exact.
+    for finding in static_issues or []:
+        review_items.append(
+            {
+                "type": finding["severity"],
+                "location": finding["location"],
+                "code_snippet": finding["code_snippet"],
+                "fix_suggestion": finding["fix_suggestion"],
+                "issue": finding["message"],
+                "relevant_concept": [],
+            }
+        )
+
+    # Merge logic issues as Errors
+    for issue in logic_issues.values():
+        review_items.append(
+            {
+                "type": "Error",
+                "location": issue["location"],
+                "code_snippet": issue.get("code_snippet", ""),
+                "fix_suggestion": issue.get("fix_suggestion", ""),
+                "issue": issue.get("issue", ""),
+                "relevant_concept": issue.get("relevant_concept", []),
+            }
+        )
+
+    # Merge improvement notes as Warnings
+    for note in improvement_notes:
+        review_items.append(
+            {
+                "type": "Warning",
+                "location": note.get("location", {"start_line": 1, "end_line": 1}),
+                "code_snippet": note.get("code_snippet", ""),
+                "fix_suggestion": note.get("fix_suggestion", ""),
+                "issue": note.get("issue", ""),
+                "relevant_concept": [],
+            }
+        )
+
+    return review_items
+
+
+def template_overview(review_items: List[ReviewItem], complete: bool = True) -> str:
+    """Overview built from the review items alone, with no model call.
+
+    ``complete`` is False when an earlier stage failed; the overview then says
+    the review is partial instead of praising a submission nobody checked.
+    """
+    errors = [item for item in review_items if item["type"] == "Error"]
+    warnings = [item for item in review_items if item["type"] == "Warning"]
+    if not review_items:
+        if not complete:
+            return (
+                "This submission could not be fully reviewed right now, so no "
+                "feedback is available yet. Please submit again in a few minutes."
+            )
+        return "No problems were found in this submission. Nice work!"
+
+    overview = (
+        f"This review found {len(errors)} error(s) and {len(warnings)} warning(s)."
+    )
+    if not complete:
+        overview = (
+            "Part of this review could not be completed, so some problems may "
+            f"be missing. {overview}"
+        )
+    if errors:
+        overview += f" Start with the first error: {errors[0]['issue']}"
+    else:
+        overview += f" The most useful improvement: {warnings[0]['issue']}"
+    return overview
+
+
+class OverviewAgent(LLMAgent):
     """Aggregates logic issues and improvement notes into a unified review and generates overview."""
 
-    def __init__(self, client, model_name: str):
-        self.client = client
-        self.model_name = model_name
+    name = "overview"
+
+    def __init__(
+        self,
+        client,
+        model_name: str,
+        prompt_cache: Optional[PromptCache] = None,
+        call_policy: Optional[CallPolicy] = None,
+        model_router: Optional[ModelRouter] = None,
+        min_seconds: float = 5.0,
+    ):
+        super().__init__(
+            client, model_name, prompt_cache, call_policy, model_router
+        )
+        # Below this much time left, the overview comes from a template.
+        self.min_seconds = min_seconds
 
     def generate_prompt(self, state: ReviewState) -> str:
         """
@@ -43,58 +148,71 @@ Instructions:
 - Output ONLY the overview text.
 """
 
-    def analyze(self, state: ReviewState) -> ReviewState:
-        """Merge logic issues and improvement notes into review_items and generate overview."""
-
-        logger.debug("Starting OverviewAgent")
-        new_state: ReviewState = dict(state)
-        review_items: List[ReviewItem] = []
-
-        # Merge logic issues as Errors
-        for issue in new_state.get("logic_issues", {}).values():
-            review_items.append(
-                {
-                    "type": "Error",
-                    "location": issue["location"],
-                    "code_snippet": issue.get("code_snippet", ""),
-                    "fix_suggestion": issue.get("fix_suggestion", ""),
-                    "issue": issue.get("issue", ""),
-                    "relevant_concept": issue.get("relevant_concept", []),
-                }
+    def syntax_error_overview(self, state: ReviewState) -> str:
+        """Template overview for submissions that do not compile; needs no model call."""
+        errors = [
+            f for f in state.get("static_issues", []) if f["kind"] == "syntax_error"
+        ]
+        return (
+            "Your code has a syntax error, so it could not be run or reviewed further. "
+            + " ".join(
+                f"Line {f['location']['start_line']}: {f['message']}" for f in errors
             )
+            + " Fix this first and submit again to get feedback on your logic and style."
+        )
 
-        # Merge improvement notes as Warnings
-        for note in new_state.get("improvement_notes", []):
-            review_items.append(
-                {
-                    "type": "Warning",
-                    "location": note.get("location", {"start_line": 1, "end_line": 1}),
-                    "code_snippet": note.get("code_snippet", ""),
-                    "fix_suggestion": note.get("fix_suggestion", ""),
-                    "issue": note.get("issue", ""),
-                    "relevant_concept": [],
-                }
-            )
+    async def analyze(self, state: ReviewState) -> Dict[str, Any]:
+        """Merge logic issues and improvement notes into review_items and generate overview."""
 
-        new_state["review_items"] = review_items
+        logger.debug("Starting OverviewAgent")
+        # Static findings are hints for the agents, which report the ones
+        # they confirm; only a parse error, which skipped them, is shown as is.
+        review_items = build_review_items(
+            state.get("logic_issues", {}),
+            state.get("improvement_notes", []),
+            state.get("static_issues", []) if state.get("has_errors") else None,
+        )
+        update: Dict[str, Any] = {"review_items": review_items}
+
+        if state.get("has_errors"):
+            update["overview"] = self.syntax_error_overview(state)
+            log_state(logger, "OverviewAgent output update", update)
+            return update
+
+        complete = not state.get("failed_stages")
+        if remaining_seconds(state.get("deadline")) < self.min_seconds:
+            logger.warning("OverviewAgent: deadline near, using template overview")
+            update["overview"] = template_overview(review_items, complete)
+            update["skipped_stages"] = ["overview"]
+            log_state(logger, "OverviewAgent output update", update)
+            return update
+
+        if not complete and not review_items:
+            # Nothing to summarize because the analysis failed; a model would
+            # only be asked to describe a submission without findings.
+            logger.warning("OverviewAgent: earlier stages failed, degraded overview")
+            update["overview"] = template_overview(review_items, complete)
+            update["skipped_stages"] = ["overview"]
+            log_state(logger, "OverviewAgent output update", update)
+            return update
 
         # Generate teacher-style overview using prompt
         try:
-            prompt = self.generate_prompt(new_state)
-            response = self.client.chat.completions.create(
-                model=self.model_name,
-                messages=[
+            prompt = self.generate_prompt(state)
+            model_text = await self.complete(
+                [
                     {"role": "system", "content": "You are a helpful CS1 teacher."},
                     {"role": "user", "content": prompt},
                 ],
                 temperature=0.3,
                 max_output_tokens=1024,
             )
-            overview_text = response.choices[0].message.content.strip()
-            new_state["overview"] = overview_text
+            update["overview"] = model_text.strip()
         except Exception as e:
             logger.error(f"OverviewAgent error: {e}")
-            new_state["overview"] = "Unable to generate overview at this time."
+            update["overview"] = template_overview(review_items, complete)
+            update["skipped_stages"] = ["overview"]
+            update["failed_stages"] = [self.name]
 
-        logger.debug(f"OverviewAgent output state: {new_state}")
-        return new_state
+        log_state(logger, "OverviewAgent output update", update)
+        return update
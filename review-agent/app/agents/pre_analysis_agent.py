@@ -0,0 +1,33 @@
+import logging
+from typing import Any, Dict
+
+from app.analysis.static_analyzer import analyze_code, has_syntax_errors
+from app.models.review_state import ReviewState
+from app.utils.state_logging import log_state
+
+logger = logging.getLogger(__name__)
+
+
+class PreAnalysisAgent:
+    """Runs fast local analyzers over the submission before any model call.
+
+    Findings carry exact locations and are passed to the agents as context. A
+    Python submission that does not parse is routed straight to the overview,
+    skipping the LLM agents.
+    """
+
+    name = "pre_analysis"
+
+    async def analyze(self, state: ReviewState) -> Dict[str, Any]:
+        """Return the static_issues and has_errors update."""
+        logger.debug("Starting PreAnalysisAgent")
+
+        language = state.get("language", "")
+        findings = analyze_code(state.get("code", ""), language)
+        update = {
+            "static_issues": findings,
+            "has_errors": has_syntax_errors(findings, language),
+        }
+
+        log_state(logger, "PreAnalysisAgent output update", update)
+        return update
@@ -4,6 +4,7 @@ from google.genai import types
 
 
 from app.utils.parse_json_response import safe_parse_json_response
+from app.utils.state_logging import log_state
 
 logger = logging.getLogger(__name__)
 
@@ -78,7 +79,7 @@ Remember: First-year CS students are still learning basic programming concepts.
 
     def analyze(self, state: Dict[str, Any]) -> Dict[str, Any]:
         logger.debug("Starting ReflectionAgent")
-        logger.debug(f"Input state: {state}")
+        log_state(logger, "ReflectionAgent input state", state)
 
         new_state = dict(state)
         prompt = self.generate_prompt(state)
@@ -94,7 +95,7 @@ Remember: First-year CS students are still learning basic programming concepts.
             response = self.client.models.generate_content(
                 model=self.model_name, contents=prompt, config=config
             )
-            parsed = safe_parse_json_response(response.text)
+            parsed = safe_parse_json_response(response.text, "reflection")
 
             if parsed and parsed.get("final_report"):
                 new_state["final_report"] = parsed.get("final_report")
@@ -114,5 +115,5 @@ Remember: First-year CS students are still learning basic programming concepts.
                 "meta": {"validated": False, "error": str(e)},
             }
 
-        logger.debug(f"ReflectionAgent output state: {new_state}")
+        log_state(logger, "ReflectionAgent output state", new_state)
         return new_state
@@ -0,0 +1,308 @@
+import re
+from collections import Counter
+from typing import List, NamedTuple, Optional, Tuple
+
+from app.analysis.findings import make_finding
+from app.models.review_state import StaticFinding
+
+
+class Token(NamedTuple):
+    kind: str  # "ident", "number", "literal", "op"
+    text: str
+    line: int
+    col: int  # 1-based
+
+
+_TOKEN_RE = re.compile(
+    r"""
+    (?P<ws>[ \t\r\f\v]+)
+    | (?P<newline>\n)
+    | (?P<line_comment>//[^\n]*)
+    | (?P<block_comment>/\*.*?\*/)
+    | (?P<open_comment>/\*)
+    | (?P<raw_string>(?:u8|[uUL])?R"(?P<delimiter>[^()\\\s"]{0,16})\(.*?\)(?P=delimiter)")
+    | (?P<text_block>"{3}.*?"{3})
+    | (?P<string>(?:u8|[uUL])?"(?:\\.|[^"\\\n])*")
+    | (?P<char>(?:u8|[uUL])?'(?:\\.|[^'\\\n])*')
+    | (?P<open_quote>["'])
+    | (?P<ident>[A-Za-z_]\w*)
+    | (?P<number>\.?\d(?:'(?=\w)|[eEpP][-+]|[\w.])*)
+    | (?P<op><=|>=|==|!=|&&|\|\||\+\+|--|::|->|[-+*/%<>=!&|^~?:;,.(){}\[\]#])
+    | (?P<other>.)
+    """,
+    re.VERBOSE | re.DOTALL,
+)
+
+TYPE_KEYWORDS = {
+    "int",
+    "long",
+    "short",
+    "float",
+    "double",
+    "char",
+    "bool",
+    "boolean",
+    "string",
+    "String",
+    "auto",
+    "unsigned",
+    "size_t",
+}
+
+# Expressions whose value is a container length: `i <= x` then indexes past the end.
+LENGTH_PATTERNS = ((".", "size", "("), (".", "length", "("), (".", "length"))
+
+BRACKETS = {")": "(", "]": "[", "}": "{"}
+
+
+def tokenize(code: str) -> Tuple[List[Token], Optional[Token]]:
+    """Split C/C++/Java code into tokens, dropping comments, strings and preprocessor lines.
+
+    Returns the tokens and, if the scan hit an unterminated string or comment,
+    a token marking where it started.
+    """
+    tokens: List[Token] = []
+    line, line_start = 1, 0
+    at_line_start = True
+    skip_line = False
+
+    for match in _TOKEN_RE.finditer(code):
+        kind = match.lastgroup
+        text = match.group()
+        col = match.start() - line_start + 1
+
+        if kind == "newline":
+            line += 1
+            line_start = match.end()
+            at_line_start, skip_line = True, False
+            continue
+        if kind == "open_quote" and skip_line:
+            continue  # apostrophes in #error/#warning text are not literals
+        if kind in ("open_comment", "open_quote"):
+            return tokens, Token("op", text, line, col)
+        # Block comments, raw strings and text blocks may span lines.
+        newlines = text.count("\n") if kind != "ws" else 0
+        token_line = line
+        if newlines:
+            line += newlines
+            line_start = match.start() + text.rfind("\n") + 1
+        if kind in ("ws", "line_comment", "block_comment") or skip_line:
+            continue
+        if at_line_start and text == "#":
+            skip_line = True  # preprocessor directive
+            continue
+        at_line_start = False
+
+        if kind in ("raw_string", "text_block", "string", "char"):
+            tokens.append(Token("literal", text, token_line, col))
+        elif kind in ("ident", "number"):
+            tokens.append(Token(kind, text, line, col))
+        else:
+            tokens.append(Token("op", text, line, col))
+
+    return tokens, None
+
+
+def _bracket_findings(tokens: List[Token], lines: List[str]) -> List[StaticFinding]:
+    stack: List[Token] = []
+    for token in tokens:
+        if token.text in ("(", "[", "{"):
+            stack.append(token)
+        elif token.text in BRACKETS:
+            if not stack or stack[-1].text != BRACKETS[token.text]:
+                return [
+                    make_finding(
+                        "syntax_error",
+                        "Error",
+                        f"Unmatched '{token.text}'.",
+                        lines,
+                        token.line,
+                        start_col=token.col,
+                        end_col=token.col + 1,
+                        fix_suggestion="Check that every bracket is opened and closed in the right order.",
+                    )
+                ]
+            stack.pop()
+
+    if stack:
+        opener = stack[-1]
+        return [
+            make_finding(
+                "syntax_error",
+                "Error",
+                f"'{opener.text}' is never closed.",
+                lines,
+                opener.line,
+                start_col=opener.col,
+                end_col=opener.col + 1,
+                fix_suggestion="Add the missing closing bracket.",
+            )
+        ]
+    return []
+
+
+def _matches_at(tokens: List[Token], i: int, pattern: Tuple[str, ...]) -> bool:
+    return all(
+        i + k < len(tokens) and tokens[i + k].text == part
+        for k, part in enumerate(pattern)
+    )
+
+
+def _off_by_one_findings(tokens: List[Token], lines: List[str]) -> List[StaticFinding]:
+    findings: List[StaticFinding] = []
+    for i, token in enumerate(tokens):
+        if token.text != "for" or i + 1 >= len(tokens) or tokens[i + 1].text != "(":
+            continue
+
+        # Find the loop condition: between the first and second ';' at depth 1.
+        depth, semicolons, cond_start = 0, 0, None
+        for j in range(i + 1, len(tokens)):
+            text = tokens[j].text
+            if text == "(":
+                depth += 1
+            elif text == ")":
+                depth -= 1
+                if depth == 0:
+                    break
+            elif text == ";" and depth == 1:
+                semicolons += 1
+                if semicolons == 1:
+                    cond_start = j + 1
+                elif semicolons == 2:
+                    condition = tokens[cond_start:j]
+                    if _is_length_bound(condition):
+                        findings.append(
+                            make_finding(
+                                "off_by_one",
+                                "Warning",
+                                "Loop runs while index <= length, one past the last element.",
+                                lines,
+                                condition[0].line,
+                                start_col=condition[0].col,
+                                end_line=condition[-1].line,
+                                end_col=condition[-1].col + len(condition[-1].text),
+                                fix_suggestion="Use '<' instead of '<=' when comparing an index with a length.",
+                            )
+                        )
+                    break
+    return findings
+
+
+def _is_length_bound(condition: List[Token]) -> bool:
+    for k, token in enumerate(condition):
+        if token.text != "<=":
+            continue
+        rhs = condition[k + 1 :]
+        for m, rhs_token in enumerate(rhs):
+            if rhs_token.text in ("strlen", "sizeof"):
+                return True
+            if any(_matches_at(rhs, m, pattern) for pattern in LENGTH_PATTERNS):
+                return True
+    return False
+
+
+# Keywords whose braces hold members, not statements.
+TYPE_BODY_KEYWORDS = {"struct", "class", "union", "enum", "interface", "record"}
+
+# Tokens that may sit between a function's ")" and its "{" (qualifiers,
+# throws clauses, trailing return types, constructor initializers aside).
+SIGNATURE_TAIL = {",", "::", ".", "<", ">", "*", "&", ":", "->", "[", "]"}
+
+
+def _in_function_body(tokens: List[Token]) -> List[bool]:
+    """For each token, whether it sits inside a function body.
+
+    A ``{`` right after a signature's ``)`` opens a function (or, nested, a
+    control statement); one after ``struct Name`` holds members; any other
+    ``{`` (initializers, plain scopes) is whatever encloses it.
+    """
+    flags: List[bool] = []
+    stack: List[bool] = []
+    for i, token in enumerate(tokens):
+        if token.text == "{":
+            j = i - 1
+            type_body = False
+            while j >= 0 and (
+                tokens[j].kind in ("ident", "number")
+                or tokens[j].text in SIGNATURE_TAIL
+            ):
+                type_body = type_body or tokens[j].text in TYPE_BODY_KEYWORDS
+                j -= 1
+            after_signature = j >= 0 and tokens[j].text == ")"
+            enclosing = bool(stack) and stack[-1]
+            stack.append(not type_body and (after_signature or enclosing))
+        elif token.text == "}" and stack:
+            stack.pop()
+        flags.append(bool(stack) and stack[-1])
+    return flags
+
+
+def _unused_variable_findings(
+    tokens: List[Token], lines: List[str]
+) -> List[StaticFinding]:
+    """Local variables declared in a function body and never mentioned again.
+
+    Fields, globals and parameters are left alone: a name used only once
+    there is normal, and reporting it would be noise.
+    """
+    identifier_counts = Counter(t.text for t in tokens if t.kind == "ident")
+    in_function = _in_function_body(tokens)
+    findings: List[StaticFinding] = []
+
+    for i in range(len(tokens) - 2):
+        type_token, name, follower = tokens[i], tokens[i + 1], tokens[i + 2]
+        if type_token.text not in TYPE_KEYWORDS or name.kind != "ident":
+            continue
+        if name.text in TYPE_KEYWORDS or follower.text not in ("=", ";", "["):
+            continue
+        if not in_function[i]:
+            continue
+        # Declarations start a statement (or a for loop's init); skips casts
+        # and the parameters of lambdas and local classes.
+        previous = tokens[i - 1].text if i > 0 else ";"
+        if previous == "(":
+            previous = tokens[i - 2].text if i > 1 else ""
+        if previous not in (";", "{", "}", "for", "const", "static", "final"):
+            continue
+        if identifier_counts[name.text] == 1:
+            findings.append(
+                make_finding(
+                    "unused_variable",
+                    "Warning",
+                    f"Variable '{name.text}' is declared but never used.",
+                    lines,
+                    name.line,
+                    start_col=name.col,
+                    end_col=name.col + len(name.text),
+                    fix_suggestion=f"Remove '{name.text}' or use it where intended.",
+                )
+            )
+    return findings
+
+
+def analyze_clike(code: str) -> List[StaticFinding]:
+    """Bracket/syntax errors, unused locals and `<= length` loop bounds in C, C++ or Java."""
+    lines = code.splitlines() or [""]
+    tokens, unterminated = tokenize(code)
+
+    if unterminated is not None:
+        what = "comment" if unterminated.text == "/*" else "string or character literal"
+        return [
+            make_finding(
+                "syntax_error",
+                "Error",
+                f"Unterminated {what}.",
+                lines,
+                unterminated.line,
+                start_col=unterminated.col,
+                fix_suggestion=f"Close the {what} that starts here.",
+            )
+        ]
+
+    syntax = _bracket_findings(tokens, lines)
+    if syntax:
+        return syntax
+
+    return _unused_variable_findings(tokens, lines) + _off_by_one_findings(
+        tokens, lines
+    )
@@ -0,0 +1,34 @@
+from typing import List, Optional
+
+from app.models.review_state import StaticFinding
+
+
+def make_finding(
+    kind: str,
+    severity: str,
+    message: str,
+    lines: List[str],
+    start_line: int,
+    start_col: int = 1,
+    end_line: Optional[int] = None,
+    end_col: Optional[int] = None,
+    fix_suggestion: str = "",
+) -> StaticFinding:
+    """Build a StaticFinding whose snippet is cut from the 1-based line range."""
+    end_line = end_line or start_line
+    snippet = "\n".join(lines[start_line - 1 : end_line]).strip()
+    if end_col is None:
+        end_col = len(lines[end_line - 1]) + 1 if 0 < end_line <= len(lines) else 1
+    return {
+        "kind": kind,
+        "severity": severity,
+        "message": message,
+        "location": {
+            "start_line": start_line,
+            "start_col": start_col,
+            "end_line": end_line,
+            "end_col": end_col,
+        },
+        "code_snippet": snippet,
+        "fix_suggestion": fix_suggestion,
+    }
@@ -0,0 +1,163 @@
+import ast
+from typing import Dict, List
+
+from app.analysis.findings import make_finding
+from app.models.review_state import StaticFinding
+
+
+def _is_len_call(node: ast.AST) -> bool:
+    return (
+        isinstance(node, ast.Call)
+        and isinstance(node.func, ast.Name)
+        and node.func.id == "len"
+    )
+
+
+def _is_len_plus_one(node: ast.AST) -> bool:
+    return (
+        isinstance(node, ast.BinOp)
+        and isinstance(node.op, ast.Add)
+        and _is_len_call(node.left)
+        and isinstance(node.right, ast.Constant)
+        and node.right.value == 1
+    )
+
+
+class _FunctionScopeVisitor(ast.NodeVisitor):
+    """Collects the local names one function body binds and reads.
+
+    Only plain ``name = value`` assignments are candidates: unpacking, loop
+    targets and ``with``/``except`` names often bind values on purpose that
+    are never read, and reporting them would be noise.
+    """
+
+    def __init__(self):
+        self.assigned: Dict[str, ast.Name] = {}
+        self.loaded: set = set()
+        self.declared_global: set = set()
+
+    def visit_Name(self, node: ast.Name):
+        if not isinstance(node.ctx, ast.Store):
+            self.loaded.add(node.id)
+
+    def visit_Assign(self, node: ast.Assign):
+        for target in node.targets:
+            if isinstance(target, ast.Name):
+                self.assigned.setdefault(target.id, target)
+        self.generic_visit(node)
+
+    def visit_AnnAssign(self, node: ast.AnnAssign):
+        if node.value is not None and isinstance(node.target, ast.Name):
+            self.assigned.setdefault(node.target.id, node.target)
+        self.generic_visit(node)
+
+    def visit_AugAssign(self, node: ast.AugAssign):
+        # `count += 1` reads count; a counter updated in a loop is in use.
+        if isinstance(node.target, ast.Name):
+            self.loaded.add(node.target.id)
+        self.generic_visit(node)
+
+    def visit_Global(self, node: ast.Global):
+        self.declared_global.update(node.names)
+
+    def visit_Nonlocal(self, node: ast.Nonlocal):
+        self.declared_global.update(node.names)
+
+    # Nested scopes are analyzed on their own.
+    def visit_FunctionDef(self, node):
+        self.loaded.update(
+            n.id for n in ast.walk(node) if isinstance(n, ast.Name)
+        )
+
+    visit_AsyncFunctionDef = visit_FunctionDef
+    visit_Lambda = visit_FunctionDef
+    visit_ClassDef = visit_FunctionDef
+
+
+def analyze_python(code: str) -> List[StaticFinding]:
+    """Syntax errors, unused locals and len()-based off-by-one bounds in Python code."""
+    lines = code.splitlines() or [""]
+
+    try:
+        tree = ast.parse(code)
+    except SyntaxError as e:
+        line = min(max(e.lineno or 1, 1), len(lines))
+        return [
+            make_finding(
+                "syntax_error",
+                "Error",
+                f"Syntax error: {e.msg}",
+                lines,
+                line,
+                start_col=e.offset or 1,
+                fix_suggestion="Fix the syntax on this line so the program can run.",
+            )
+        ]
+
+    findings: List[StaticFinding] = []
+
+    for node in ast.walk(tree):
+        # Unused local variables
+        if isinstance(node, (ast.FunctionDef, ast.AsyncFunctionDef)):
+            visitor = _FunctionScopeVisitor()
+            for stmt in node.body:
+                visitor.visit(stmt)
+            for name, name_node in visitor.assigned.items():
+                if (
+                    name.startswith("_")
+                    or name in visitor.loaded
+                    or name in visitor.declared_global
+                ):
+                    continue
+                findings.append(
+                    make_finding(
+                        "unused_variable",
+                        "Warning",
+                        f"Variable '{name}' is assigned but never used.",
+                        lines,
+                        name_node.lineno,
+                        start_col=name_node.col_offset + 1,
+                        end_col=name_node.end_col_offset + 1,
+                        fix_suggestion=f"Remove '{name}' or use it where intended.",
+                    )
+                )
+
+        # for i in range(len(x) + 1) / range(0, len(x) + 1)
+        if (
+            isinstance(node, ast.Call)
+            and isinstance(node.func, ast.Name)
+            and node.func.id == "range"
+            and node.args
+            and _is_len_plus_one(node.args[0] if len(node.args) == 1 else node.args[1])
+        ):
+            findings.append(
+                make_finding(
+                    "off_by_one",
+                    "Warning",
+                    "Loop bound goes one past the last index (len(...) + 1).",
+                    lines,
+                    node.lineno,
+                    start_col=node.col_offset + 1,
+                    end_line=node.end_lineno,
+                    end_col=node.end_col_offset + 1,
+                    fix_suggestion="Valid indexes run from 0 to len(...) - 1.",
+                )
+            )
+
+        # x[len(x)]
+        if isinstance(node, ast.Subscript) and _is_len_call(node.slice):
+            findings.append(
+                make_finding(
+                    "off_by_one",
+                    "Warning",
+                    "Indexing with len(...) is always one past the last element.",
+                    lines,
+                    node.lineno,
+                    start_col=node.col_offset + 1,
+                    end_line=node.end_lineno,
+                    end_col=node.end_col_offset + 1,
+                    fix_suggestion="Use len(...) - 1 (or -1) for the last element.",
+                )
+            )
+
+    return findings
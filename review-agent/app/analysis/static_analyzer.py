@@ -0,0 +1,49 @@
+import logging
+from typing import List
+
+from app.analysis.clike_analyzer import analyze_clike
+from app.analysis.python_analyzer import analyze_python
+from app.models.review_state import StaticFinding
+
+logger = logging.getLogger(__name__)
+
+PYTHON_LANGUAGES = ("python", "python3", "py")
+
+
+def normalize_language(language: str) -> str:
+    return language.strip().lower().replace(" ", "")
+
+
+def analyze_code(code: str, language: str) -> List[StaticFinding]:
+    """Run the local analyzer for ``language`` (as declared by AssignmentContext)."""
+    normalized = normalize_language(language)
+    try:
+        if normalized in PYTHON_LANGUAGES:
+            return analyze_python(code)
+        if normalized in ("c", "c++", "cpp", "java"):
+            return analyze_clike(code)
+    except Exception as e:
+        logger.error(f"Static analysis failed for {language}: {e}")
+        return []
+
+    logger.debug(f"No static analyzer for language {language!r}")
+    return []
+
+
+def has_syntax_errors(findings: List[StaticFinding], language: str) -> bool:
+    """Whether ``findings`` prove the code does not parse.
+
+    Only Python is checked with the language's own parser. The C-like
+    tokenizer is a heuristic that valid code can trip, so its syntax findings
+    are hints for the agents, never a reason to skip them.
+    """
+    return normalize_language(language) in PYTHON_LANGUAGES and any(
+        f["kind"] == "syntax_error" for f in findings
+    )
+
+
+def format_static_findings(findings: List[StaticFinding]) -> str:
+    """One line per finding, for inclusion in agent prompts."""
+    return "\n".join(
+        f"- line {f['location']['start_line']}: {f['message']}" for f in findings
+    )
@@ -0,0 +1,128 @@
+from typing import List
+
+from fastapi import APIRouter, Request
+from fastapi.responses import PlainTextResponse
+
+from app.services.review_code_service import ReviewCodeService
+from app.services.review_jobs import ReviewJobQueue
+from app.utils.metrics import CONTENT_TYPE, metrics, render_gauge
+
+router = APIRouter()
+
+BREAKER_STATES = ("closed", "half_open", "open")
+
+
+def render_service_gauges(service: ReviewCodeService) -> str:
+    """Point-in-time values from the caches, breaker, scheduler and routers."""
+    parts: List[str] = []
+    agents = service.llm_agents()
+
+    caches = {"review": service.review_cache}
+    caches["prompt"] = next(
+        (agent.prompt_cache for agent in agents if agent.prompt_cache), None
+    )
+    stats = {name: cache.stats() for name, cache in caches.items() if cache}
+    parts.append(
+        render_gauge(
+            "cache_hit_ratio",
+            "Hits over lookups since start, per cache.",
+            ("cache",),
+            [((name,), s["hit_rate"]) for name, s in stats.items()],
+        )
+    )
+    parts.append(
+        render_gauge(
+            "cache_entries",
+            "Entries currently held in memory, per cache.",
+            ("cache",),
+            [((name,), s["entries"]) for name, s in stats.items()],
+        )
+    )
+
+    breaker = next(
+        (
+            agent.call_policy.circuit_breaker
+            for agent in agents
+            if agent.call_policy.circuit_breaker
+        ),
+        None,
+    )
+    if breaker is not None:
+        state = breaker.state
+        parts.append(
+            render_gauge(
+                "llm_circuit_breaker_state",
+                "1 for the provider circuit breaker's current state.",
+                ("state",),
+                [((name,), float(name == state)) for name in BREAKER_STATES],
+            )
+        )
+
+    scheduler = next(
+        (
+            agent.call_policy.scheduler
+            for agent in agents
+            if agent.call_policy.scheduler
+        ),
+        None,
+    )
+    if scheduler is not None and scheduler.enabled:
+        parts.append(
+            render_gauge(
+                "llm_scheduler_queued_calls",
+                "Model calls waiting for the provider rate limits, per priority.",
+                ("priority",),
+                [((name,), count) for name, count in scheduler.queued().items()],
+            )
+        )
+
+    p95, error_rate = [], []
+    for agent in agents:
+        for model, model_stats in agent.model_router.stats.items():
+            labels = (agent.name, model)
+            error_rate.append((labels, model_stats.error_rate()))
+            latency = model_stats.p95()
+            if latency is not None:
+                p95.append((labels, latency))
+    parts.append(
+        render_gauge(
+            "llm_model_p95_seconds",
+            "Rolling p95 latency the model router sees, per agent and model.",
+            ("agent", "model"),
+            p95,
+        )
+    )
+    parts.append(
+        render_gauge(
+            "llm_model_error_rate",
+            "Rolling error rate the model router sees, per agent and model.",
+            ("agent", "model"),
+            error_rate,
+        )
+    )
+    return "".join(parts)
+
+
+def render_job_gauges(jobs: ReviewJobQueue) -> str:
+    stats = jobs.stats()
+    return "".join(
+        render_gauge(name, help, (), [((), stats[key])])
+        for name, help, key in (
+            ("review_job_queue_depth", "Review jobs waiting for a worker.", "queued"),
+            ("review_job_workers_busy", "Workers running a review job.", "running"),
+            ("review_job_workers", "Size of the review job worker pool.", "workers"),
+        )
+    )
+
+
+@router.get("/metrics", response_class=PlainTextResponse)
+async def get_metrics(request: Request) -> PlainTextResponse:
+    """Prometheus scrape endpoint."""
+    body = metrics.render()
+    service = getattr(request.app.state, "review_service", None)
+    if service is not None:
+        body += render_service_gauges(service)
+    jobs = getattr(request.app.state, "review_jobs", None)
+    if jobs is not None:
+        body += render_job_gauges(jobs)
+    return PlainTextResponse(body, media_type=CONTENT_TYPE)
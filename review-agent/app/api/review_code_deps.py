@@ -1,76 +1,390 @@
+import asyncio
+import logging
 import os
-from fastapi import Depends
+
+import aiohttp
+import together
+from fastapi import Request
 from app.agents.logic_agent import LogicAgent
+from app.agents.concept_fix_agent import ConceptFixAgent
 from app.agents.concept_mapping_agent import ConceptMappingAgent
+from app.agents.express_review_agent import ExpressReviewAgent
 from app.agents.fix_hint_agent import FixHintAgent
 from app.agents.improvement_agent import ImprovementAgent
 from app.agents.overview_agent import OverviewAgent
+from app.agents.pre_analysis_agent import PreAnalysisAgent
 from app.agents.reflection_agent import ReflectionAgent
+from app.services.review_cache import ReviewCache
 from app.services.review_code_service import ReviewCodeService
-from together import Together
+from app.services.review_jobs import ReviewJobQueue
+from app.utils.llm_resilience import CallPolicy, CircuitBreaker
+from app.utils.model_router import ModelRouter
+from app.utils.prompt_cache import PromptCache
+from app.utils.provider_scheduler import ProviderScheduler
+from app.utils.state_logging import configure_state_logging
+from app.utils.tracing import FileSpanExporter, OTLPSpanExporter, tracer
+from together import AsyncTogether
+
+logger = logging.getLogger(__name__)
 
 
-def get_together_client() -> Together:
+def get_together_client() -> AsyncTogether:
     api_key = os.environ.get("TOGETHER_API_KEY")
     if not api_key:
         raise ValueError("Environment variable TOGETHER_API_KEY is not set.")
-    return Together(api_key=api_key)
+    # Retries are owned by each agent's CallPolicy; the SDK's own retry loop
+    # would multiply attempts and hide failures from the circuit breaker.
+    return AsyncTogether(api_key=api_key, max_retries=0)
+
+
+# -----------------------------
+# Shared HTTP transport
+# -----------------------------
+async def create_http_session() -> aiohttp.ClientSession:
+    """Create the pooled aiohttp session shared by every Together call."""
+    connector = aiohttp.TCPConnector(
+        limit=int(os.environ.get("LLM_HTTP_POOL_SIZE", "100")),
+        keepalive_timeout=float(os.environ.get("LLM_HTTP_KEEPALIVE", "60")),
+    )
+    return aiohttp.ClientSession(connector=connector)
+
+
+async def warm_http_session(session: aiohttp.ClientSession) -> None:
+    """Open keep-alive connections to the provider before the first request."""
+    base_url = os.environ.get("TOGETHER_BASE_URL", together.constants.BASE_URL)
+    connections = int(os.environ.get("LLM_HTTP_WARM_CONNECTIONS", "2"))
+
+    async def warm_one():
+        async with session.head(base_url) as response:
+            await response.read()
+
+    results = await asyncio.gather(
+        *(warm_one() for _ in range(connections)), return_exceptions=True
+    )
+    failures = [r for r in results if isinstance(r, Exception)]
+    if failures:
+        logger.warning(f"HTTP session warm-up failed: {failures[0]}")
+
+
+# -----------------------------
+# Model routing and call policies
+# -----------------------------
+LARGE_MODEL = "Qwen/Qwen3-Coder-480B-A35B-Instruct-FP8"
+SMALL_MODEL = "Qwen/Qwen2.5-7B-Instruct-Turbo"
+
+# Default (primary, fallback) model per agent. Agents that reason about the
+# student's logic stay on the large coder model; style notes and the overview
+# are simple enough for a small, fast model, with the large one as fallback.
+MODEL_ROUTES: dict[str, tuple[str, str | None]] = {
+    "LOGIC_AGENT": (LARGE_MODEL, None),
+    "CONCEPT_MAPPING_AGENT": (LARGE_MODEL, None),
+    "FIX_HINT_AGENT": (LARGE_MODEL, None),
+    "CONCEPT_FIX_AGENT": (LARGE_MODEL, None),
+    "EXPRESS_AGENT": (LARGE_MODEL, None),
+    "IMPROVEMENT_AGENT": (SMALL_MODEL, LARGE_MODEL),
+    "OVERVIEW_AGENT": (SMALL_MODEL, LARGE_MODEL),
+}
+
+
+def agent_setting(prefix: str, name: str, default: str) -> str:
+    """``<prefix>_<name>`` from the environment, else ``LLM_<name>``, else default."""
+    fallback = os.environ.get(f"LLM_{name}", default)
+    return os.environ.get(f"{prefix}_{name}", fallback)
+
+
+def get_model_router(prefix: str) -> ModelRouter:
+    """Model routing for one agent.
+
+    ``<prefix>_MODEL`` and ``<prefix>_FALLBACK_MODEL`` override MODEL_ROUTES
+    (an empty fallback disables it). Traffic moves to the fallback while the
+    primary's p95 latency exceeds ``LATENCY_SLO`` seconds or its error rate
+    exceeds ``MAX_ERROR_RATE``.
+    """
+    primary, fallback = MODEL_ROUTES.get(prefix, (LARGE_MODEL, None))
+    latency_slo = agent_setting(prefix, "LATENCY_SLO", "")
+    return ModelRouter(
+        primary=os.environ.get(f"{prefix}_MODEL", primary),
+        fallback=os.environ.get(f"{prefix}_FALLBACK_MODEL", fallback or "") or None,
+        latency_slo=float(latency_slo) if latency_slo else None,
+        max_error_rate=float(agent_setting(prefix, "MAX_ERROR_RATE", "0.5")),
+    )
+
+
+def get_circuit_breaker() -> CircuitBreaker:
+    """One breaker for the provider, shared by every agent."""
+    return CircuitBreaker(
+        failure_threshold=int(os.environ.get("LLM_BREAKER_FAILURES", "5")),
+        reset_timeout=float(os.environ.get("LLM_BREAKER_RESET", "30")),
+    )
+
+
+def get_provider_scheduler() -> ProviderScheduler:
+    """One rate limiter for the provider account, shared by every agent.
+
+    LLM_RPM / LLM_TPM are the account's requests and tokens per minute (0, the
+    default, leaves that limit off); LLM_RATE_BURST is the burst allowance in
+    seconds of budget.
+    """
+    return ProviderScheduler(
+        requests_per_minute=float(os.environ.get("LLM_RPM", "0")),
+        tokens_per_minute=float(os.environ.get("LLM_TPM", "0")),
+        burst_seconds=float(os.environ.get("LLM_RATE_BURST", "1")),
+    )
+
+
+def get_call_policy(
+    prefix: str,
+    circuit_breaker: CircuitBreaker | None = None,
+    scheduler: ProviderScheduler | None = None,
+) -> CallPolicy:
+    """Call policy for one agent.
+
+    Settings (see ``agent_setting``): CALL_TIMEOUT, MAX_ATTEMPTS,
+    RETRY_BASE_DELAY and HEDGE.
+    """
+    return CallPolicy(
+        timeout=float(agent_setting(prefix, "CALL_TIMEOUT", "60")),
+        max_attempts=int(agent_setting(prefix, "MAX_ATTEMPTS", "3")),
+        base_delay=float(agent_setting(prefix, "RETRY_BASE_DELAY", "0.5")),
+        hedge=agent_setting(prefix, "HEDGE", "false").lower() == "true",
+        circuit_breaker=circuit_breaker,
+        scheduler=scheduler,
+    )
+
+
+# -----------------------------
+# Agent builders
+# -----------------------------
+def get_prompt_cache() -> PromptCache | None:
+    max_entries = int(os.environ.get("PROMPT_CACHE_SIZE", "4096"))
+    if max_entries <= 0:
+        return None
+    return PromptCache(max_entries=max_entries)
 
 
-def get_logic_agent(client=Depends(get_together_client)) -> LogicAgent:
+def get_logic_agent(
+    client: AsyncTogether,
+    prompt_cache: PromptCache | None = None,
+    circuit_breaker: CircuitBreaker | None = None,
+    scheduler: ProviderScheduler | None = None,
+) -> LogicAgent:
+    router = get_model_router("LOGIC_AGENT")
     return LogicAgent(
-        client=client, model_name="Qwen/Qwen3-Coder-480B-A35B-Instruct-FP8"
-    )  # replace with your model
+        client=client,
+        model_name=router.primary,
+        max_concurrency=int(agent_setting("LOGIC_AGENT", "MAX_CONCURRENCY", "4")),
+        prompt_cache=prompt_cache,
+        cluster_tests=os.environ.get("LOGIC_AGENT_CLUSTER_TESTS", "true").lower()
+        == "true",
+        call_policy=get_call_policy("LOGIC_AGENT", circuit_breaker, scheduler),
+        model_router=router,
+    )
 
 
 def get_concept_mapping_agent(
-    client=Depends(get_together_client),
+    client: AsyncTogether,
+    prompt_cache: PromptCache | None = None,
+    circuit_breaker: CircuitBreaker | None = None,
+    scheduler: ProviderScheduler | None = None,
 ) -> ConceptMappingAgent:
+    router = get_model_router("CONCEPT_MAPPING_AGENT")
     return ConceptMappingAgent(
-        client=client, model_name="Qwen/Qwen3-Coder-480B-A35B-Instruct-FP8"
+        client=client,
+        model_name=router.primary,
+        prompt_cache=prompt_cache,
+        call_policy=get_call_policy(
+            "CONCEPT_MAPPING_AGENT", circuit_breaker, scheduler
+        ),
+        model_router=router,
     )
 
 
-def get_fix_hint_agent(client=Depends(get_together_client)) -> FixHintAgent:
+def get_fix_hint_agent(
+    client: AsyncTogether,
+    prompt_cache: PromptCache | None = None,
+    circuit_breaker: CircuitBreaker | None = None,
+    scheduler: ProviderScheduler | None = None,
+) -> FixHintAgent:
+    router = get_model_router("FIX_HINT_AGENT")
     return FixHintAgent(
-        client=client, model_name="Qwen/Qwen3-Coder-480B-A35B-Instruct-FP8"
+        client=client,
+        model_name=router.primary,
+        max_concurrency=int(agent_setting("FIX_HINT_AGENT", "MAX_CONCURRENCY", "4")),
+        prompt_cache=prompt_cache,
+        call_policy=get_call_policy("FIX_HINT_AGENT", circuit_breaker, scheduler),
+        model_router=router,
+    )
+
+
+def get_concept_fix_agent(
+    client: AsyncTogether,
+    prompt_cache: PromptCache | None = None,
+    circuit_breaker: CircuitBreaker | None = None,
+    scheduler: ProviderScheduler | None = None,
+) -> ConceptFixAgent:
+    router = get_model_router("CONCEPT_FIX_AGENT")
+    return ConceptFixAgent(
+        client=client,
+        model_name=router.primary,
+        prompt_cache=prompt_cache,
+        max_concurrency=int(agent_setting("CONCEPT_FIX_AGENT", "MAX_CONCURRENCY", "4")),
+        call_policy=get_call_policy("CONCEPT_FIX_AGENT", circuit_breaker, scheduler),
+        model_router=router,
     )
 
 
-def get_improvement_agent(client=Depends(get_together_client)) -> ImprovementAgent:
+def get_improvement_agent(
+    client: AsyncTogether,
+    prompt_cache: PromptCache | None = None,
+    circuit_breaker: CircuitBreaker | None = None,
+    scheduler: ProviderScheduler | None = None,
+) -> ImprovementAgent:
+    router = get_model_router("IMPROVEMENT_AGENT")
     return ImprovementAgent(
-        client=client, model_name="Qwen/Qwen3-Coder-480B-A35B-Instruct-FP8"
+        client=client,
+        model_name=router.primary,
+        prompt_cache=prompt_cache,
+        call_policy=get_call_policy("IMPROVEMENT_AGENT", circuit_breaker, scheduler),
+        model_router=router,
     )
 
 
-def get_overview_agent(client=Depends(get_together_client)) -> OverviewAgent:
+def get_overview_agent(
+    client: AsyncTogether,
+    prompt_cache: PromptCache | None = None,
+    circuit_breaker: CircuitBreaker | None = None,
+    scheduler: ProviderScheduler | None = None,
+) -> OverviewAgent:
+    router = get_model_router("OVERVIEW_AGENT")
     return OverviewAgent(
-        client=client, model_name="Qwen/Qwen3-Coder-480B-A35B-Instruct-FP8"
+        client=client,
+        model_name=router.primary,
+        prompt_cache=prompt_cache,
+        call_policy=get_call_policy("OVERVIEW_AGENT", circuit_breaker, scheduler),
+        model_router=router,
     )
 
 
-def get_reflection_agent(client=Depends(get_together_client)) -> ReflectionAgent:
+def get_express_review_agent(
+    client: AsyncTogether,
+    prompt_cache: PromptCache | None = None,
+    circuit_breaker: CircuitBreaker | None = None,
+    scheduler: ProviderScheduler | None = None,
+) -> ExpressReviewAgent:
+    router = get_model_router("EXPRESS_AGENT")
+    return ExpressReviewAgent(
+        client=client,
+        model_name=router.primary,
+        prompt_cache=prompt_cache,
+        call_policy=get_call_policy("EXPRESS_AGENT", circuit_breaker, scheduler),
+        model_router=router,
+    )
+
+
+def get_pre_analysis_agent() -> PreAnalysisAgent:
+    return PreAnalysisAgent()
+
+
+def get_reflection_agent(client: AsyncTogether) -> ReflectionAgent:
     return ReflectionAgent(
-        client=client, model_name="Qwen/Qwen3-Coder-480B-A35B-Instruct-FP8"
+        client=client, model_name=LARGE_MODEL
+    )
+
+
+def get_review_cache() -> ReviewCache | None:
+    max_entries = int(os.environ.get("REVIEW_CACHE_SIZE", "1024"))
+    if max_entries <= 0:
+        return None
+    return ReviewCache(
+        max_entries=max_entries,
+        ttl_seconds=float(os.environ.get("REVIEW_CACHE_TTL", "3600")),
+        db_path=os.environ.get("REVIEW_CACHE_DB"),  # optional SQLite tier
+    )
+
+
+def configure_tracing() -> None:
+    """Export review traces to a JSON-lines file and/or an OTLP/HTTP collector."""
+    exporters = []
+    path = os.environ.get("TRACE_EXPORT_FILE")
+    if path:
+        exporters.append(FileSpanExporter(path))
+    endpoint = os.environ.get("OTEL_EXPORTER_OTLP_TRACES_ENDPOINT")
+    if endpoint:  # e.g. http://otel-collector:4318/v1/traces
+        exporters.append(
+            OTLPSpanExporter(
+                endpoint, service_name=os.environ.get("OTEL_SERVICE_NAME", "review-agent")
+            )
+        )
+    tracer.configure(exporters)
+
+
+def build_review_job_queue(run, http_session: aiohttp.ClientSession) -> ReviewJobQueue:
+    """Background review jobs: worker pool size, queue bound and optional SQLite."""
+    hosts = os.environ.get("REVIEW_JOB_CALLBACK_HOSTS", "")
+    return ReviewJobQueue(
+        run,
+        workers=int(os.environ.get("REVIEW_JOB_WORKERS", "4")),
+        max_queue=int(os.environ.get("REVIEW_JOB_QUEUE_SIZE", "256")),
+        ttl_seconds=float(os.environ.get("REVIEW_JOB_TTL", "3600")),
+        db_path=os.environ.get("REVIEW_JOB_DB"),  # survive restarts
+        http_session=http_session,
+        # Comma-separated allowlist for callback_url hosts; unset disables callbacks.
+        callback_hosts={h.strip() for h in hosts.split(",") if h.strip()},
+    )
+
+
+def configure_logging() -> None:
+    """Debug state dumps: share of calls logged and the longest line written."""
+    configure_state_logging(
+        rate=float(os.environ.get("LOG_STATE_SAMPLE_RATE", "0.1")),
+        chars=int(os.environ.get("LOG_STATE_MAX_CHARS", "2000")),
+    )
+
+
+def build_review_service(client: AsyncTogether) -> ReviewCodeService:
+    """Build the agents and the compiled review graph once per process."""
+    # One prompt cache shared by every agent so memoized outputs are reused
+    # across requests; keys include the model and full messages.
+    prompt_cache = get_prompt_cache()
+    breaker = get_circuit_breaker()
+    scheduler = get_provider_scheduler()
+    return ReviewCodeService(
+        logic_agent=get_logic_agent(client, prompt_cache, breaker, scheduler),
+        concept_mapping_agent=get_concept_mapping_agent(
+            client, prompt_cache, breaker, scheduler
+        ),
+        fix_hint_agent=get_fix_hint_agent(client, prompt_cache, breaker, scheduler),
+        improvement_agent=get_improvement_agent(
+            client, prompt_cache, breaker, scheduler
+        ),
+        overview_agent=get_overview_agent(client, prompt_cache, breaker, scheduler),
+        reflection_agent=get_reflection_agent(client),
+        review_cache=get_review_cache(),
+        batch_concurrency=int(os.environ.get("BATCH_REVIEW_CONCURRENCY", "8")),
+        concept_fix_agent=get_concept_fix_agent(
+            client, prompt_cache, breaker, scheduler
+        ),
+        # Fused concept_map + fix_hint node: one structured call per issue batch.
+        fuse_concept_fix=os.environ.get("REVIEW_FUSED_CONCEPT_FIX", "false").lower()
+        == "true",
+        express_agent=get_express_review_agent(
+            client, prompt_cache, breaker, scheduler
+        ),
+        pre_analysis_agent=get_pre_analysis_agent(),
+        # Default deadline per review in seconds; 0 disables it.
+        time_budget_seconds=float(os.environ.get("REVIEW_TIME_BUDGET", "90")),
     )
 
 
 # -----------------------------
 # Dependency for ReviewCodeService
 # -----------------------------
-def get_review_service(
-    logic_agent: LogicAgent = Depends(get_logic_agent),
-    concept_mapping_agent: ConceptMappingAgent = Depends(get_concept_mapping_agent),
-    fix_hint_agent: FixHintAgent = Depends(get_fix_hint_agent),
-    improvement_agent: ImprovementAgent = Depends(get_improvement_agent),
-    overview_agent: OverviewAgent = Depends(get_overview_agent),
-    reflection_agent: ReflectionAgent = Depends(get_reflection_agent),
-) -> ReviewCodeService:
-    return ReviewCodeService(
-        logic_agent=logic_agent,
-        concept_mapping_agent=concept_mapping_agent,
-        fix_hint_agent=fix_hint_agent,
-        improvement_agent=improvement_agent,
-        overview_agent=overview_agent,
-        reflection_agent=reflection_agent,
-    )
+async def get_review_service(request: Request) -> ReviewCodeService:
+    # The Together SDK reads its aiohttp session from a context variable, so it
+    # is bound here, in the request's own context, rather than at startup.
+    together.aiosession.set(request.app.state.http_session)
+    return request.app.state.review_service
+
+
+async def get_review_jobs(request: Request) -> ReviewJobQueue:
+    return request.app.state.review_jobs
@@ -1,8 +1,15 @@
+import json
 import logging
+import time
+from typing import Any, AsyncIterator, Dict, Optional
 
-from fastapi import APIRouter, Depends, HTTPException
+from fastapi import APIRouter, Depends, Header, HTTPException
+from fastapi.responses import StreamingResponse
 from app.api.review_code_deps import get_review_service
 from app.api.review_code_schema import (
+    BatchReviewRequest,
+    BatchReviewResponse,
+    BatchReviewResult,
     ColumnContext,
     LineContext,
     ReviewItem,
@@ -11,71 +18,240 @@ from app.api.review_code_schema import (
 )
 from app.models.review_state import ReviewState, create_initial_state
 from app.services.review_code_service import ReviewCodeService
+from app.utils.state_logging import log_state
+from app.utils.tracing import parse_traceparent, tracer
 
 logger = logging.getLogger(__name__)
 
 router = APIRouter()
 
 
-@router.post("/review_code", response_model=ReviewResponse)
-async def review_code(
-    request: ReviewRequest,
-    review_code_service: ReviewCodeService = Depends(get_review_service),
-):
-    """
-    Endpoint that uses the LangGraph workflow with Gemini for code review.
-    """
-    try:
-        # Create initial state using the helper function
-        state_in: ReviewState = create_initial_state(
-            code=request.student_submission.code,
-            sandbox_results=[
-                {
-                    "id": i,
-                    "input": case.input,
-                    "actual": case.actual,
-                    "expected": case.expect,
-                }
-                for i, case in enumerate(
-                    [
-                        result
-                        for result in request.test_results
-                        if result.status == "fail"
-                    ]
-                )
-            ],
-            assignment_requirements=request.assignment.content,
-            expected_concepts=request.assignment.expected_concepts,
-        )
-        logger.debug(f"Creating initial state: {state_in}")
+def build_initial_state(request: ReviewRequest) -> ReviewState:
+    """Create the initial graph state from the failing tests of a request."""
+    return create_initial_state(
+        code=request.student_submission.code,
+        sandbox_results=[
+            {
+                "id": i,
+                "input": case.input,
+                "actual": case.actual,
+                "expected": case.expect,
+            }
+            for i, case in enumerate(
+                [result for result in request.test_results if result.status == "fail"]
+            )
+        ],
+        assignment_requirements=request.assignment.content,
+        expected_concepts=request.assignment.expected_concepts,
+        review_mode=request.mode,
+        language=request.assignment.language,
+        deadline=(
+            time.time() + request.time_budget_seconds
+            if request.time_budget_seconds
+            else None
+        ),
+    )
+
 
-        # Run the review graph
-        result_state = await review_code_service.review_code(state_in)
-        # Get the overview and review items from the result state
-        overview = result_state["overview"]
-        review_items = [
+def build_review_response(result_state: ReviewState) -> ReviewResponse:
+    """Convert the final graph state into the API response."""
+    review_items = []
+    for item in result_state["review_items"]:
+        location = item.get("location") or {}
+        review_items.append(
             ReviewItem(
                 code_snippet=item["code_snippet"],
                 issue=item["issue"],
                 type=item["type"],
                 fix_suggestion=item["fix_suggestion"],
                 line=LineContext(
-                    start=item["location"].get("start_line", 1),
-                    end=item["location"].get("end_line", 1),
+                    start=location.get("start_line", 1),
+                    end=location.get("end_line", 1),
                 ),
                 column=ColumnContext(
-                    start=item["location"].get("start_col"),  # returns None if missing
-                    end=item["location"].get("end_col"),
+                    start=location.get("start_col"),  # returns None if missing
+                    end=location.get("end_col"),
                 ),
             )
-            for item in result_state["review_items"]
-        ]
-
-        return ReviewResponse(
-            summary=overview,
-            detail="Review completed",
-            review_items=review_items,
         )
 
-    except Exception as e:
-        raise HTTPException(status_code=500, detail=f"Review process failed: {str(e)}")
+    return ReviewResponse(
+        summary=result_state["overview"],
+        detail="Review completed",
+        review_items=review_items,
+        skipped_stages=result_state.get("skipped_stages", []),
+        failed_stages=result_state.get("failed_stages", []),
+    )
+
+
+def request_attributes(request: ReviewRequest) -> Dict[str, Any]:
+    """Span attributes describing a review request."""
+    return {
+        "review.language": request.assignment.language,
+        "review.mode": request.mode,
+        "review.code_chars": len(request.student_submission.code),
+        "review.failing_tests": sum(
+            1 for result in request.test_results if result.status == "fail"
+        ),
+    }
+
+
+@router.post("/review_code", response_model=ReviewResponse)
+async def review_code(
+    request: ReviewRequest,
+    review_code_service: ReviewCodeService = Depends(get_review_service),
+    traceparent: Optional[str] = Header(default=None),
+):
+    """
+    Endpoint that uses the LangGraph workflow with Gemini for code review.
+    A W3C ``traceparent`` header joins the review to the caller's trace.
+    """
+    with tracer.start_span(
+        "POST /review_code",
+        request_attributes(request),
+        parent=parse_traceparent(traceparent),
+        kind="server",
+    ):
+        try:
+            # Create initial state using the helper function
+            state_in = build_initial_state(request)
+            log_state(logger, "Creating initial state", state_in)
+
+            # Run the review graph
+            result_state = await review_code_service.review_code(
+                state_in, use_cache=not request.bypass_cache
+            )
+            return build_review_response(result_state)
+
+        except Exception as e:
+            raise HTTPException(
+                status_code=500, detail=f"Review process failed: {str(e)}"
+            )
+
+
+# Which parts of each node's update are sent to the client, and under which event.
+STREAM_EVENTS = {
+    "pre_analysis": [("static_issues", "static_issues")],
+    "logic": [("logic_issues", "logic_issues")],
+    "concept_map": [("concept_mappings", "concept_issues")],
+    "fix_hint": [("fix_hints", "logic_issues")],
+    "concept_fix": [
+        ("concept_mappings", "concept_issues"),
+        ("fix_hints", "logic_issues"),
+    ],
+    "improve": [("improvement_notes", "improvement_notes")],
+    "express": [
+        ("logic_issues", "logic_issues"),
+        ("improvement_notes", "improvement_notes"),
+        ("overview", "overview"),
+    ],
+    "overview": [("overview", "overview")],
+}
+
+
+def format_sse(event: str, data: Any) -> str:
+    payload = json.dumps(data, default=str)
+    return f"event: {event}\ndata: {payload}\n\n"
+
+
+def node_event_data(key: str, update: Dict[str, Any]) -> Any:
+    value = update.get(key)
+    if key == "logic_issues":
+        # Keyed by test case id internally; clients get a list.
+        return list((value or {}).values())
+    return value
+
+
+@router.post("/review_code/stream")
+async def review_code_stream(
+    request: ReviewRequest,
+    review_code_service: ReviewCodeService = Depends(get_review_service),
+    traceparent: Optional[str] = Header(default=None),
+):
+    """
+    Streaming variant of /review_code: sends each node's results as a
+    Server-Sent Event as soon as it finishes, then a final "review" event
+    carrying the same ReviewResponse payload as the non-streaming endpoint.
+    """
+    state_in = build_initial_state(request)
+    log_state(logger, "Creating initial state", state_in)
+
+    async def events() -> AsyncIterator[str]:
+        with tracer.start_span(
+            "POST /review_code/stream",
+            request_attributes(request),
+            parent=parse_traceparent(traceparent),
+            kind="server",
+        ) as span:
+            try:
+                async for node, update in review_code_service.stream_review(
+                    state_in, use_cache=not request.bypass_cache
+                ):
+                    if node == "final":
+                        response = build_review_response(update)
+                        yield format_sse("review", response.model_dump())
+                    else:
+                        for event, key in STREAM_EVENTS.get(node, []):
+                            yield format_sse(event, node_event_data(key, update))
+            except Exception as e:
+                logger.error(f"Streaming review failed: {e}")
+                span.error = f"{type(e).__name__}: {e}"
+                yield format_sse(
+                    "error", {"detail": f"Review process failed: {str(e)}"}
+                )
+
+    return StreamingResponse(
+        events(),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"},
+    )
+
+
+@router.post("/review_code/batch", response_model=BatchReviewResponse)
+async def review_code_batch(
+    request: BatchReviewRequest,
+    review_code_service: ReviewCodeService = Depends(get_review_service),
+    traceparent: Optional[str] = Header(default=None),
+):
+    """
+    Review a whole class of submissions for one assignment. Identical
+    submissions are reviewed once. With "stream": true, results are sent as
+    NDJSON lines in completion order; otherwise one response in request order.
+    """
+    states = [build_initial_state(review) for review in request.reviews]
+    # bypass_cache applies to its own submission only.
+    use_cache = [not review.bypass_cache for review in request.reviews]
+    parent = parse_traceparent(traceparent)
+    attributes = {"batch.size": len(states), "batch.stream": request.stream}
+
+    def to_result(index: int, result) -> BatchReviewResult:
+        if isinstance(result, Exception):
+            return BatchReviewResult(
+                index=index, error=f"Review process failed: {str(result)}"
+            )
+        return BatchReviewResult(index=index, review=build_review_response(result))
+
+    if request.stream:
+
+        async def lines() -> AsyncIterator[str]:
+            with tracer.start_span(
+                "POST /review_code/batch", attributes, parent=parent, kind="server"
+            ):
+                async for index, result in review_code_service.review_batch(
+                    states, use_cache
+                ):
+                    yield to_result(index, result).model_dump_json() + "\n"
+
+        return StreamingResponse(lines(), media_type="application/x-ndjson")
+
+    with tracer.start_span(
+        "POST /review_code/batch", attributes, parent=parent, kind="server"
+    ):
+        results = [
+            to_result(index, result)
+            async for index, result in review_code_service.review_batch(
+                states, use_cache
+            )
+        ]
+    results.sort(key=lambda r: r.index)
+    return BatchReviewResponse(results=results)
@@ -1,6 +1,7 @@
+import os
 from typing import List, Literal, Optional
 
-from pydantic import BaseModel, Field
+from pydantic import BaseModel, Field, model_validator
 
 
 class TestResult(BaseModel):
@@ -30,6 +31,42 @@ class ReviewRequest(BaseModel):
     assignment: AssignmentContext
     student_submission: Submission
     test_results: List[TestResult]
+    bypass_cache: bool = Field(
+        default=False,
+        description="Skip the review cache and run the full review again",
+    )
+    mode: Literal["express", "full"] = Field(
+        default="full",
+        description="'express' returns the same response from a single model call",
+    )
+    time_budget_seconds: Optional[float] = Field(
+        default=None,
+        gt=0,
+        description="Time limit for the review; optional stages are skipped to meet it",
+    )
+
+
+# Upper bound on submissions per batch request; each one is a full review.
+MAX_BATCH_REVIEWS = int(os.environ.get("BATCH_REVIEW_MAX_SIZE", "200"))
+
+
+class BatchReviewRequest(BaseModel):
+    """Many submissions for the same assignment, reviewed in one call."""
+
+    reviews: List[ReviewRequest] = Field(
+        ..., min_length=1, max_length=MAX_BATCH_REVIEWS
+    )
+    stream: bool = Field(
+        default=False,
+        description="Return results as NDJSON lines in completion order",
+    )
+
+    @model_validator(mode="after")
+    def check_same_assignment(self) -> "BatchReviewRequest":
+        first = self.reviews[0].assignment
+        if any(review.assignment != first for review in self.reviews[1:]):
+            raise ValueError("All reviews in a batch must share the same assignment")
+        return self
 
 
 # ----------------------------------------------------------------------
@@ -70,3 +107,45 @@ class ReviewResponse(BaseModel):
     summary: str
     detail: str
     review_items: List[ReviewItem]
+    skipped_stages: List[str] = Field(
+        default_factory=list,
+        description=(
+            "Stages left out, cut short or replaced by a template to meet the "
+            "deadline or the prompt budget"
+        ),
+    )
+    failed_stages: List[str] = Field(
+        default_factory=list,
+        description="Stages whose model calls failed; their findings may be missing",
+    )
+
+
+class ReviewJobRequest(ReviewRequest):
+    """A review to run in the background; the result is polled or called back."""
+
+    callback_url: Optional[str] = Field(
+        default=None,
+        description="URL that receives the finished job as a JSON POST",
+    )
+
+
+class ReviewJobStatus(BaseModel):
+    job_id: str
+    status: Literal["queued", "running", "done", "failed"]
+    created_at: float
+    started_at: Optional[float] = None
+    finished_at: Optional[float] = None
+    review: Optional[ReviewResponse] = None
+    error: Optional[str] = None
+
+
+class BatchReviewResult(BaseModel):
+    """Result for one submission of a batch, matched by its index in the request."""
+
+    index: int
+    review: Optional[ReviewResponse] = None
+    error: Optional[str] = None
+
+
+class BatchReviewResponse(BaseModel):
+    results: List[BatchReviewResult]
@@ -0,0 +1,80 @@
+import logging
+from typing import Any, Awaitable, Callable, Dict, Optional
+
+import aiohttp
+import together
+from fastapi import APIRouter, Depends, Header, HTTPException
+
+from app.api.review_code_deps import get_review_jobs
+from app.api.review_code_route import (
+    build_initial_state,
+    build_review_response,
+    request_attributes,
+)
+from app.api.review_code_schema import ReviewJobRequest, ReviewJobStatus, ReviewRequest
+from app.services.review_code_service import ReviewCodeService
+from app.services.review_jobs import QueueFullError, ReviewJobQueue
+from app.utils.tracing import parse_traceparent, tracer
+
+logger = logging.getLogger(__name__)
+
+router = APIRouter()
+
+
+def make_job_runner(
+    service: ReviewCodeService, http_session: aiohttp.ClientSession
+) -> Callable[[Dict[str, Any]], Awaitable[Dict[str, Any]]]:
+    """The function job workers call to turn a request payload into a review."""
+
+    async def run(payload: Dict[str, Any]) -> Dict[str, Any]:
+        # Workers run outside any request, so bind the SDK's session here too.
+        together.aiosession.set(http_session)
+        request = ReviewRequest(**payload)
+        # The time budget starts when a worker picks the job up, not on submit.
+        result_state = await service.review_code(
+            build_initial_state(request), use_cache=not request.bypass_cache
+        )
+        return build_review_response(result_state).model_dump()
+
+    return run
+
+
+@router.post("/jobs", response_model=ReviewJobStatus, status_code=202)
+async def submit_review_job(
+    request: ReviewJobRequest,
+    jobs: ReviewJobQueue = Depends(get_review_jobs),
+    traceparent: Optional[str] = Header(default=None),
+):
+    """
+    Queue a review and return its job id at once. Poll GET /jobs/{job_id}, or
+    pass "callback_url" (on an allowed host) to have the finished job POSTed
+    there. A W3C ``traceparent`` header links the job to the caller's trace.
+    """
+    with tracer.start_span(
+        "POST /jobs",
+        request_attributes(request),
+        parent=parse_traceparent(traceparent),
+        kind="server",
+    ):
+        try:
+            return await jobs.submit(
+                request.model_dump(exclude={"callback_url"}), request.callback_url
+            )
+        except QueueFullError as e:
+            raise HTTPException(
+                status_code=503, detail=str(e), headers={"Retry-After": "5"}
+            )
+        except ValueError as e:
+            raise HTTPException(status_code=422, detail=str(e))
+
+
+@router.get("/jobs/{job_id}", response_model=ReviewJobStatus)
+async def get_review_job(
+    job_id: str,
+    jobs: ReviewJobQueue = Depends(get_review_jobs),
+):
+    """Status of a review job; "review" is set once it is done."""
+    job = await jobs.get(job_id)
+    if job is None:
+        raise HTTPException(status_code=404, detail="Unknown or expired job")
+    return job
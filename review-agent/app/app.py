@@ -1,5 +1,20 @@
+from contextlib import asynccontextmanager
+
 from fastapi import FastAPI
+from .api.review_code_deps import (
+    build_review_job_queue,
+    build_review_service,
+    configure_logging,
+    configure_tracing,
+    create_http_session,
+    get_together_client,
+    warm_http_session,
+)
+from .api.metrics_route import router as metrics_router
 from .api.review_code_route import router as review_router
+from .api.review_job_route import make_job_runner
+from .api.review_job_route import router as review_job_router
+from .utils.tracing import tracer
 import logging
 
 # Configure root logger
@@ -9,9 +24,33 @@ logging.basicConfig(
 )
 
 
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    # Build the LLM client, agents and compiled review graph once per process
+    # and share one pooled HTTP session across every request.
+    configure_logging()
+    configure_tracing()
+    app.state.http_session = await create_http_session()
+    await warm_http_session(app.state.http_session)
+    app.state.review_service = build_review_service(get_together_client())
+    app.state.review_jobs = build_review_job_queue(
+        make_job_runner(app.state.review_service, app.state.http_session),
+        app.state.http_session,
+    )
+    await app.state.review_jobs.start()
+
+    yield
+
+    await app.state.review_jobs.stop()
+    await app.state.http_session.close()
+    tracer.shutdown()
+
+
 def create_app():
-    app = FastAPI(title="Code Review API")
+    app = FastAPI(title="Code Review API", lifespan=lifespan)
 
     app.include_router(router=review_router, prefix="/api/v1")
+    app.include_router(router=review_job_router, prefix="/api/v1")
+    app.include_router(router=metrics_router)
 
     return app
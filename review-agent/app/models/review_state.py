@@ -1,4 +1,4 @@
-from typing import Literal, NotRequired, TypedDict, Any, Dict, List
+from typing import Annotated, Literal, NotRequired, Optional, TypedDict, Any, Dict, List
 
 
 class Location(TypedDict):
@@ -34,6 +34,15 @@ class ReviewItem(TypedDict):
     relevant_concept: list[str]
 
 
+class StaticFinding(TypedDict):
+    kind: Literal["syntax_error", "unused_variable", "off_by_one"]
+    severity: Literal["Warning", "Error"]
+    message: str
+    location: Location
+    code_snippet: str
+    fix_suggestion: str
+
+
 def create_logic_issue(
     issue: str = "",
     evidence: int = -1,
@@ -61,16 +70,43 @@ class SandBoxResult(TypedDict):
     actual: str
 
 
+def merge_unique(left: List[str], right: List[str]) -> List[str]:
+    """Reducer for list channels written by parallel nodes; keeps first-seen order."""
+    return list(dict.fromkeys([*(left or []), *(right or [])]))
+
+
+def merge_issues(
+    left: Dict[int, LogicIssue], right: Dict[int, Dict[str, Any]]
+) -> Dict[int, LogicIssue]:
+    """Reducer for ``logic_issues``: merges updates field by field, per issue id.
+
+    Nodes return only the fields they change (e.g. ``{3: {"fix_suggestion": ...}}``)
+    and never mutate the issues they were given.
+    """
+    merged = dict(left or {})
+    for issue_id, fields in (right or {}).items():
+        merged[issue_id] = {**merged.get(issue_id, {}), **fields}
+    return merged
+
+
 class ReviewState(TypedDict):
     code: str
+    language: str
     sandbox_results: List[SandBoxResult]
     assignment_requirements: str
     expected_concepts: List[str]
-    logic_issues: Dict[int, LogicIssue]
+    logic_issues: Annotated[Dict[int, LogicIssue], merge_issues]
     concept_issues: List[Dict[str, Any]]
     improvement_notes: List[ImprovementNote]
     overview: str
     review_items: List[ReviewItem]
+    review_mode: Literal["express", "full"]
+    static_issues: List[StaticFinding]
+    has_errors: bool
+    deadline: Optional[float]  # absolute time.time(); None means no limit
+    skipped_stages: Annotated[List[str], merge_unique]
+    # Stages whose model calls failed and whose output is missing or partial.
+    failed_stages: Annotated[List[str], merge_unique]
 
 
 def create_initial_state(
@@ -78,14 +114,18 @@ def create_initial_state(
     sandbox_results: List[SandBoxResult],
     assignment_requirements: str,
     expected_concepts: List[str],
+    review_mode: Literal["express", "full"] = "full",
+    language: str = "",
+    deadline: Optional[float] = None,
 ) -> ReviewState:
     """Helper function to create a properly initialized ReviewState"""
     return {
         "code": code,
+        "language": language,
         "sandbox_results": sandbox_results,
         "assignment_requirements": assignment_requirements,
         "expected_concepts": expected_concepts,
-        "logic_issues": [],
+        "logic_issues": {},
         "concept_issues": [],
         "categorized_feedback": [],
         "improvement_notes": [],
@@ -97,4 +137,8 @@ def create_initial_state(
         "needs_improvement": False,
         "overview": "",
         "review_items": [],
+        "review_mode": review_mode,
+        "deadline": deadline,
+        "skipped_stages": [],
+        "failed_stages": [],
     }
@@ -0,0 +1,146 @@
+import asyncio
+import copy
+import hashlib
+import json
+import logging
+import sqlite3
+import threading
+import time
+from collections import OrderedDict
+from typing import Any, Dict, Optional, Tuple
+
+from app.models.review_state import ReviewState
+
+logger = logging.getLogger(__name__)
+
+# Bump when prompts or the graph change in a way that invalidates old reviews.
+CACHE_VERSION = 3
+
+
+class ReviewCache:
+    """Content-addressed cache of complete review results.
+
+    Entries live in an in-memory LRU tier with a TTL and, when ``db_path`` is
+    given, in a SQLite tier that survives restarts and is shared by workers.
+    """
+
+    def __init__(
+        self,
+        max_entries: int = 1024,
+        ttl_seconds: float = 3600.0,
+        db_path: Optional[str] = None,
+    ):
+        self.max_entries = max_entries
+        self.ttl_seconds = ttl_seconds
+        self.hits = 0
+        self.misses = 0
+        self._entries: OrderedDict[str, Tuple[float, ReviewState]] = OrderedDict()
+
+        self._db: Optional[sqlite3.Connection] = None
+        self._db_lock = threading.Lock()
+        if db_path:
+            self._db = sqlite3.connect(db_path, check_same_thread=False)
+            self._db.execute(
+                "CREATE TABLE IF NOT EXISTS review_cache "
+                "(key TEXT PRIMARY KEY, created_at REAL NOT NULL, value TEXT NOT NULL)"
+            )
+            self._db.commit()
+
+    @staticmethod
+    def make_key(state: ReviewState) -> str:
+        """Hash everything in the initial state that can change the review."""
+        payload = {
+            "version": CACHE_VERSION,
+            "review_mode": state.get("review_mode", "full"),
+            "code": state.get("code", ""),
+            "language": state.get("language", ""),
+            "assignment_requirements": state.get("assignment_requirements", ""),
+            "expected_concepts": sorted(state.get("expected_concepts", [])),
+            "sandbox_results": [
+                [case["input"], case["expected"], case["actual"]]
+                for case in state.get("sandbox_results", [])
+            ],
+        }
+        canonical = json.dumps(payload, sort_keys=True, separators=(",", ":"))
+        return hashlib.sha256(canonical.encode("utf-8")).hexdigest()
+
+    async def get(self, key: str) -> Optional[ReviewState]:
+        """Return a copy of the cached review, or None on a miss."""
+        now = time.time()
+
+        entry = self._entries.get(key)
+        if entry is not None:
+            created_at, state = entry
+            if now - created_at < self.ttl_seconds:
+                self._entries.move_to_end(key)
+                self.hits += 1
+                return copy.deepcopy(state)
+            del self._entries[key]
+
+        if self._db is not None:
+            row = await asyncio.to_thread(self._db_get, key)
+            if row is not None and now - row[0] < self.ttl_seconds:
+                state = self._decode(row[1])
+                self._remember(key, row[0], state)
+                self.hits += 1
+                return copy.deepcopy(state)
+
+        self.misses += 1
+        return None
+
+    async def put(self, key: str, state: ReviewState) -> None:
+        """Store a finished review in every tier."""
+        created_at = time.time()
+        self._remember(key, created_at, copy.deepcopy(state))
+
+        if self._db is not None:
+            try:
+                await asyncio.to_thread(
+                    self._db_put, key, created_at, json.dumps(state, default=str)
+                )
+            except Exception as e:
+                logger.error(f"ReviewCache disk write failed: {e}")
+
+    def stats(self) -> Dict[str, Any]:
+        lookups = self.hits + self.misses
+        return {
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_rate": self.hits / lookups if lookups else 0.0,
+            "entries": len(self._entries),
+        }
+
+    def _remember(self, key: str, created_at: float, state: ReviewState) -> None:
+        self._entries[key] = (created_at, state)
+        self._entries.move_to_end(key)
+        while len(self._entries) > self.max_entries:
+            self._entries.popitem(last=False)
+
+    def _db_get(self, key: str) -> Optional[Tuple[float, str]]:
+        with self._db_lock:
+            return self._db.execute(
+                "SELECT created_at, value FROM review_cache WHERE key = ?", (key,)
+            ).fetchone()
+
+    def _db_put(self, key: str, created_at: float, value: str) -> None:
+        with self._db_lock:
+            self._db.execute(
+                "INSERT OR REPLACE INTO review_cache (key, created_at, value) "
+                "VALUES (?, ?, ?)",
+                (key, created_at, value),
+            )
+            self._db.execute(
+                "DELETE FROM review_cache WHERE created_at < ?",
+                (created_at - self.ttl_seconds,),
+            )
+            self._db.commit()
+
+    @staticmethod
+    def _decode(value: str) -> ReviewState:
+        state = json.loads(value)
+        # JSON object keys are strings; logic_issues is keyed by test case id.
+        state["logic_issues"] = {
+            int(issue_id): issue
+            for issue_id, issue in (state.get("logic_issues") or {}).items()
+        }
+        return state
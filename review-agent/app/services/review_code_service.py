@@ -1,19 +1,108 @@
+import asyncio
+import copy
 import logging
+import time
 
 
+from app.agents.base_agent import LLMAgent
+from app.agents.concept_fix_agent import ConceptFixAgent
 from app.agents.concept_mapping_agent import ConceptMappingAgent
+from app.agents.express_review_agent import ExpressReviewAgent
 from app.agents.fix_hint_agent import FixHintAgent
 from app.agents.improvement_agent import ImprovementAgent
 from app.agents.logic_agent import LogicAgent
 from app.agents.overview_agent import OverviewAgent
+from app.agents.pre_analysis_agent import PreAnalysisAgent
 from app.agents.reflection_agent import ReflectionAgent
-from app.models.review_state import ReviewState
-from langgraph.graph import StateGraph
-from typing import cast
+from app.models.review_state import ReviewState, merge_issues
+from app.services.review_cache import ReviewCache
+from app.utils.deadline import current_deadline, remaining_seconds
+from app.utils.metrics import NODE_DURATION, NODE_SKIPPED, REVIEW_CACHE_REQUESTS
+from app.utils.provider_scheduler import current_review
+from app.utils.state_logging import log_state
+from app.utils.tracing import tracer
+from langgraph.graph import END, START, StateGraph
+from typing import (
+    Any,
+    AsyncIterator,
+    Awaitable,
+    Callable,
+    Dict,
+    List,
+    Optional,
+    Tuple,
+    Union,
+    cast,
+)
 
 
 logger = logging.getLogger(__name__)
 
+# Optional stages and the time they need; with less left they are skipped.
+DEFAULT_STAGE_MIN_SECONDS = {
+    "improve": 10.0,
+    "concept_map": 8.0,
+    "concept_fix": 8.0,
+    "fix_hint": 6.0,
+}
+
+# What a skipped stage writes instead of its normal output.
+SKIPPED_STAGE_UPDATES: Dict[str, Dict[str, Any]] = {
+    "improve": {"improvement_notes": []},
+}
+
+
+def deadline_node(
+    stage: str,
+    run: Callable[[ReviewState], Awaitable[Dict[str, Any]]],
+    min_seconds: Optional[float] = None,
+):
+    """Wrap a node so it honours the review deadline carried in the state.
+
+    The deadline is published to ``current_deadline`` for the model calls the
+    node makes. An optional stage (one with ``min_seconds``) is skipped and
+    recorded in ``skipped_stages`` when less time than that is left. Each run
+    gets a trace span and a sample in ``review_node_duration_seconds``.
+    """
+
+    async def node(state: ReviewState) -> Dict[str, Any]:
+        with tracer.start_span(f"node {stage}", {"graph.node": stage}) as span:
+            deadline = state.get("deadline")
+            remaining = remaining_seconds(deadline)
+            if deadline is not None:
+                span.set_attribute("review.remaining_seconds", round(remaining, 3))
+            if min_seconds is not None and remaining < min_seconds:
+                logger.warning(
+                    f"Skipping {stage}: {remaining:.1f}s left, needs {min_seconds:.1f}s"
+                )
+                NODE_SKIPPED.inc(node=stage)
+                span.set_attribute("graph.skipped", True)
+                return {
+                    **SKIPPED_STAGE_UPDATES.get(stage, {}),
+                    "skipped_stages": [stage],
+                }
+            current_deadline.set(deadline)
+            started = time.monotonic()
+            try:
+                return await run(state)
+            finally:
+                NODE_DURATION.observe(time.monotonic() - started, node=stage)
+
+    return node
+
+
+def is_complete(state: Dict[str, Any]) -> bool:
+    """Whether every stage ran and succeeded (only such reviews are cached)."""
+    return not state.get("skipped_stages") and not state.get("failed_stages")
+
+
+def route_after_pre_analysis(state: ReviewState) -> Union[str, List[str]]:
+    """Skip every LLM agent when the code certainly does not parse."""
+    if state.get("has_errors"):
+        logger.debug("Route: syntax errors -> overview")
+        return "overview"
+    return ["logic", "improve"]
+
 
 class ReviewCodeService:
     def __init__(
@@ -24,6 +113,14 @@ class ReviewCodeService:
         improvement_agent: ImprovementAgent,
         overview_agent: OverviewAgent,
         reflection_agent: ReflectionAgent,
+        review_cache: Optional[ReviewCache] = None,
+        batch_concurrency: int = 8,
+        concept_fix_agent: Optional[ConceptFixAgent] = None,
+        fuse_concept_fix: bool = False,
+        express_agent: Optional[ExpressReviewAgent] = None,
+        pre_analysis_agent: Optional[PreAnalysisAgent] = None,
+        time_budget_seconds: Optional[float] = None,
+        stage_min_seconds: Optional[Dict[str, float]] = None,
     ):
         self.logic_agent = logic_agent
         self.concept_mapping_agent = concept_mapping_agent
@@ -31,71 +128,303 @@ class ReviewCodeService:
         self.improvement_agent = improvement_agent
         self.overview_agent = overview_agent
         self.reflection_agent = reflection_agent
+        self.review_cache = review_cache
+        self.batch_concurrency = batch_concurrency
+        self.concept_fix_agent = concept_fix_agent
+        self.express_agent = express_agent
+        self.pre_analysis_agent = pre_analysis_agent or PreAnalysisAgent()
+        # Default per-review deadline for requests that do not bring their own.
+        self.time_budget_seconds = time_budget_seconds
+        self.stage_min_seconds = stage_min_seconds or DEFAULT_STAGE_MIN_SECONDS
+
+        self.fuse_concept_fix = fuse_concept_fix
+
+        if fuse_concept_fix and concept_fix_agent is None:
+            raise ValueError("fuse_concept_fix requires a concept_fix_agent")
 
         # Build the workflow graph
-        self.workflow = self.create_review_graph()
+        self.workflow = self.create_review_graph(fuse_concept_fix=fuse_concept_fix)
+        self.express_workflow = (
+            self.create_express_graph() if express_agent is not None else None
+        )
+
+    def create_review_graph(self, fuse_concept_fix: bool = False):
+        """Compile the review graph.
 
-    def create_review_graph(self):
+        With ``fuse_concept_fix`` the concept_map -> fix_hint pair is replaced by
+        a single "concept_fix" node that maps concepts and writes hints per batch.
+        """
         workflow = StateGraph(ReviewState)
 
-        # Add nodes for each agent
-        workflow.add_node("logic", self.logic_agent.analyze)
-        workflow.add_node("concept_map", self.concept_mapping_agent.analyze)
-        workflow.add_node("fix_hint", self.fix_hint_agent.analyze)
-        workflow.add_node("improve", self.improvement_agent.analyze)
-        workflow.add_node("overview", self.overview_agent.analyze)
+        # Add nodes for each agent. "overview" is deferred so it acts as the
+        # join node: it only runs once both branches below have finished.
+        node = self.deadline_node
+        workflow.add_node(
+            "pre_analysis", node("pre_analysis", self.pre_analysis_agent.analyze)
+        )
+        workflow.add_node("logic", node("logic", self.logic_agent.analyze))
+        if fuse_concept_fix:
+            workflow.add_node(
+                "concept_fix", node("concept_fix", self.concept_fix_agent.analyze)
+            )
+            issue_chain = "concept_fix"
+        else:
+            workflow.add_node(
+                "concept_map", node("concept_map", self.concept_mapping_agent.analyze)
+            )
+            workflow.add_node("fix_hint", node("fix_hint", self.fix_hint_agent.analyze))
+            issue_chain = "concept_map"
+        workflow.add_node("improve", node("improve", self.improvement_agent.analyze))
+        workflow.add_node(
+            "overview", node("overview", self.overview_agent.analyze), defer=True
+        )
 
-        workflow.set_entry_point("logic")
+        # Local analysis runs first. Python code that does not parse goes
+        # straight to the overview; otherwise fan out: the style branch
+        # ("improve") only reads the code, so it runs alongside the logic ->
+        # concept_map -> fix_hint chain.
+        workflow.add_edge(START, "pre_analysis")
+        workflow.add_conditional_edges(
+            "pre_analysis",
+            route_after_pre_analysis,
+            ["logic", "improve", "overview"],
+        )
 
         # Conditional routing functions
         def route_after_logic(state: ReviewState) -> str:
             logger.debug("Determining route after logic agent")
             if state["logic_issues"] and len(state["logic_issues"]) > 0:
-                logger.debug("Route: has_errors -> concept_map")
-                return "concept_map"
-            if state.get("needs_improvement"):
-                logger.debug("Route: needs_improvement -> improve")
-                return "improve"
-            return "improve"
-
-        def route_after_concept_map(state: ReviewState) -> str:
-            return "fix_hint"
+                logger.debug(f"Route: has_errors -> {issue_chain}")
+                return issue_chain
+            logger.debug("Route: no logic issues -> overview")
+            return "overview"
 
-        # Add conditional edges
+        # Add edges
         workflow.add_conditional_edges(
             "logic",
             route_after_logic,
-            {"concept_map": "concept_map", "improve": "improve"},
+            {issue_chain: issue_chain, "overview": "overview"},
         )
-        workflow.add_conditional_edges(
-            "concept_map",
-            route_after_concept_map,
-            {"fix_hint": "fix_hint"},
+        if fuse_concept_fix:
+            workflow.add_edge("concept_fix", "overview")
+        else:
+            workflow.add_edge("concept_map", "fix_hint")
+            workflow.add_edge("fix_hint", "overview")
+        workflow.add_edge("improve", "overview")
+
+        workflow.set_finish_point("overview")
+
+        return workflow.compile()
+
+    def create_express_graph(self):
+        """Compile the single-call "express" graph used for practice submissions."""
+        workflow = StateGraph(ReviewState)
+        node = self.deadline_node
+        workflow.add_node(
+            "pre_analysis", node("pre_analysis", self.pre_analysis_agent.analyze)
         )
+        workflow.add_node("express", node("express", self.express_agent.analyze))
+        # Only reached for syntax errors, where it answers from a template.
+        workflow.add_node("overview", node("overview", self.overview_agent.analyze))
+
+        workflow.add_edge(START, "pre_analysis")
         workflow.add_conditional_edges(
-            "fix_hint",
-            lambda s: "improve",
-            {"improve": "improve"},
+            "pre_analysis",
+            lambda state: "overview" if state.get("has_errors") else "express",
+            ["express", "overview"],
         )
-        workflow.add_conditional_edges(
-            "improve",
-            lambda s: "overview",
-            {"overview": "overview"},
+        workflow.add_edge("express", END)
+        workflow.add_edge("overview", END)
+        return workflow.compile()
+
+    def llm_agents(self) -> List[LLMAgent]:
+        """Every configured agent that calls the model."""
+        agents = [
+            self.logic_agent,
+            self.concept_mapping_agent,
+            self.fix_hint_agent,
+            self.concept_fix_agent,
+            self.improvement_agent,
+            self.overview_agent,
+            self.express_agent,
+        ]
+        return [agent for agent in agents if isinstance(agent, LLMAgent)]
+
+    def deadline_node(self, stage: str, run):
+        return deadline_node(stage, run, self.stage_min_seconds.get(stage))
+
+    def with_deadline(self, state: ReviewState) -> ReviewState:
+        """Give the state the default deadline if the request did not set one."""
+        if state.get("deadline") is not None or not self.time_budget_seconds:
+            return state
+        return cast(
+            ReviewState, {**state, "deadline": time.time() + self.time_budget_seconds}
         )
 
-        workflow.set_finish_point("overview")
+    def select_workflow(self, state: ReviewState):
+        """Pick the compiled graph for the state's review mode."""
+        if state.get("review_mode") == "express":
+            if self.express_workflow is not None:
+                return self.express_workflow
+            logger.warning("Express mode requested but not configured; running full")
+        return self.workflow
 
-        return workflow.compile()
+    async def review_code(
+        self, state: ReviewState, use_cache: bool = True
+    ) -> ReviewState:
+        """Run the full review workflow on a student's submission state using TypedDict.
+
+        Identical submissions are answered from the review cache when one is
+        configured; ``use_cache=False`` forces a fresh run and refreshes the entry.
+        """
+        attributes = {"review.mode": state.get("review_mode") or "full"}
+        with tracer.start_span("review_code", attributes) as span:
+            logger.debug("Starting review workflow")
+
+            cache_key = None
+            if self.review_cache is not None:
+                cache_key = self.review_cache.make_key(state)
+                if use_cache:
+                    cached = await self.review_cache.get(cache_key)
+                    REVIEW_CACHE_REQUESTS.inc(
+                        result="miss" if cached is None else "hit"
+                    )
+                    span.set_attribute("review.cache_hit", cached is not None)
+                    if cached is not None:
+                        logger.debug(f"Review cache hit: {cache_key}")
+                        return cast(ReviewState, cached)
+
+            # Run the workflow; its model calls queue as one review on the
+            # provider scheduler.
+            state = self.with_deadline(state)
+            review_token = current_review.set(span.span_id)
+            try:
+                final_state_dict = await self.select_workflow(state).ainvoke(state)
+            finally:
+                current_review.reset(review_token)
+
+            log_state(logger, "Final state", final_state_dict)
+
+            span.set_attribute(
+                "review.skipped_stages", final_state_dict.get("skipped_stages") or []
+            )
+            span.set_attribute(
+                "review.failed_stages", final_state_dict.get("failed_stages") or []
+            )
+
+            # Reviews degraded by the deadline or by model failures are not
+            # worth keeping: the next request should get a full review.
+            if cache_key is not None and is_complete(final_state_dict):
+                await self.review_cache.put(cache_key, final_state_dict)
+
+            # Cast the returned dict to ReviewState TypedDict
+            return cast(ReviewState, final_state_dict)
+
+    async def stream_review(
+        self, state: ReviewState, use_cache: bool = True
+    ) -> AsyncIterator[Tuple[str, Dict[str, Any]]]:
+        """Run the review workflow and yield ``(node, update)`` as each node finishes.
+
+        The last item is always ``("final", final_state)``. A cache hit yields
+        only the final item.
+        """
+        attributes = {"review.mode": state.get("review_mode") or "full"}
+        with tracer.start_span("stream_review", attributes) as span:
+            logger.debug("Starting streaming review workflow")
+
+            cache_key = None
+            if self.review_cache is not None:
+                cache_key = self.review_cache.make_key(state)
+                if use_cache:
+                    cached = await self.review_cache.get(cache_key)
+                    REVIEW_CACHE_REQUESTS.inc(
+                        result="miss" if cached is None else "hit"
+                    )
+                    span.set_attribute("review.cache_hit", cached is not None)
+                    if cached is not None:
+                        logger.debug(f"Review cache hit: {cache_key}")
+                        yield "final", cached
+                        return
+
+            state = self.with_deadline(state)
+            final_state_dict: Dict[str, Any] = dict(state)
+            # set() rather than reset(): the generator may resume in another context.
+            previous_review = current_review.get()
+            current_review.set(span.span_id)
+            try:
+                async for mode, chunk in self.select_workflow(state).astream(
+                    state, stream_mode=["updates", "values"]
+                ):
+                    if mode == "values":
+                        final_state_dict = chunk
+                        continue
+                    for node, update in chunk.items():
+                        update = update or {}
+                        if "logic_issues" in update:
+                            # Nodes return only the issue fields they changed;
+                            # listeners get the whole issues.
+                            update = {
+                                **update,
+                                "logic_issues": merge_issues(
+                                    final_state_dict.get("logic_issues", {}),
+                                    update["logic_issues"],
+                                ),
+                            }
+                        yield node, update
+            finally:
+                current_review.set(previous_review)
+
+            log_state(logger, "Final state", final_state_dict)
+
+            if cache_key is not None and is_complete(final_state_dict):
+                await self.review_cache.put(cache_key, final_state_dict)
+
+            yield "final", cast(ReviewState, final_state_dict)
+
+    async def review_batch(
+        self, states: List[ReviewState], use_cache: Union[bool, List[bool]] = True
+    ) -> AsyncIterator[Tuple[int, Union[ReviewState, Exception]]]:
+        """Review many submissions and yield ``(index, result)`` as each completes.
+
+        Byte-identical submissions are reviewed once and the result is shared by
+        every index that submitted it. ``use_cache`` may be given per
+        submission; a group of duplicates is reviewed fresh if any of them
+        bypasses the cache. At most ``batch_concurrency`` reviews run at a
+        time; a failure is yielded as the exception for the affected indexes.
+        """
+
+        logger.debug(f"Starting batch review of {len(states)} submissions")
 
-    async def review_code(self, state: ReviewState) -> ReviewState:
-        """Run the full review workflow on a student's submission state using TypedDict."""
+        # Group duplicate submissions by their content hash.
+        groups: Dict[str, List[int]] = {}
+        for index, state in enumerate(states):
+            groups.setdefault(ReviewCache.make_key(state), []).append(index)
 
-        logger.debug("Starting review workflow")
+        if isinstance(use_cache, bool):
+            use_cache = [use_cache] * len(states)
 
-        # Run the workflow
-        final_state_dict = await self.workflow.ainvoke(state)
+        semaphore = asyncio.Semaphore(max(1, self.batch_concurrency))
 
-        logger.debug(f"Final state: {final_state_dict}")
+        async def run(indexes: List[int]):
+            async with semaphore:
+                try:
+                    result = await self.review_code(
+                        states[indexes[0]], all(use_cache[i] for i in indexes)
+                    )
+                except Exception as e:
+                    logger.error(f"Batch review failed for {indexes}: {e}")
+                    result = e
+            return indexes, result
 
-        # Cast the returned dict to ReviewState TypedDict
-        return cast(ReviewState, final_state_dict)
+        tasks = [asyncio.create_task(run(indexes)) for indexes in groups.values()]
+        try:
+            for finished in asyncio.as_completed(tasks):
+                indexes, result = await finished
+                for i, index in enumerate(indexes):
+                    # Duplicates get their own copy so callers can mutate results.
+                    if i > 0 and not isinstance(result, Exception):
+                        result = copy.deepcopy(result)
+                    yield index, result
+        finally:
+            for task in tasks:
+                task.cancel()
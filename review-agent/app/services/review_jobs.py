@@ -0,0 +1,300 @@
+import asyncio
+import json
+import logging
+import sqlite3
+import threading
+import time
+import uuid
+from collections import OrderedDict
+from typing import Any, Awaitable, Callable, Dict, List, Optional, Set
+from urllib.parse import urlparse
+
+import aiohttp
+
+from app.utils.metrics import (
+    REVIEW_JOB_BUSY_SECONDS,
+    REVIEW_JOB_RUN,
+    REVIEW_JOB_WAIT,
+    REVIEW_JOBS,
+)
+from app.utils.tracing import current_span, parse_traceparent, tracer
+
+logger = logging.getLogger(__name__)
+
+# Fields returned to clients; the request payload stays internal.
+PUBLIC_FIELDS = (
+    "job_id",
+    "status",
+    "created_at",
+    "started_at",
+    "finished_at",
+    "review",
+    "error",
+)
+
+
+class QueueFullError(RuntimeError):
+    """Raised by ``submit`` when ``max_queue`` jobs are already waiting."""
+
+
+class ReviewJobQueue:
+    """Bounded in-process queue of review jobs served by a fixed worker pool.
+
+    ``run`` turns a request payload into a review payload. Finished jobs are
+    kept for ``ttl_seconds`` for polling and, when the job has a callback URL
+    on one of ``callback_hosts``, POSTed there. With ``db_path`` jobs are also written to SQLite, and jobs
+    that were queued or running when the process stopped are run again on the
+    next start.
+    """
+
+    def __init__(
+        self,
+        run: Callable[[Dict[str, Any]], Awaitable[Dict[str, Any]]],
+        workers: int = 4,
+        max_queue: int = 256,
+        ttl_seconds: float = 3600.0,
+        db_path: Optional[str] = None,
+        http_session: Optional[aiohttp.ClientSession] = None,
+        callback_hosts: Optional[Set[str]] = None,
+        callback_attempts: int = 3,
+        callback_timeout: float = 10.0,
+    ):
+        self.run = run
+        self.workers = max(1, workers)
+        self.max_queue = max_queue
+        self.ttl_seconds = ttl_seconds
+        self.http_session = http_session
+        # Hosts callbacks may be sent to; without an allowlist callbacks are off,
+        # so a client cannot make the service POST to arbitrary internal URLs.
+        self.callback_hosts = callback_hosts or set()
+        self.callback_attempts = max(1, callback_attempts)
+        self.callback_timeout = callback_timeout
+        self.busy = 0
+        self._jobs: Dict[str, Dict[str, Any]] = {}
+        # Finished job ids in finishing order, for pruning; a job that runs
+        # for long must not hold back the ones that finished after it started.
+        self._finished: OrderedDict[str, float] = OrderedDict()
+        self._queue: asyncio.Queue = asyncio.Queue()
+        self._tasks: List[asyncio.Task] = []
+
+        self._db: Optional[sqlite3.Connection] = None
+        self._db_lock = threading.Lock()
+        if db_path:
+            self._db = sqlite3.connect(db_path, check_same_thread=False)
+            self._db.execute(
+                "CREATE TABLE IF NOT EXISTS review_jobs "
+                "(job_id TEXT PRIMARY KEY, status TEXT NOT NULL, "
+                "created_at REAL NOT NULL, finished_at REAL, value TEXT NOT NULL)"
+            )
+            columns = {
+                row[1] for row in self._db.execute("PRAGMA table_info(review_jobs)")
+            }
+            if "finished_at" not in columns:
+                # Tables from before finished_at was a column.
+                self._db.execute("ALTER TABLE review_jobs ADD COLUMN finished_at REAL")
+                self._db.execute(
+                    "UPDATE review_jobs SET finished_at = created_at "
+                    "WHERE status IN ('done', 'failed')"
+                )
+            self._db.commit()
+
+    async def start(self) -> None:
+        """Re-queue unfinished jobs from the database and start the workers."""
+        if self._db is not None:
+            for job in await asyncio.to_thread(self._db_unfinished):
+                job.update(status="queued", started_at=None)
+                self._jobs[job["job_id"]] = job
+                self._queue.put_nowait(job["job_id"])
+            if self._queue.qsize():
+                logger.info(f"Resuming {self._queue.qsize()} unfinished review jobs")
+        self._tasks = [
+            asyncio.create_task(self._work(), name=f"review-job-worker-{i}")
+            for i in range(self.workers)
+        ]
+
+    async def stop(self) -> None:
+        """Stop the workers; unfinished jobs stay in the database, if any."""
+        for task in self._tasks:
+            task.cancel()
+        await asyncio.gather(*self._tasks, return_exceptions=True)
+        self._tasks = []
+
+    def check_callback(self, url: str) -> None:
+        """Raise ValueError unless ``url`` is an allowed http(s) callback."""
+        parsed = urlparse(url)
+        if not self.callback_hosts:
+            raise ValueError("callbacks are not enabled; poll the job instead")
+        if parsed.scheme not in ("http", "https") or not parsed.hostname:
+            raise ValueError("callback_url must be an absolute http(s) URL")
+        if parsed.hostname not in self.callback_hosts:
+            raise ValueError(f"callback host {parsed.hostname} is not allowed")
+
+    async def submit(
+        self, payload: Dict[str, Any], callback_url: Optional[str] = None
+    ) -> Dict[str, Any]:
+        """Queue a review and return the job's public view immediately."""
+        if self._queue.qsize() >= self.max_queue:
+            REVIEW_JOBS.inc(status="rejected")
+            raise QueueFullError(f"{self.max_queue} review jobs are already waiting")
+        if callback_url:
+            self.check_callback(callback_url)
+
+        span = current_span.get()
+        job = {
+            "job_id": uuid.uuid4().hex,
+            "status": "queued",
+            "created_at": time.time(),
+            "started_at": None,
+            "finished_at": None,
+            "request": payload,
+            "callback_url": callback_url,
+            # The job runs in its own trace, linked to the submitting request.
+            "traceparent": span.traceparent if span is not None else None,
+            "review": None,
+            "error": None,
+        }
+        self._prune()
+        self._jobs[job["job_id"]] = job
+        await self._save(job)
+        self._queue.put_nowait(job["job_id"])
+        REVIEW_JOBS.inc(status="queued")
+        return self.public(job)
+
+    async def get(self, job_id: str) -> Optional[Dict[str, Any]]:
+        job = self._jobs.get(job_id)
+        if job is None and self._db is not None:
+            job = await asyncio.to_thread(self._db_get, job_id)
+        return self.public(job) if job is not None else None
+
+    @staticmethod
+    def public(job: Dict[str, Any]) -> Dict[str, Any]:
+        return {field: job.get(field) for field in PUBLIC_FIELDS}
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "queued": self._queue.qsize(),
+            "running": self.busy,
+            "workers": self.workers,
+            "utilization": self.busy / self.workers,
+        }
+
+    async def _work(self) -> None:
+        while True:
+            job_id = await self._queue.get()
+            job = self._jobs.get(job_id)
+            if job is None:
+                continue
+            self.busy += 1
+            started = time.time()
+            try:
+                await self._run_job(job)
+            finally:
+                self.busy -= 1
+                REVIEW_JOB_BUSY_SECONDS.inc(time.time() - started)
+
+    async def _run_job(self, job: Dict[str, Any]) -> None:
+        job.update(status="running", started_at=time.time())
+        REVIEW_JOB_WAIT.observe(job["started_at"] - job["created_at"])
+        await self._save(job)
+
+        with tracer.start_span(
+            "review job",
+            {"job.id": job["job_id"]},
+            parent=parse_traceparent(job.get("traceparent")),
+        ):
+            try:
+                job["review"] = await self.run(job["request"])
+                job["status"] = "done"
+            except asyncio.CancelledError:
+                raise  # shutting down; the job is resumed on the next start
+            except Exception as e:
+                logger.error(f"Review job {job['job_id']} failed: {e}")
+                job.update(status="failed", error=f"Review process failed: {str(e)}")
+
+        job["finished_at"] = time.time()
+        self._finished[job["job_id"]] = job["finished_at"]
+        REVIEW_JOB_RUN.observe(job["finished_at"] - job["started_at"])
+        REVIEW_JOBS.inc(status=job["status"])
+        await self._save(job)
+        if job.get("callback_url"):
+            await self._notify(job)
+
+    async def _notify(self, job: Dict[str, Any]) -> None:
+        """POST the finished job to its callback URL, retrying transient failures."""
+        if self.http_session is None:
+            logger.warning(f"No HTTP session; callback for {job['job_id']} not sent")
+            return
+        for attempt in range(self.callback_attempts):
+            try:
+                async with self.http_session.post(
+                    job["callback_url"],
+                    json=self.public(job),
+                    headers={"X-Review-Job-Id": job["job_id"]},
+                    timeout=aiohttp.ClientTimeout(total=self.callback_timeout),
+                ) as response:
+                    if response.status < 500:
+                        if response.status >= 400:
+                            logger.warning(
+                                f"Callback for {job['job_id']} rejected: {response.status}"
+                            )
+                        return
+                    error = f"HTTP {response.status}"
+            except (aiohttp.ClientError, asyncio.TimeoutError) as e:
+                error = repr(e)
+            if attempt + 1 < self.callback_attempts:
+                await asyncio.sleep(2**attempt)
+        logger.error(f"Callback for {job['job_id']} failed: {error}")
+
+    def _prune(self) -> None:
+        """Forget jobs that finished more than the TTL ago."""
+        cutoff = time.time() - self.ttl_seconds
+        while self._finished:
+            job_id, finished_at = next(iter(self._finished.items()))
+            if finished_at >= cutoff:
+                break
+            del self._finished[job_id]
+            self._jobs.pop(job_id, None)
+
+    async def _save(self, job: Dict[str, Any]) -> None:
+        if self._db is None:
+            return
+        try:
+            await asyncio.to_thread(self._db_put, job)
+        except Exception as e:
+            logger.error(f"ReviewJobQueue disk write failed: {e}")
+
+    def _db_put(self, job: Dict[str, Any]) -> None:
+        with self._db_lock:
+            self._db.execute(
+                "INSERT OR REPLACE INTO review_jobs "
+                "(job_id, status, created_at, finished_at, value) "
+                "VALUES (?, ?, ?, ?, ?)",
+                (
+                    job["job_id"],
+                    job["status"],
+                    job["created_at"],
+                    job["finished_at"],
+                    json.dumps(job, default=str),
+                ),
+            )
+            self._db.execute(
+                "DELETE FROM review_jobs WHERE status IN ('done', 'failed') "
+                "AND finished_at < ?",
+                (time.time() - self.ttl_seconds,),
+            )
+            self._db.commit()
+
+    def _db_get(self, job_id: str) -> Optional[Dict[str, Any]]:
+        with self._db_lock:
+            row = self._db.execute(
+                "SELECT value FROM review_jobs WHERE job_id = ?", (job_id,)
+            ).fetchone()
+        return json.loads(row[0]) if row else None
+
+    def _db_unfinished(self) -> List[Dict[str, Any]]:
+        with self._db_lock:
+            rows = self._db.execute(
+                "SELECT value FROM review_jobs WHERE status IN ('queued', 'running') "
+                "ORDER BY created_at"
+            ).fetchall()
+        return [json.loads(row[0]) for row in rows]
@@ -0,0 +1,23 @@
+import math
+import time
+from contextvars import ContextVar
+from typing import Optional
+
+# Absolute deadline (time.time()) of the review the current node belongs to.
+# Set per graph node so model calls deep inside an agent can cap their timeouts.
+current_deadline: ContextVar[Optional[float]] = ContextVar(
+    "review_deadline", default=None
+)
+
+
+class DeadlineExceeded(TimeoutError):
+    """The review's time budget ran out before a model call could start."""
+
+
+def remaining_seconds(deadline: Optional[float] = None) -> float:
+    """Seconds left until ``deadline`` (or the current one); infinite if unset."""
+    if deadline is None:
+        deadline = current_deadline.get()
+    if deadline is None:
+        return math.inf
+    return deadline - time.time()
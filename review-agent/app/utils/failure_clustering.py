@@ -0,0 +1,125 @@
+from typing import Dict, List, Tuple
+
+from app.models.review_state import SandBoxResult
+
+# Substrings that mark runtime failures rather than wrong output.
+ERROR_MARKERS = (
+    "segmentation fault",
+    "core dumped",
+    "traceback",
+    "exception",
+    "timeout",
+    "time limit",
+    "abort",
+    "error",
+)
+
+# Differing middles up to this length are compared literally ("same edit").
+MAX_LITERAL_DIFF = 16
+
+
+def _common_prefix(a: str, b: str) -> int:
+    n = min(len(a), len(b))
+    i = 0
+    while i < n and a[i] == b[i]:
+        i += 1
+    return i
+
+
+def _common_suffix(a: str, b: str, prefix: int) -> int:
+    n = min(len(a), len(b)) - prefix
+    i = 0
+    while i < n and a[-1 - i] == b[-1 - i]:
+        i += 1
+    return i
+
+
+def _as_number(text: str):
+    try:
+        return float(text.strip())
+    except ValueError:
+        return None
+
+
+def _line_shape(line: str) -> str:
+    kinds = {
+        "num" if _as_number(token) is not None else "str" for token in line.split()
+    }
+    if not kinds:
+        return ""
+    kind = kinds.pop() if len(kinds) == 1 else "mixed"
+    return kind if len(line.split()) == 1 else f"{kind}*"
+
+
+def value_shape(text: str) -> Tuple[str, ...]:
+    """Coarse type of a value: the token kinds of each line, repeats collapsed.
+
+    ``"3\n1 2 3"`` and ``"4\n5 6 7 8"`` share a shape; ``""`` and ``"0"`` do
+    not. It separates e.g. a crash on empty input from one on a long list.
+    """
+    shapes: List[str] = []
+    for line in text.strip().splitlines():
+        shape = _line_shape(line)
+        if shapes and shapes[-1].rstrip("+") == shape:
+            shapes[-1] = f"{shape}+"
+        else:
+            shapes.append(shape)
+    return tuple(shapes)
+
+
+def failure_signature(case: SandBoxResult) -> Tuple:
+    """Cheap description of *how* a test failed, independent of the exact input.
+
+    Two tests with the same signature are assumed to fail for the same reason.
+    The coarse classes (no output, a crash, cut-off output) also carry the
+    shape of the input or the missing output, since they alone say little
+    about the cause.
+    """
+    expected = case.get("expected", "") or ""
+    actual = case.get("actual", "") or ""
+    input_shape = value_shape(case.get("input", "") or "")
+
+    if actual == expected:
+        return ("identical",)
+    if not actual.strip():
+        return ("empty", input_shape, value_shape(expected))
+
+    lowered = actual.lower()
+    for marker in ERROR_MARKERS:
+        if marker in lowered and marker not in expected.lower():
+            return ("runtime_error", marker, input_shape)
+
+    if actual.split() == expected.split():
+        return ("whitespace",)
+    if actual.casefold() == expected.casefold():
+        return ("case",)
+    if expected.startswith(actual):
+        return ("truncated", input_shape, value_shape(expected[len(actual) :]))
+    if actual.startswith(expected):
+        extra = actual[len(expected) :]
+        return ("extra_output", extra if len(extra) <= MAX_LITERAL_DIFF else len(extra))
+
+    actual_number, expected_number = _as_number(actual), _as_number(expected)
+    if actual_number is not None and expected_number is not None:
+        return ("numeric", round(actual_number - expected_number, 6))
+
+    # Diff shape: strip the common prefix/suffix and look at what changed.
+    prefix = _common_prefix(expected, actual)
+    suffix = _common_suffix(expected, actual, prefix)
+    expected_mid = expected[prefix : len(expected) - suffix]
+    actual_mid = actual[prefix : len(actual) - suffix]
+    if max(len(expected_mid), len(actual_mid)) <= MAX_LITERAL_DIFF:
+        return ("edit", expected_mid, actual_mid)
+    return ("mismatch", len(actual) - len(expected), prefix)
+
+
+def cluster_failing_tests(cases: List[SandBoxResult]) -> List[List[SandBoxResult]]:
+    """Group failing tests into equivalence classes by failure signature.
+
+    Clusters keep the order in which their first member appears, and members
+    keep their original order, so the output is deterministic.
+    """
+    clusters: Dict[Tuple, List[SandBoxResult]] = {}
+    for case in cases:
+        clusters.setdefault(failure_signature(case), []).append(case)
+    return list(clusters.values())
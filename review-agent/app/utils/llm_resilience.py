@@ -0,0 +1,247 @@
+import asyncio
+import logging
+import random
+import time
+from collections import deque
+from typing import Awaitable, Callable, Deque, Optional, TypeVar
+
+import aiohttp
+from together import error as together_error
+
+from app.utils.deadline import DeadlineExceeded, remaining_seconds
+from app.utils.provider_scheduler import ProviderScheduler
+from app.utils.tracing import set_span_attributes
+
+logger = logging.getLogger(__name__)
+
+T = TypeVar("T")
+
+RETRYABLE_STATUSES = {408, 409, 425, 429, 500, 502, 503, 504}
+
+RETRYABLE_ERRORS = (
+    asyncio.TimeoutError,
+    ConnectionError,
+    aiohttp.ClientError,
+    together_error.RateLimitError,
+    together_error.Timeout,
+    together_error.APIConnectionError,
+    together_error.ServiceUnavailableError,
+)
+
+
+def is_retryable(e: BaseException) -> bool:
+    """Rate limits, timeouts, connection failures and 5xx responses are worth retrying."""
+    if isinstance(e, DeadlineExceeded):
+        return False  # a TimeoutError, but no time is left to retry in
+    if isinstance(e, RETRYABLE_ERRORS):
+        return True
+    status = getattr(e, "http_status", None) or getattr(e, "status_code", None)
+    return status in RETRYABLE_STATUSES
+
+
+class CircuitOpenError(RuntimeError):
+    """Raised instead of calling the provider while the circuit breaker is open."""
+
+
+class CircuitBreaker:
+    """Fails fast after ``failure_threshold`` consecutive provider failures.
+
+    After ``reset_timeout`` seconds one trial call is let through (half-open);
+    its success closes the circuit and its failure re-opens it.
+    """
+
+    def __init__(self, failure_threshold: int = 5, reset_timeout: float = 30.0):
+        self.failure_threshold = failure_threshold
+        self.reset_timeout = reset_timeout
+        self.failures = 0
+        self.opened_at: Optional[float] = None
+        self._trial_in_flight = False
+
+    @property
+    def state(self) -> str:
+        if self.opened_at is None:
+            return "closed"
+        if time.monotonic() - self.opened_at >= self.reset_timeout:
+            return "half_open"
+        return "open"
+
+    def before_call(self) -> bool:
+        """Raise if the circuit is open; return True if this call is the trial.
+
+        The caller must settle a trial with ``record_success`` or
+        ``record_failure`` however it ends, or the circuit stays half-open.
+        """
+        state = self.state
+        if state == "open" or (state == "half_open" and self._trial_in_flight):
+            raise CircuitOpenError("LLM provider circuit is open; failing fast")
+        if state == "half_open":
+            self._trial_in_flight = True
+            return True
+        return False
+
+    def record_success(self) -> None:
+        self.failures = 0
+        self.opened_at = None
+        self._trial_in_flight = False
+
+    def record_failure(self) -> None:
+        self.failures += 1
+        self._trial_in_flight = False
+        if self.opened_at is not None or self.failures >= self.failure_threshold:
+            if self.opened_at is None:
+                logger.warning(
+                    f"Circuit breaker opened after {self.failures} consecutive failures"
+                )
+            self.opened_at = time.monotonic()
+
+
+class LatencyTracker:
+    """Rolling window of successful call latencies."""
+
+    def __init__(self, window: int = 200, min_samples: int = 20):
+        self.min_samples = min_samples
+        self._samples: Deque[float] = deque(maxlen=window)
+
+    def record(self, seconds: float) -> None:
+        self._samples.append(seconds)
+
+    def percentile(self, q: float) -> Optional[float]:
+        if len(self._samples) < self.min_samples:
+            return None
+        ordered = sorted(self._samples)
+        return ordered[min(len(ordered) - 1, int(q * len(ordered)))]
+
+
+class CallPolicy:
+    """Per-agent timeout, retry and hedging settings for model calls.
+
+    Args:
+        timeout: seconds allowed for a single attempt (hedges included).
+        max_attempts: total attempts, including the first one.
+        base_delay / max_delay: bounds of the full-jitter exponential backoff.
+        hedge: send a duplicate request once an attempt is slower than the
+            observed p95 latency; the first answer wins.
+        hedge_min_delay: never hedge earlier than this many seconds.
+        circuit_breaker: shared breaker for the provider, if any.
+        scheduler: shared provider rate limiter every attempt queues on, if any.
+    """
+
+    def __init__(
+        self,
+        timeout: float = 60.0,
+        max_attempts: int = 3,
+        base_delay: float = 0.5,
+        max_delay: float = 8.0,
+        hedge: bool = False,
+        hedge_min_delay: float = 1.0,
+        circuit_breaker: Optional[CircuitBreaker] = None,
+        scheduler: Optional[ProviderScheduler] = None,
+    ):
+        self.timeout = timeout
+        self.max_attempts = max(1, max_attempts)
+        self.base_delay = base_delay
+        self.max_delay = max_delay
+        self.hedge = hedge
+        self.hedge_min_delay = hedge_min_delay
+        self.circuit_breaker = circuit_breaker
+        self.scheduler = scheduler
+        self.latency = LatencyTracker()
+
+    def backoff(self, attempt: int) -> float:
+        """Full-jitter delay before retry number ``attempt`` (0-based)."""
+        return random.uniform(0, min(self.max_delay, self.base_delay * 2**attempt))
+
+    def hedge_delay(self) -> Optional[float]:
+        if not self.hedge:
+            return None
+        p95 = self.latency.percentile(0.95)
+        return None if p95 is None else max(self.hedge_min_delay, p95)
+
+    async def call(
+        self, make_call: Callable[[], Awaitable[T]], label: str = "", tokens: int = 0
+    ) -> T:
+        """Run ``make_call`` under this policy and return its result.
+
+        ``tokens`` is the estimated size of the request, charged against the
+        scheduler's token budget for every attempt.
+        """
+        queue_wait = 0.0
+        for attempt in range(self.max_attempts):
+            # Never wait past the review's deadline, whatever the policy says.
+            remaining = remaining_seconds()
+            if remaining <= 0:
+                raise DeadlineExceeded(f"{label} call not started: deadline passed")
+            if self.scheduler is not None:
+                queue_wait += await self.scheduler.acquire(label, tokens)
+                set_span_attributes({"llm.queue_wait_seconds": round(queue_wait, 4)})
+                remaining = remaining_seconds()
+            timeout = min(self.timeout, remaining)
+
+            trial = False
+            if self.circuit_breaker is not None:
+                trial = self.circuit_breaker.before_call()
+
+            set_span_attributes({"llm.attempts": attempt + 1})
+            started = time.monotonic()
+            try:
+                result = await asyncio.wait_for(
+                    self._attempt(make_call, tokens), timeout=timeout
+                )
+            except BaseException as e:
+                retryable = isinstance(e, Exception) and is_retryable(e)
+                # A timeout cut short by the deadline says nothing about the
+                # provider, but a trial must be settled whatever ended it
+                # (errors, cancellation) or the circuit never closes again.
+                if self.circuit_breaker is not None and (
+                    trial or (retryable and timeout == self.timeout)
+                ):
+                    self.circuit_breaker.record_failure()
+                if not retryable:
+                    raise
+                delay = self.backoff(attempt)
+                if attempt + 1 >= self.max_attempts or delay >= remaining_seconds():
+                    raise
+                logger.warning(
+                    f"{label} call failed ({type(e).__name__}: {e}); "
+                    f"retry {attempt + 1}/{self.max_attempts - 1} in {delay:.2f}s"
+                )
+                await asyncio.sleep(delay)
+                continue
+
+            if self.circuit_breaker is not None:
+                self.circuit_breaker.record_success()
+            self.latency.record(time.monotonic() - started)
+            return result
+
+        raise AssertionError("unreachable")
+
+    async def _attempt(self, make_call: Callable[[], Awaitable[T]], tokens: int) -> T:
+        delay = self.hedge_delay()
+        if delay is None:
+            return await make_call()
+
+        primary = asyncio.ensure_future(make_call())
+        pending = {primary}
+        try:
+            done, _ = await asyncio.wait(pending, timeout=delay)
+            if done:
+                return primary.result()
+
+            logger.debug(f"Hedging model call after {delay:.2f}s")
+            set_span_attributes({"llm.hedged": True})
+            if self.scheduler is not None:
+                # Hedges are latency-critical, so they spend budget without queueing.
+                self.scheduler.charge(tokens)
+            pending.add(asyncio.ensure_future(make_call()))
+            while pending:
+                done, pending = await asyncio.wait(
+                    pending, return_when=asyncio.FIRST_COMPLETED
+                )
+                for task in done:
+                    if task.exception() is None:
+                        return task.result()
+            # Both requests failed: surface the primary's error.
+            return primary.result()
+        finally:
+            for task in pending:
+                task.cancel()
@@ -0,0 +1,225 @@
+import math
+import threading
+from bisect import bisect_left
+from typing import Dict, Iterable, List, Sequence, Tuple
+
+# Seconds; wide enough for both a 50 ms cache hit and a slow 2-minute review.
+DURATION_BUCKETS = (0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 20.0, 30.0, 60.0, 120.0)
+
+CONTENT_TYPE = "text/plain; version=0.0.4; charset=utf-8"
+
+LabelValues = Tuple[str, ...]
+
+
+def format_labels(names: Sequence[str], values: Sequence[str]) -> str:
+    if not names:
+        return ""
+    pairs = ",".join(
+        f'{name}="{escape_label(value)}"' for name, value in zip(names, values)
+    )
+    return "{" + pairs + "}"
+
+
+def escape_label(value: str) -> str:
+    return str(value).replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
+
+
+def format_value(value: float) -> str:
+    if math.isinf(value):
+        return "+Inf" if value > 0 else "-Inf"
+    return repr(float(value)) if value != int(value) else str(int(value))
+
+
+class Counter:
+    """Monotonic count per label combination."""
+
+    type = "counter"
+
+    def __init__(self, name: str, help: str, labels: Sequence[str] = ()):
+        self.name = name
+        self.help = help
+        self.labels = tuple(labels)
+        self._values: Dict[LabelValues, float] = {}
+        self._lock = threading.Lock()
+
+    def inc(self, amount: float = 1.0, **labels: str) -> None:
+        key = tuple(str(labels.get(name, "")) for name in self.labels)
+        with self._lock:
+            self._values[key] = self._values.get(key, 0.0) + amount
+
+    def samples(self) -> Iterable[Tuple[str, str, float]]:
+        with self._lock:
+            values = list(self._values.items())
+        for key, value in values:
+            yield self.name, format_labels(self.labels, key), value
+
+
+class Histogram:
+    """Cumulative bucket counts, sum and count per label combination."""
+
+    type = "histogram"
+
+    def __init__(
+        self,
+        name: str,
+        help: str,
+        labels: Sequence[str] = (),
+        buckets: Sequence[float] = DURATION_BUCKETS,
+    ):
+        self.name = name
+        self.help = help
+        self.labels = tuple(labels)
+        self.buckets = tuple(sorted(buckets))
+        # Per label combination: count per bucket (+Inf last) and the sum.
+        self._counts: Dict[LabelValues, List[int]] = {}
+        self._sums: Dict[LabelValues, float] = {}
+        self._lock = threading.Lock()
+
+    def observe(self, value: float, **labels: str) -> None:
+        key = tuple(str(labels.get(name, "")) for name in self.labels)
+        index = bisect_left(self.buckets, value)
+        with self._lock:
+            counts = self._counts.get(key)
+            if counts is None:
+                counts = self._counts[key] = [0] * (len(self.buckets) + 1)
+            counts[index] += 1
+            self._sums[key] = self._sums.get(key, 0.0) + value
+
+    def samples(self) -> Iterable[Tuple[str, str, float]]:
+        with self._lock:
+            values = [
+                (key, list(counts), self._sums[key])
+                for key, counts in self._counts.items()
+            ]
+        names = self.labels + ("le",)
+        for key, counts, total in values:
+            cumulative = 0
+            for bound, count in zip(self.buckets + (math.inf,), counts):
+                cumulative += count
+                le = format_value(bound) if math.isinf(bound) else str(bound)
+                labels = format_labels(names, key + (le,))
+                yield f"{self.name}_bucket", labels, cumulative
+            labels = format_labels(self.labels, key)
+            yield f"{self.name}_sum", labels, total
+            yield f"{self.name}_count", labels, cumulative
+
+
+class MetricsRegistry:
+    """Process-wide metrics rendered in the Prometheus text format.
+
+    Recording is a dict update under a per-metric lock, so it is cheap enough
+    for the request path; formatting happens only when ``/metrics`` is scraped.
+    """
+
+    def __init__(self):
+        self._metrics: List = []
+
+    def counter(self, name: str, help: str, labels: Sequence[str] = ()) -> Counter:
+        metric = Counter(name, help, labels)
+        self._metrics.append(metric)
+        return metric
+
+    def histogram(
+        self,
+        name: str,
+        help: str,
+        labels: Sequence[str] = (),
+        buckets: Sequence[float] = DURATION_BUCKETS,
+    ) -> Histogram:
+        metric = Histogram(name, help, labels, buckets)
+        self._metrics.append(metric)
+        return metric
+
+    def render(self) -> str:
+        lines: List[str] = []
+        for metric in self._metrics:
+            lines.append(f"# HELP {metric.name} {metric.help}")
+            lines.append(f"# TYPE {metric.name} {metric.type}")
+            for name, labels, value in metric.samples():
+                lines.append(f"{name}{labels} {format_value(value)}")
+        return "\n".join(lines) + "\n"
+
+
+def render_gauge(
+    name: str,
+    help: str,
+    labels: Sequence[str],
+    samples: Iterable[Tuple[Sequence[str], float]],
+) -> str:
+    """Format a gauge computed at scrape time (cache ratios, breaker state, ...)."""
+    lines = [f"# HELP {name} {help}", f"# TYPE {name} gauge"]
+    for values, value in samples:
+        lines.append(f"{name}{format_labels(labels, values)} {format_value(value)}")
+    return "\n".join(lines) + "\n"
+
+
+metrics = MetricsRegistry()
+
+NODE_DURATION = metrics.histogram(
+    "review_node_duration_seconds",
+    "Wall time of each review graph node.",
+    ("node",),
+)
+NODE_SKIPPED = metrics.counter(
+    "review_node_skipped_total",
+    "Optional nodes skipped because the review deadline was too close.",
+    ("node",),
+)
+LLM_CALL_DURATION = metrics.histogram(
+    "llm_call_duration_seconds",
+    "Latency of each model call, retries and hedges included.",
+    ("agent", "model", "outcome"),
+)
+LLM_PROMPT_TOKENS = metrics.counter(
+    "llm_prompt_tokens_total",
+    "Prompt tokens reported by the provider.",
+    ("agent", "model"),
+)
+LLM_COMPLETION_TOKENS = metrics.counter(
+    "llm_completion_tokens_total",
+    "Completion tokens reported by the provider.",
+    ("agent", "model"),
+)
+LLM_QUEUE_WAIT = metrics.histogram(
+    "llm_queue_wait_seconds",
+    "Time model calls wait for the provider rate limits, per agent and priority.",
+    ("agent", "priority"),
+    buckets=(0.0, 0.01, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0, 60.0),
+)
+LLM_BATCHES = metrics.counter(
+    "llm_batches_total",
+    "Prompt batches packed by agents that split their input.",
+    ("agent", "model"),
+)
+LLM_PARSE_RESULTS = metrics.counter(
+    "llm_parse_results_total",
+    "JSON parses of model responses by outcome (ok, repaired, failed).",
+    ("agent", "model", "outcome"),
+)
+PROMPT_CACHE_REQUESTS = metrics.counter(
+    "llm_prompt_cache_requests_total",
+    "Prompt cache lookups by result (hit, miss).",
+    ("agent", "model", "result"),
+)
+REVIEW_CACHE_REQUESTS = metrics.counter(
+    "review_cache_requests_total",
+    "Review cache lookups by result (hit, miss).",
+    ("result",),
+)
+REVIEW_JOBS = metrics.counter(
+    "review_jobs_total",
+    "Review jobs by event (queued, rejected, done, failed).",
+    ("status",),
+)
+REVIEW_JOB_WAIT = metrics.histogram(
+    "review_job_wait_seconds",
+    "Time review jobs spend queued before a worker picks them up.",
+)
+REVIEW_JOB_RUN = metrics.histogram(
+    "review_job_run_seconds",
+    "Time a worker spends on each review job.",
+)
+REVIEW_JOB_BUSY_SECONDS = metrics.counter(
+    "review_job_worker_busy_seconds_total",
+    "Worker time spent on jobs; rate() over the worker count is utilization.",
+)
@@ -0,0 +1,106 @@
+import logging
+import threading
+from collections import deque
+from typing import Deque, Dict, Optional, Tuple
+
+logger = logging.getLogger(__name__)
+
+
+class ModelStats:
+    """Rolling window of (latency, succeeded) samples for one model."""
+
+    def __init__(self, window: int = 50):
+        self._samples: Deque[Tuple[float, bool]] = deque(maxlen=window)
+
+    def record(self, seconds: float, ok: bool) -> None:
+        self._samples.append((seconds, ok))
+
+    def __len__(self) -> int:
+        return len(self._samples)
+
+    def error_rate(self) -> float:
+        if not self._samples:
+            return 0.0
+        return sum(1 for _, ok in self._samples if not ok) / len(self._samples)
+
+    def p95(self) -> Optional[float]:
+        latencies = sorted(seconds for seconds, ok in self._samples if ok)
+        if not latencies:
+            return None
+        return latencies[min(len(latencies) - 1, int(0.95 * len(latencies)))]
+
+
+class ModelRouter:
+    """Picks the model for one agent, with optional latency/error-aware fallback.
+
+    Without a ``fallback`` every call goes to ``primary``. With one, calls move
+    to the fallback while the primary's rolling p95 latency exceeds
+    ``latency_slo`` seconds or its error rate exceeds ``max_error_rate``; every
+    ``probe_every``-th call still goes to the primary so it can recover.
+    """
+
+    def __init__(
+        self,
+        primary: str,
+        fallback: Optional[str] = None,
+        latency_slo: Optional[float] = None,
+        max_error_rate: float = 0.5,
+        window: int = 50,
+        min_samples: int = 10,
+        probe_every: int = 10,
+    ):
+        self.primary = primary
+        self.fallback = fallback
+        self.latency_slo = latency_slo
+        self.max_error_rate = max_error_rate
+        self.min_samples = min_samples
+        self.probe_every = max(1, probe_every)
+        self.stats: Dict[str, ModelStats] = {
+            model: ModelStats(window) for model in (primary, fallback) if model
+        }
+        self._calls_while_degraded = 0
+        self._lock = threading.Lock()
+
+    def primary_degraded(self) -> bool:
+        stats = self.stats[self.primary]
+        if len(stats) < self.min_samples:
+            return False
+        if stats.error_rate() > self.max_error_rate:
+            return True
+        p95 = stats.p95()
+        if self.latency_slo is None or p95 is None:
+            return False
+        return p95 > self.latency_slo
+
+    def choose(self) -> str:
+        """Model to use for the next call."""
+        if self.fallback is None:
+            return self.primary
+        with self._lock:
+            if not self.primary_degraded():
+                self._calls_while_degraded = 0
+                return self.primary
+            self._calls_while_degraded += 1
+            if self._calls_while_degraded % self.probe_every == 0:
+                return self.primary  # probe
+        return self.fallback
+
+    def failover(self, model: str) -> Optional[str]:
+        """Model to retry with after ``model`` failed, if there is one."""
+        if self.fallback is None or model == self.fallback:
+            return None
+        return self.fallback
+
+    def record(self, model: str, seconds: float, ok: bool) -> None:
+        stats = self.stats.get(model)
+        if stats is None:
+            return
+        with self._lock:
+            was_degraded = model == self.primary and self.primary_degraded()
+            stats.record(seconds, ok)
+            if model != self.primary or self.primary_degraded() == was_degraded:
+                return
+        if was_degraded:
+            logger.warning(f"Model {self.primary} recovered")
+        elif self.fallback is not None:
+            logger.warning(f"Model {self.primary} degraded; routing to {self.fallback}")
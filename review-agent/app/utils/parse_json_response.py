@@ -1,10 +1,179 @@
 import json
-from typing import Any, Dict
+import logging
+import threading
+from collections import defaultdict
+from typing import Any, Dict, List, Optional
 
+from app.utils.metrics import LLM_PARSE_RESULTS
 
-def safe_parse_json_response(response: str) -> Dict[str, Any]:
-    """Try to parse response into dict if it contains JSON-like text."""
+logger = logging.getLogger(__name__)
+
+BRACKET_PAIRS = {"{": "}", "[": "]"}
+
+
+class IncrementalJSONParser:
+    """Tolerant, resumable parser for the JSON object in a model response.
+
+    Text is fed in chunks (a whole response or a token stream). Anything
+    before the first ``{`` (preambles, markdown fences) and after the object
+    closes is ignored, trailing commas are dropped, and a truncated response
+    is cut back to its last complete element and closed. Each character is
+    scanned once, so feeding a stream costs linear time overall.
+    """
+
+    def __init__(self):
+        self._out: List[str] = []
+        self._stack: List[str] = []
+        # How many open containers are elements of an array; while any is
+        # open, the output ends inside a partially written array element.
+        self._open_elements = 0
+        self._element_flags: List[bool] = []
+        self._in_string = False
+        self._escaped = False
+        self._started = False
+        self.complete = False
+        # Length of _out and the open containers at the last point where
+        # every value written so far was complete.
+        self._safe_len = 0
+        self._safe_stack: List[str] = []
+
+    def feed(self, chunk: str) -> None:
+        for c in chunk:
+            if self.complete:
+                return
+            if not self._started:
+                if c != "{":
+                    continue
+                self._started = True
+
+            if self._in_string:
+                self._out.append(c)
+                if self._escaped:
+                    self._escaped = False
+                elif c == "\\":
+                    self._escaped = True
+                elif c == '"':
+                    self._in_string = False
+                continue
+
+            if c == '"':
+                self._in_string = True
+                self._out.append(c)
+            elif c in BRACKET_PAIRS:
+                is_element = bool(self._stack) and self._stack[-1] == "["
+                self._stack.append(c)
+                self._element_flags.append(is_element)
+                self._open_elements += is_element
+                self._out.append(c)
+                self._mark_safe()
+            elif c in "}]":
+                self._drop_trailing_comma()
+                if not self._stack or BRACKET_PAIRS[self._stack[-1]] != c:
+                    # Mismatched closer: treat the response as truncated here.
+                    self.complete = True
+                    return
+                self._stack.pop()
+                self._open_elements -= self._element_flags.pop()
+                self._out.append(c)
+                self._mark_safe()
+                if not self._stack:
+                    self.complete = True
+            elif c == ",":
+                self._drop_trailing_comma()
+                self._mark_safe()
+                self._out.append(c)
+            else:
+                self._out.append(c)
+
+    def result(self) -> Optional[Dict[str, Any]]:
+        """Best-effort object parsed from everything fed so far, or None."""
+        if not self._started:
+            return None
+
+        if self.complete and not self._stack:
+            text = "".join(self._out)
+        else:
+            # Cut back to the last complete element and close what is open.
+            text = "".join(self._out[: self._safe_len]).rstrip()
+            if text.endswith(","):
+                text = text[:-1]
+            text += "".join(BRACKET_PAIRS[c] for c in reversed(self._safe_stack))
+
+        try:
+            parsed = json.loads(text)
+        except ValueError:
+            return None
+        return parsed if isinstance(parsed, dict) else None
+
+    @property
+    def truncated(self) -> bool:
+        return not (self.complete and not self._stack)
+
+    def _mark_safe(self) -> None:
+        if self._open_elements:
+            return
+        self._safe_len = len(self._out)
+        self._safe_stack = list(self._stack)
+
+    def _drop_trailing_comma(self) -> None:
+        i = len(self._out) - 1
+        while i >= 0 and self._out[i].isspace():
+            i -= 1
+        if i >= 0 and self._out[i] == ",":
+            del self._out[i]
+
+
+class ParseStats:
+    """Per-agent counts of clean, repaired and failed response parses."""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._counts: Dict[str, Dict[str, int]] = defaultdict(
+            lambda: {"ok": 0, "repaired": 0, "failed": 0}
+        )
+
+    def record(self, agent: str, outcome: str, model: str = "") -> None:
+        with self._lock:
+            self._counts[agent][outcome] += 1
+        LLM_PARSE_RESULTS.inc(agent=agent, model=model, outcome=outcome)
+
+    def snapshot(self) -> Dict[str, Dict[str, int]]:
+        with self._lock:
+            return {agent: dict(counts) for agent, counts in self._counts.items()}
+
+
+parse_stats = ParseStats()
+
+
+def parse_json_response(
+    response: str, agent: str = "unknown", model: str = ""
+) -> Optional[Dict[str, Any]]:
+    """Extract the JSON object from a model response, or None if there is none."""
     try:
-        return json.loads(response)
-    except Exception:
+        parsed = json.loads(response)
+        if isinstance(parsed, dict):
+            parse_stats.record(agent, "ok", model)
+            return parsed
+    except (TypeError, ValueError):
+        pass
+
+    parser = IncrementalJSONParser()
+    parser.feed(str(response))
+    parsed = parser.result()
+    if parsed is None:
+        parse_stats.record(agent, "failed", model)
+        logger.warning(f"{agent}: could not parse model response as JSON")
+        return None
+
+    parse_stats.record(agent, "repaired", model)
+    if parser.truncated:
+        logger.warning(f"{agent}: model response was truncated; kept complete items")
+    return parsed
+
+
+def safe_parse_json_response(response: str, agent: str = "unknown") -> Dict[str, Any]:
+    """Try to parse response into dict if it contains JSON-like text."""
+    parsed = parse_json_response(response, agent)
+    if parsed is None:
         return {"raw": str(response)}
+    return parsed
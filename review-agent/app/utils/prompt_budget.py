@@ -0,0 +1,81 @@
+import math
+from typing import Callable, Dict, List, Optional, Sequence, Tuple, TypeVar
+
+T = TypeVar("T")
+
+# Rough chars-per-token ratio for code and English on BPE tokenizers. It
+# overestimates slightly, which keeps packed prompts on the safe side.
+CHARS_PER_TOKEN = 3.5
+
+# Prompt (input) token budget per batched call, per model.
+MODEL_TOKEN_BUDGETS: Dict[str, int] = {
+    "Qwen/Qwen3-Coder-480B-A35B-Instruct-FP8": 8000,
+}
+DEFAULT_TOKEN_BUDGET = 4000
+
+
+def get_token_budget(model_name: str) -> int:
+    return MODEL_TOKEN_BUDGETS.get(model_name, DEFAULT_TOKEN_BUDGET)
+
+
+def count_tokens(text: str) -> int:
+    """Estimate the token count of ``text`` without a tokenizer dependency."""
+    return math.ceil(len(text) / CHARS_PER_TOKEN)
+
+
+def count_message_tokens(messages: Sequence[Dict[str, str]]) -> int:
+    # A few tokens of per-message framing on top of the content.
+    return sum(count_tokens(m.get("content", "")) + 4 for m in messages)
+
+
+def truncate_text(text: str, max_tokens: int) -> str:
+    """Cut ``text`` to about ``max_tokens``, keeping its head and tail.
+
+    The result is deterministic and the cut is marked so the model knows
+    content is missing.
+    """
+    text = str(text)
+    max_chars = int(max_tokens * CHARS_PER_TOKEN)
+    if len(text) <= max_chars:
+        return text
+
+    removed = len(text) - max_chars
+    marker = f"...[truncated {removed} chars]..."
+    keep = max(0, max_chars - len(marker))
+    head = keep - keep // 3
+    tail = keep - head
+    return text[:head] + marker + (text[len(text) - tail :] if tail else "")
+
+
+def pack_batches(
+    items: Sequence[T],
+    cost: Callable[[T], int],
+    budget: int,
+    max_items: Optional[int] = None,
+) -> Tuple[List[List[T]], float]:
+    """Greedily pack ``items`` in order into batches of at most ``budget`` tokens.
+
+    An item larger than the budget gets a batch of its own. Returns the batches
+    and their fill ratio (used tokens / available tokens).
+    """
+    budget = max(1, budget)
+    batches: List[List[T]] = []
+    current: List[T] = []
+    used = 0
+    total = 0
+
+    for item in items:
+        item_cost = cost(item)
+        total += item_cost
+        full = max_items is not None and len(current) >= max_items
+        if current and (used + item_cost > budget or full):
+            batches.append(current)
+            current, used = [], 0
+        current.append(item)
+        used += item_cost
+
+    if current:
+        batches.append(current)
+
+    fill_ratio = total / (len(batches) * budget) if batches else 0.0
+    return batches, fill_ratio
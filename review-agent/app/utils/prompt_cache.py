@@ -0,0 +1,99 @@
+import asyncio
+import hashlib
+import json
+from collections import OrderedDict
+from typing import Any, Awaitable, Callable, Dict, Optional
+
+
+class PromptCache:
+    """Size-bounded LRU memo of model outputs keyed by the exact request.
+
+    The key covers the model name, the full message list and every sampling
+    parameter, so two requests only share an entry when the provider would
+    have received byte-identical payloads. Concurrent identical requests are
+    coalesced into a single provider call.
+    """
+
+    def __init__(self, max_entries: int = 4096):
+        self.max_entries = max_entries
+        self.hits = 0
+        self.misses = 0
+        self._entries: OrderedDict[str, str] = OrderedDict()
+        self._in_flight: Dict[str, asyncio.Future] = {}
+
+    @staticmethod
+    def make_key(request: Dict[str, Any]) -> str:
+        canonical = json.dumps(
+            request, sort_keys=True, separators=(",", ":"), default=str
+        )
+        return hashlib.sha256(canonical.encode("utf-8")).hexdigest()
+
+    def get(self, key: str) -> Optional[str]:
+        text = self._entries.get(key)
+        if text is not None:
+            self._entries.move_to_end(key)
+        return text
+
+    def put(self, key: str, text: str) -> None:
+        self._entries[key] = text
+        self._entries.move_to_end(key)
+        while len(self._entries) > self.max_entries:
+            self._entries.popitem(last=False)
+
+    def discard(self, request: Dict[str, Any]) -> None:
+        """Forget the output for ``request`` so the next call goes to the model."""
+        self._entries.pop(self.make_key(request), None)
+
+    async def get_or_call(
+        self, request: Dict[str, Any], call: Callable[[], Awaitable[str]]
+    ) -> str:
+        """Return the memoized output for ``request``, calling the model on a miss."""
+        key = self.make_key(request)
+
+        text = self.get(key)
+        if text is not None:
+            self.hits += 1
+            return text
+
+        pending = self._in_flight.get(key)
+        if pending is not None:
+            self.hits += 1
+            try:
+                return await asyncio.shield(pending)
+            except asyncio.CancelledError:
+                task = asyncio.current_task()
+                if not pending.cancelled() or (task and task.cancelling()):
+                    raise
+                # Only the leader was cancelled (a losing hedge, a client that
+                # went away): this caller still wants an answer.
+                self.hits -= 1
+                return await self.get_or_call(request, call)
+
+        self.misses += 1
+        future = asyncio.get_running_loop().create_future()
+        self._in_flight[key] = future
+        try:
+            text = await call()
+        except Exception as e:
+            # Failures are not memoized; waiters see the same error.
+            future.set_exception(e)
+            future.exception()  # mark retrieved when nobody else is waiting
+            raise
+        except BaseException:
+            future.cancel()
+            raise
+        else:
+            self.put(key, text)
+            future.set_result(text)
+            return text
+        finally:
+            del self._in_flight[key]
+
+    def stats(self) -> Dict[str, Any]:
+        lookups = self.hits + self.misses
+        return {
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_rate": self.hits / lookups if lookups else 0.0,
+            "entries": len(self._entries),
+        }
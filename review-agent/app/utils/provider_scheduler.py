@@ -0,0 +1,202 @@
+import asyncio
+import logging
+import math
+import time
+from collections import OrderedDict, deque
+from contextvars import ContextVar
+from typing import Deque, Dict, Iterable, Optional, Tuple
+
+from app.utils.deadline import DeadlineExceeded, remaining_seconds
+from app.utils.metrics import LLM_QUEUE_WAIT
+
+logger = logging.getLogger(__name__)
+
+# Review the running code belongs to; calls are queued fairly across reviews.
+current_review: ContextVar[Optional[str]] = ContextVar("current_review", default=None)
+
+# Agents on the critical path of every review: their calls are served first.
+CRITICAL_AGENTS = frozenset({"logic", "overview", "express"})
+CRITICAL, OPTIONAL = 0, 1
+PRIORITY_NAMES = {CRITICAL: "critical", OPTIONAL: "optional"}
+
+
+class TokenBucket:
+    """Refills at ``rate`` units per second up to ``capacity``.
+
+    ``take`` may drive the level negative (a debt repaid by later refills),
+    which is how usage beyond an estimate is charged after the fact.
+    """
+
+    def __init__(self, rate: float, capacity: float):
+        self.rate = rate
+        self.capacity = capacity
+        self.level = capacity
+        self.updated = time.monotonic()
+
+    def refill(self) -> None:
+        now = time.monotonic()
+        self.level = min(self.capacity, self.level + (now - self.updated) * self.rate)
+        self.updated = now
+
+    def time_until(self, amount: float) -> float:
+        """Seconds until ``amount`` (capped at capacity) can be taken."""
+        self.refill()
+        missing = min(amount, self.capacity) - self.level
+        return max(0.0, missing / self.rate)
+
+    def take(self, amount: float) -> None:
+        self.refill()
+        self.level -= amount
+
+
+class _Waiter:
+    __slots__ = ("future", "tokens")
+
+    def __init__(self, future: asyncio.Future, tokens: int):
+        self.future = future
+        self.tokens = tokens
+
+
+class ProviderScheduler:
+    """Process-wide gate in front of every provider request.
+
+    Requests and tokens per minute are enforced with two token buckets (either
+    limit may be 0 to disable it). Waiting calls are queued by priority class,
+    critical-path agents first, and within a class round-robin across reviews,
+    so a review with many batches cannot starve the others: each review gets
+    one call per turn however many it has queued.
+    """
+
+    def __init__(
+        self,
+        requests_per_minute: float = 0,
+        tokens_per_minute: float = 0,
+        burst_seconds: float = 1.0,
+        critical_agents: Iterable[str] = CRITICAL_AGENTS,
+    ):
+        self.requests = self._bucket(requests_per_minute, burst_seconds)
+        self.tokens = self._bucket(tokens_per_minute, burst_seconds)
+        self.critical_agents = frozenset(critical_agents)
+        # Per priority class: review -> its waiting calls, in turn order.
+        self._queues: Dict[int, "OrderedDict[str, Deque[_Waiter]]"] = {
+            CRITICAL: OrderedDict(),
+            OPTIONAL: OrderedDict(),
+        }
+        self._timer: Optional[asyncio.TimerHandle] = None
+
+    @staticmethod
+    def _bucket(per_minute: float, burst_seconds: float) -> Optional[TokenBucket]:
+        if per_minute <= 0:
+            return None
+        # Allow at most ``burst_seconds`` of budget at once, and at least one unit.
+        return TokenBucket(
+            per_minute / 60.0, max(1.0, per_minute / 60.0 * burst_seconds)
+        )
+
+    @property
+    def enabled(self) -> bool:
+        return self.requests is not None or self.tokens is not None
+
+    def priority(self, agent: str) -> int:
+        return CRITICAL if agent in self.critical_agents else OPTIONAL
+
+    def queued(self) -> Dict[str, int]:
+        """Calls currently waiting, per priority class name."""
+        return {
+            PRIORITY_NAMES[priority]: sum(len(waiters) for waiters in reviews.values())
+            for priority, reviews in self._queues.items()
+        }
+
+    async def acquire(self, agent: str, tokens: int) -> float:
+        """Wait for this call's turn and budget; return the seconds waited.
+
+        Never waits past the review's deadline: DeadlineExceeded is raised
+        instead, the same as when the deadline passes between retries.
+        """
+        if not self.enabled:
+            return 0.0
+        started = time.monotonic()
+        priority = self.priority(agent)
+        review = current_review.get() or ""
+        reviews = self._queues[priority]
+        waiter = _Waiter(asyncio.get_running_loop().create_future(), tokens)
+        reviews.setdefault(review, deque()).append(waiter)
+        self._dispatch()
+
+        remaining = remaining_seconds()
+        try:
+            await asyncio.wait_for(
+                asyncio.shield(waiter.future),
+                timeout=None if math.isinf(remaining) else max(0.0, remaining),
+            )
+        except asyncio.TimeoutError:
+            raise DeadlineExceeded(f"{agent} call not started: queued past deadline")
+        finally:
+            if not waiter.future.done():
+                # Timed out or cancelled: give up the place in the queue.
+                waiter.future.cancel()
+                self._discard(reviews, review, waiter)
+        waited = time.monotonic() - started
+        LLM_QUEUE_WAIT.observe(waited, agent=agent, priority=PRIORITY_NAMES[priority])
+        return waited
+
+    def charge(self, tokens: int) -> None:
+        """Spend budget for a request sent without queueing (a hedge)."""
+        if self.requests is not None:
+            self.requests.take(1)
+        if self.tokens is not None:
+            self.tokens.take(tokens)
+
+    def settle(self, estimated: int, actual: int) -> None:
+        """Charge (or refund) the difference between estimated and reported tokens."""
+        if self.tokens is not None and actual:
+            self.tokens.take(actual - estimated)
+
+    def _discard(self, reviews, review: str, waiter: _Waiter) -> None:
+        waiters = reviews.get(review)
+        if waiters is None:
+            return
+        try:
+            waiters.remove(waiter)
+        except ValueError:
+            return
+        if not waiters:
+            del reviews[review]
+        self._dispatch()
+
+    def _next(self) -> Optional[Tuple["OrderedDict[str, Deque[_Waiter]]", str]]:
+        for priority in (CRITICAL, OPTIONAL):
+            reviews = self._queues[priority]
+            if reviews:
+                return reviews, next(iter(reviews))
+        return None
+
+    def _dispatch(self) -> None:
+        """Release queued calls in turn while the budgets allow."""
+        if self._timer is not None:
+            self._timer.cancel()
+            self._timer = None
+        while True:
+            head = self._next()
+            if head is None:
+                return
+            reviews, review = head
+            waiter = reviews[review][0]
+            wait = max(
+                self.requests.time_until(1) if self.requests else 0.0,
+                self.tokens.time_until(waiter.tokens) if self.tokens else 0.0,
+            )
+            if wait > 0:
+                self._timer = asyncio.get_running_loop().call_later(
+                    wait, self._dispatch
+                )
+                return
+
+            waiters = reviews.pop(review)
+            waiters.popleft()
+            if waiters:
+                reviews[review] = waiters  # back of the line for its next call
+            if waiter.future.done():
+                continue  # gave up while queued
+            self.charge(waiter.tokens)
+            waiter.future.set_result(None)
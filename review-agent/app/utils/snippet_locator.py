@@ -0,0 +1,150 @@
+import bisect
+from collections import defaultdict
+from functools import lru_cache
+from typing import Any, Dict, Iterable, List, Optional, Tuple
+
+from app.models.review_state import Location
+
+# Length of the character n-grams indexed over the whitespace-free code.
+NGRAM_SIZE = 4
+
+# Snippet lines shorter than this (after removing whitespace) are too
+# ambiguous to anchor a line-by-line match on their own.
+MIN_LINE_CHARS = 3
+
+
+class SnippetIndex:
+    """Resolves code snippets quoted by the model to exact locations in the code.
+
+    Whitespace is ignored when matching, so re-indented or reformatted quotes
+    still resolve. Lookups go through an n-gram map of the whitespace-free
+    text, which keeps them roughly linear in the snippet length.
+    """
+
+    def __init__(self, code: str):
+        self.code = code
+        self.line_starts = [0] + [i + 1 for i, c in enumerate(code) if c == "\n"]
+
+        # Whitespace-free text plus the original offset of each kept character.
+        chars: List[str] = []
+        self.offsets: List[int] = []
+        for offset, c in enumerate(code):
+            if not c.isspace():
+                chars.append(c)
+                self.offsets.append(offset)
+        self.text = "".join(chars)
+
+        self.ngrams: Dict[str, List[int]] = defaultdict(list)
+        for i in range(len(self.text) - NGRAM_SIZE + 1):
+            self.ngrams[self.text[i : i + NGRAM_SIZE]].append(i)
+
+    def position(self, offset: int) -> Tuple[int, int]:
+        """1-based (line, column) of an offset in the original code."""
+        line = bisect.bisect_right(self.line_starts, offset) - 1
+        return line + 1, offset - self.line_starts[line] + 1
+
+    def find_all(self, needle: str) -> List[int]:
+        """Start positions of a whitespace-free needle in the normalized text."""
+        if not needle:
+            return []
+        if len(needle) < NGRAM_SIZE:
+            found, start = [], self.text.find(needle)
+            while start != -1:
+                found.append(start)
+                start = self.text.find(needle, start + 1)
+            return found
+
+        # Anchor on the rarest n-gram of the needle to keep the candidate list short.
+        best_shift, best_hits = 0, None
+        for shift in range(len(needle) - NGRAM_SIZE + 1):
+            hits = self.ngrams.get(needle[shift : shift + NGRAM_SIZE], [])
+            if best_hits is None or len(hits) < len(best_hits):
+                best_shift, best_hits = shift, hits
+                if len(hits) <= 1:
+                    break
+
+        return [
+            pos - best_shift
+            for pos in best_hits or []
+            if pos >= best_shift and self.text.startswith(needle, pos - best_shift)
+        ]
+
+    def _span(self, start: int, length: int) -> Location:
+        start_line, start_col = self.position(self.offsets[start])
+        end_line, end_col = self.position(self.offsets[start + length - 1])
+        return {
+            "start_line": start_line,
+            "start_col": start_col,
+            "end_line": end_line,
+            "end_col": end_col + 1,  # exclusive, as in the editor
+        }
+
+    def _closest(self, candidates: List[int], near_line: Optional[int]) -> int:
+        if near_line is None or len(candidates) == 1:
+            return candidates[0]
+        return min(
+            candidates,
+            key=lambda pos: abs(self.position(self.offsets[pos])[0] - near_line),
+        )
+
+    def resolve(
+        self, snippet: str, near_line: Optional[int] = None
+    ) -> Optional[Location]:
+        """Locate ``snippet`` in the code, preferring the match closest to ``near_line``.
+
+        Falls back to matching the snippet's first and last recognizable lines
+        when the model paraphrased or elided the middle. Returns None when
+        nothing matches.
+        """
+        needle = "".join(snippet.split())
+        if not needle:
+            return None
+
+        candidates = self.find_all(needle)
+        if candidates:
+            return self._span(self._closest(candidates, near_line), len(needle))
+
+        # "..." marks elided code in model quotes; it never matches the source.
+        lines = ["".join(line.split()).strip(".") for line in snippet.splitlines()]
+        lines = [line for line in lines if len(line) >= MIN_LINE_CHARS]
+        if len(lines) < 2:
+            return None
+
+        first_hits = self.find_all(lines[0])
+        if not first_hits:
+            return None
+        start = self._closest(first_hits, near_line)
+        last_hits = [pos for pos in self.find_all(lines[-1]) if pos > start]
+        if not last_hits:
+            return self._span(start, len(lines[0]))
+
+        end = last_hits[0] + len(lines[-1])
+        return self._span(start, end - start)
+
+
+@lru_cache(maxsize=64)
+def get_snippet_index(code: str) -> SnippetIndex:
+    """Index for ``code``, built once and shared by every agent in a request."""
+    return SnippetIndex(code)
+
+
+def resolve_locations(code: str, items: Iterable[Dict[str, Any]]) -> int:
+    """Overwrite each item's ``location`` with the resolved span of its ``code_snippet``.
+
+    The model's own location is kept (and used to pick between repeated
+    occurrences) when the snippet cannot be found. Returns how many items
+    were resolved.
+    """
+    index = get_snippet_index(code)
+    resolved = 0
+    for item in items:
+        guess = item.get("location") or {}
+        near_line = guess.get("start_line") if isinstance(guess, dict) else None
+        location = index.resolve(
+            str(item.get("code_snippet") or ""),
+            near_line if isinstance(near_line, int) else None,
+        )
+        if location is not None:
+            item["location"] = location
+            resolved += 1
+    return resolved
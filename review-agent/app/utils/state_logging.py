@@ -0,0 +1,53 @@
+import logging
+import random
+import reprlib
+import zlib
+from typing import Any
+
+from app.utils.provider_scheduler import current_review
+
+# Share of reviews whose state is logged, and the longest line that is written.
+# Set from LOG_STATE_SAMPLE_RATE / LOG_STATE_MAX_CHARS by configure_state_logging.
+sample_rate = 0.1
+max_chars = 2000
+
+# Bounded repr: long code and test outputs are cut, big collections elided.
+_repr = reprlib.Repr(maxlevel=4, maxdict=8, maxlist=6, maxstring=160, maxother=160)
+
+
+def configure_state_logging(rate: float, chars: int) -> None:
+    global sample_rate, max_chars
+    sample_rate = rate
+    max_chars = chars
+
+
+def summarize_state(state: Any, limit: int = 0) -> str:
+    """A size-capped repr of a state or state update."""
+    limit = limit or max_chars
+    text = _repr.repr(state)
+    if len(text) > limit:
+        text = f"{text[:limit]}...[{len(text) - limit} more chars]"
+    return text
+
+
+def is_sampled() -> bool:
+    """Whether the current review's state is logged.
+
+    Decided by the review id, so a sampled review logs every stage; outside
+    a review each call is sampled on its own.
+    """
+    review = current_review.get()
+    if review is None:
+        return random.random() < sample_rate
+    return zlib.crc32(review.encode()) / 2**32 < sample_rate
+
+
+def log_state(logger: logging.Logger, label: str, state: Any) -> None:
+    """Log ``state`` at DEBUG for a sample of reviews.
+
+    Nothing is formatted unless DEBUG is enabled for ``logger`` and the review
+    is sampled, so this is safe on the hot path of every graph node.
+    """
+    if not logger.isEnabledFor(logging.DEBUG) or not is_sampled():
+        return
+    logger.debug("%s: %s", label, summarize_state(state))
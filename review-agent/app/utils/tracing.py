@@ -0,0 +1,318 @@
+import json
+import logging
+import queue
+import re
+import secrets
+import threading
+import time
+import urllib.request
+from contextlib import contextmanager
+from contextvars import ContextVar
+from typing import Any, Dict, Iterator, List, NamedTuple, Optional, Sequence
+
+logger = logging.getLogger(__name__)
+
+TRACEPARENT_RE = re.compile(r"^00-([0-9a-f]{32})-([0-9a-f]{16})-([0-9a-f]{2})$")
+
+
+class SpanContext(NamedTuple):
+    """Identity of a span in another process, from a W3C ``traceparent`` header."""
+
+    trace_id: str
+    span_id: str
+    sampled: bool = True
+
+
+def parse_traceparent(header: Optional[str]) -> Optional[SpanContext]:
+    match = TRACEPARENT_RE.match((header or "").strip().lower())
+    if match is None:
+        return None
+    trace_id, span_id, flags = match.groups()
+    if trace_id == "0" * 32 or span_id == "0" * 16:
+        return None
+    return SpanContext(trace_id, span_id, bool(int(flags, 16) & 1))
+
+
+class Span:
+    """One timed operation of a trace. Attributes may be set until it ends."""
+
+    __slots__ = (
+        "name",
+        "kind",
+        "trace_id",
+        "span_id",
+        "parent_id",
+        "sampled",
+        "attributes",
+        "start_ns",
+        "end_ns",
+        "error",
+    )
+
+    def __init__(
+        self,
+        name: str,
+        trace_id: str,
+        parent_id: Optional[str],
+        sampled: bool = True,
+        kind: str = "internal",
+        attributes: Optional[Dict[str, Any]] = None,
+    ):
+        self.name = name
+        self.kind = kind
+        self.trace_id = trace_id
+        self.span_id = secrets.token_hex(8)
+        self.parent_id = parent_id
+        self.sampled = sampled
+        self.attributes: Dict[str, Any] = dict(attributes or {})
+        self.start_ns = time.time_ns()
+        self.end_ns: Optional[int] = None
+        self.error: Optional[str] = None
+
+    def set_attribute(self, key: str, value: Any) -> None:
+        self.attributes[key] = value
+
+    @property
+    def traceparent(self) -> str:
+        return f"00-{self.trace_id}-{self.span_id}-{'01' if self.sampled else '00'}"
+
+    @property
+    def duration(self) -> float:
+        end = self.end_ns if self.end_ns is not None else time.time_ns()
+        return (end - self.start_ns) / 1e9
+
+    def to_dict(self) -> Dict[str, Any]:
+        return {
+            "name": self.name,
+            "kind": self.kind,
+            "trace_id": self.trace_id,
+            "span_id": self.span_id,
+            "parent_id": self.parent_id,
+            "start_ns": self.start_ns,
+            "end_ns": self.end_ns,
+            "duration_seconds": round(self.duration, 6),
+            "attributes": self.attributes,
+            "error": self.error,
+        }
+
+
+# The span the running code belongs to; children are parented to it.
+current_span: ContextVar[Optional[Span]] = ContextVar("current_span", default=None)
+
+
+def set_span_attributes(attributes: Dict[str, Any]) -> None:
+    """Annotate the current span, if any (cheap no-op outside a trace)."""
+    span = current_span.get()
+    if span is not None:
+        span.attributes.update(attributes)
+
+
+class FileSpanExporter:
+    """Appends finished spans to ``path`` as JSON lines."""
+
+    def __init__(self, path: str):
+        self.path = path
+
+    def export(self, spans: Sequence[Span]) -> None:
+        with open(self.path, "a", encoding="utf-8") as f:
+            for span in spans:
+                f.write(json.dumps(span.to_dict(), default=str) + "\n")
+
+
+def otlp_value(value: Any) -> Dict[str, Any]:
+    if isinstance(value, bool):
+        return {"boolValue": value}
+    if isinstance(value, int):
+        return {"intValue": str(value)}
+    if isinstance(value, float):
+        return {"doubleValue": value}
+    if isinstance(value, str):
+        return {"stringValue": value}
+    return {"stringValue": json.dumps(value, default=str)}
+
+
+OTLP_SPAN_KINDS = {"internal": 1, "server": 2, "client": 3}
+
+
+class OTLPSpanExporter:
+    """Posts finished spans to an OpenTelemetry collector (OTLP/HTTP, JSON)."""
+
+    def __init__(
+        self, endpoint: str, service_name: str = "review-agent", timeout: float = 5.0
+    ):
+        self.endpoint = endpoint
+        self.service_name = service_name
+        self.timeout = timeout
+
+    def payload(self, spans: Sequence[Span]) -> Dict[str, Any]:
+        return {
+            "resourceSpans": [
+                {
+                    "resource": {
+                        "attributes": [
+                            {
+                                "key": "service.name",
+                                "value": otlp_value(self.service_name),
+                            }
+                        ]
+                    },
+                    "scopeSpans": [
+                        {
+                            "scope": {"name": "app.utils.tracing"},
+                            "spans": [self.otlp_span(span) for span in spans],
+                        }
+                    ],
+                }
+            ]
+        }
+
+    @staticmethod
+    def otlp_span(span: Span) -> Dict[str, Any]:
+        return {
+            "traceId": span.trace_id,
+            "spanId": span.span_id,
+            "parentSpanId": span.parent_id or "",
+            "name": span.name,
+            "kind": OTLP_SPAN_KINDS.get(span.kind, 1),
+            "startTimeUnixNano": str(span.start_ns),
+            "endTimeUnixNano": str(span.end_ns or span.start_ns),
+            "attributes": [
+                {"key": key, "value": otlp_value(value)}
+                for key, value in span.attributes.items()
+            ],
+            "status": (
+                {"code": 2, "message": span.error} if span.error else {"code": 1}
+            ),
+        }
+
+    def export(self, spans: Sequence[Span]) -> None:
+        request = urllib.request.Request(
+            self.endpoint,
+            data=json.dumps(self.payload(spans)).encode("utf-8"),
+            headers={"Content-Type": "application/json"},
+            method="POST",
+        )
+        with urllib.request.urlopen(request, timeout=self.timeout):
+            pass
+
+
+class Tracer:
+    """Creates spans and hands finished ones to the exporters.
+
+    Export runs on a background thread fed by a bounded queue, so a slow disk
+    or collector never delays a review; when the queue is full spans are
+    dropped and counted. Without exporters spans are still created (they are
+    cheap) but nothing is written.
+    """
+
+    def __init__(
+        self,
+        exporters: Sequence[Any] = (),
+        max_queue: int = 10000,
+        flush_interval: float = 2.0,
+        max_batch: int = 512,
+    ):
+        self.exporters: List[Any] = []
+        self.max_queue = max_queue
+        self.flush_interval = flush_interval
+        self.max_batch = max_batch
+        self.dropped = 0
+        self._queue: "queue.Queue[Optional[Span]]" = queue.Queue(maxsize=max_queue)
+        self._worker: Optional[threading.Thread] = None
+        self.configure(exporters)
+
+    def configure(self, exporters: Sequence[Any]) -> None:
+        self.exporters = list(exporters)
+        if self.exporters and self._worker is None:
+            self._worker = threading.Thread(
+                target=self._run, name="span-exporter", daemon=True
+            )
+            self._worker.start()
+
+    @contextmanager
+    def start_span(
+        self,
+        name: str,
+        attributes: Optional[Dict[str, Any]] = None,
+        parent: Optional[SpanContext] = None,
+        kind: str = "internal",
+    ) -> Iterator[Span]:
+        """Run the ``with`` body inside a new span.
+
+        The span is a child of ``parent`` when given (a remote caller's span),
+        otherwise of the current span; with neither it starts a new trace.
+        """
+        previous = current_span.get()
+        if parent is not None:
+            span = Span(
+                name, parent.trace_id, parent.span_id, parent.sampled, kind, attributes
+            )
+        elif previous is not None:
+            span = Span(
+                name,
+                previous.trace_id,
+                previous.span_id,
+                previous.sampled,
+                kind,
+                attributes,
+            )
+        else:
+            span = Span(name, secrets.token_hex(16), None, True, kind, attributes)
+
+        current_span.set(span)
+        try:
+            yield span
+        except BaseException as e:
+            span.error = f"{type(e).__name__}: {e}"
+            raise
+        finally:
+            span.end_ns = time.time_ns()
+            # set() rather than reset(): the body may have crossed into another
+            # context (async generators resumed by a different task).
+            current_span.set(previous)
+            self._submit(span)
+
+    def _submit(self, span: Span) -> None:
+        if not self.exporters or not span.sampled:
+            return
+        try:
+            self._queue.put_nowait(span)
+        except queue.Full:
+            self.dropped += 1
+
+    def shutdown(self, timeout: float = 5.0) -> None:
+        """Flush queued spans and stop the export thread."""
+        if self._worker is None:
+            return
+        self._queue.put(None)
+        self._worker.join(timeout)
+        self._worker = None
+
+    def _run(self) -> None:
+        stopping = False
+        while not stopping:
+            batch: List[Span] = []
+            deadline = time.monotonic() + self.flush_interval
+            while len(batch) < self.max_batch:
+                try:
+                    span = self._queue.get(
+                        timeout=max(0.0, deadline - time.monotonic())
+                    )
+                except queue.Empty:
+                    break
+                if span is None:
+                    stopping = True
+                    break
+                batch.append(span)
+            if batch:
+                self._export(batch)
+
+    def _export(self, batch: List[Span]) -> None:
+        for exporter in self.exporters:
+            try:
+                exporter.export(batch)
+            except Exception as e:
+                logger.error(f"{type(exporter).__name__} failed: {e}")
+
+
+tracer = Tracer()
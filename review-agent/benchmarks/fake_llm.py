@@ -0,0 +1,208 @@
+"""In-process fake of the Together chat-completions client.
+
+Answers every agent's prompt with a schema-valid response after a simulated
+latency, and fails a configurable fraction of calls with provider errors.
+The agent is recognized from the JSON schema its prompt asks for, so the
+fake keeps working when prompt wording changes.
+
+    client = FakeTogetherClient(LatencyModel(median=0.8, sigma=0.5), error_rate=0.02)
+    service = build_review_service(client)
+"""
+
+import ast
+import asyncio
+import json
+import math
+import random
+import re
+from collections import Counter
+from types import SimpleNamespace
+from typing import Any, Dict, List, Optional
+
+from together import error as together_error
+
+
+class LatencyModel:
+    """Log-normal latency: ``median`` seconds, spread ``sigma``, capped at ``max_seconds``."""
+
+    def __init__(
+        self, median: float = 0.5, sigma: float = 0.4, max_seconds: float = 30.0
+    ):
+        self.median = median
+        self.sigma = sigma
+        self.max_seconds = max_seconds
+
+    def sample(self, rng: random.Random) -> float:
+        if self.median <= 0:
+            return 0.0
+        return min(
+            self.max_seconds, rng.lognormvariate(math.log(self.median), self.sigma)
+        )
+
+
+def detect_agent(messages: List[Dict[str, str]]) -> str:
+    """Name of the agent that built ``messages``, from the schema it requests."""
+    user = messages[-1]["content"]
+    if '"logic_issues"' in user and '"overview"' in user:
+        return "express"
+    if '"logic_issues"' in user:
+        return "logic"
+    if '"concept_issues"' in user:
+        return "concept_fix" if '"fix_suggestion"' in user else "concept_map"
+    if '"improvement_notes"' in user:
+        return "improve"
+    if '"fix_suggestion"' in user:
+        return "fix_hint"
+    return "overview"
+
+
+def _section(text: str, start: str, end: str) -> str:
+    match = re.search(rf"{start}\s*\n(.*?)\n\s*{end}", text, re.DOTALL)
+    return match.group(1) if match else ""
+
+
+def _code_lines(code: str) -> List[str]:
+    return [line.strip() for line in code.splitlines() if len(line.strip()) > 3]
+
+
+def _expected_concepts(text: str) -> List[str]:
+    match = re.search(r"Expected concepts: (\[.*?\])", text)
+    try:
+        return list(ast.literal_eval(match.group(1))) if match else []
+    except (ValueError, SyntaxError):
+        return []
+
+
+def _location(code: str, snippet: str) -> Dict[str, int]:
+    for number, line in enumerate(code.splitlines(), start=1):
+        if snippet and snippet in line:
+            return {"start_line": number, "end_line": number}
+    return {"start_line": 1, "end_line": 1}
+
+
+def fake_response(
+    agent: str, messages: List[Dict[str, str]], rng: random.Random
+) -> str:
+    """A plausible, schema-valid answer for ``agent``."""
+    user = messages[-1]["content"]
+
+    if agent in ("logic", "express"):
+        code = _section(
+            user, "Student code:", "(Failing test cases|Found by static checks):"
+        )
+        lines = _code_lines(code) or [""]
+        concepts = _expected_concepts(user)
+        issues = []
+        for test_id in re.findall(r"ID: (\d+) \| Input:", user):
+            snippet = rng.choice(lines)
+            issues.append(
+                {
+                    "issue": "The output differs from the expected value for this input.",
+                    "evidence": test_id,
+                    "code_snippet": snippet,
+                    "location": _location(code, snippet),
+                    "relevant_concept": concepts[:1],
+                    "fix_suggestion": "Trace the loop by hand for this input.",
+                }
+            )
+        body: Dict[str, Any] = {"logic_issues": issues}
+        if agent == "express":
+            body["improvement_notes"] = []
+            body["overview"] = "Good start; fix the failing cases first."
+        return json.dumps(body)
+
+    if agent in ("concept_map", "concept_fix"):
+        concepts = _expected_concepts(user)
+        if agent == "concept_fix":
+            refs = [int(i) for i in re.findall(r"Issue ID: (\d+)", user)]
+        else:
+            refs = list(range(len(re.findall(r"Issue \d+ \|", user))))
+        entries = []
+        for ref in refs:
+            entry = {
+                "issue_ref": ref,
+                "relevant_concept": concepts[:1],
+                "other_concept": [],
+                "explanation": "The failure comes from how the loop handles each element.",
+            }
+            if agent == "concept_fix":
+                entry["fix_suggestion"] = "Check the loop condition and update step."
+            entries.append(entry)
+        return json.dumps({"concept_issues": entries})
+
+    if agent == "improve":
+        code = _section(user, "CODE:", "ALREADY REPORTED")
+        lines = _code_lines(code)
+        notes = [
+            {
+                "location": _location(code, snippet),
+                "code_snippet": snippet,
+                "fix_suggestion": "Use a more descriptive name here.",
+                "issue": "The intent of this line is hard to read.",
+            }
+            for snippet in rng.sample(lines, min(2, len(lines)))
+        ]
+        return json.dumps({"improvement_notes": notes})
+
+    if agent == "fix_hint":
+        return json.dumps(
+            {"fix_suggestion": "Re-read the loop bounds and test with a small input."}
+        )
+
+    return "Your code is close. Fix the errors first, then tidy up the warnings."
+
+
+class FakeCompletions:
+    def __init__(
+        self,
+        latency: LatencyModel,
+        error_rate: float,
+        agent_latency: Optional[Dict[str, LatencyModel]],
+        seed: Optional[int],
+    ):
+        self.latency = latency
+        self.agent_latency = agent_latency or {}
+        self.error_rate = error_rate
+        self.rng = random.Random(seed)
+        self.calls: Counter = Counter()
+        self.errors: Counter = Counter()
+
+    async def create(self, model: str, messages: List[Dict[str, str]], **params: Any):
+        agent = detect_agent(messages)
+        self.calls[agent] += 1
+        await asyncio.sleep(
+            self.agent_latency.get(agent, self.latency).sample(self.rng)
+        )
+
+        if self.rng.random() < self.error_rate:
+            self.errors[agent] += 1
+            if self.rng.random() < 0.5:
+                raise together_error.RateLimitError("fake rate limit", http_status=429)
+            raise together_error.ServiceUnavailableError("fake outage", http_status=503)
+
+        text = fake_response(agent, messages, self.rng)
+        return SimpleNamespace(
+            model=model,
+            choices=[SimpleNamespace(message=SimpleNamespace(content=text))],
+            usage=SimpleNamespace(
+                prompt_tokens=sum(len(m["content"]) for m in messages) // 4,
+                completion_tokens=len(text) // 4,
+            ),
+        )
+
+
+class FakeTogetherClient:
+    """Drop-in for ``AsyncTogether`` as far as the agents use it."""
+
+    def __init__(
+        self,
+        latency: Optional[LatencyModel] = None,
+        error_rate: float = 0.0,
+        agent_latency: Optional[Dict[str, LatencyModel]] = None,
+        seed: Optional[int] = None,
+    ):
+        self.chat = SimpleNamespace(
+            completions=FakeCompletions(
+                latency or LatencyModel(), error_rate, agent_latency, seed
+            )
+        )
@@ -0,0 +1,190 @@
+"""Load-test the review API against the in-process fake LLM provider.
+
+Drives the FastAPI app through httpx's ASGI transport with variants of
+test_request.json and reports latency percentiles, throughput and the time
+spent in each graph node. No network or API key is needed, so concurrency
+regressions in the graph show up on a laptop.
+
+Usage (from the review-agent directory; httpx comes from the "bench"
+dependency group, ``uv sync --group bench``):
+    python -m benchmarks.load_test --requests 200 --concurrency 16 \\
+        --latency-median 0.5 --latency-sigma 0.4 --error-rate 0.02
+"""
+
+import argparse
+import asyncio
+import copy
+import json
+import logging
+import os
+import random
+import statistics
+import time
+from collections import defaultdict
+from pathlib import Path
+from typing import Any, Dict, List
+
+os.environ.setdefault("TOGETHER_API_KEY", "benchmark")
+os.environ.setdefault("LLM_RETRY_BASE_DELAY", "0.05")
+logging.disable(logging.CRITICAL)
+
+import httpx  # noqa: E402
+
+from app.api.review_code_deps import (
+    build_review_service,
+    create_http_session,
+)  # noqa: E402
+from app.app import create_app  # noqa: E402
+from app.services.review_code_service import ReviewCodeService  # noqa: E402
+from app.utils.parse_json_response import parse_stats  # noqa: E402
+from benchmarks.fake_llm import FakeTogetherClient, LatencyModel  # noqa: E402
+
+TEST_REQUEST = Path(__file__).resolve().parent.parent / "test_request.json"
+
+AGENT_ATTRIBUTES = (
+    "pre_analysis_agent",
+    "logic_agent",
+    "concept_mapping_agent",
+    "fix_hint_agent",
+    "concept_fix_agent",
+    "improvement_agent",
+    "overview_agent",
+    "express_agent",
+)
+
+
+def percentile(values: List[float], q: float) -> float:
+    ordered = sorted(values)
+    return ordered[min(len(ordered) - 1, int(q * len(ordered)))] if ordered else 0.0
+
+
+def make_variants(count: int, fail_ratio: float, seed: int) -> List[Dict[str, Any]]:
+    """Distinct submissions derived from test_request.json.
+
+    Each variant gets its own code (so no cache answers it) and a random set
+    of failing tests.
+    """
+    base = json.loads(TEST_REQUEST.read_text())
+    comment = "#" if base["assignment"]["language"].lower() == "python" else "//"
+    rng = random.Random(seed)
+
+    variants = []
+    for i in range(count):
+        request = copy.deepcopy(base)
+        request["student_submission"]["code"] += f"\n{comment} submission {i}\n"
+        for test in request["test_results"]:
+            if rng.random() < fail_ratio:
+                test["status"] = "fail"
+                test["actual"] = test["expect"][::-1] + "?"
+        variants.append(request)
+    return variants
+
+
+def instrument(service: ReviewCodeService) -> Dict[str, List[float]]:
+    """Time every node by wrapping the agents and recompiling the graphs."""
+    timings: Dict[str, List[float]] = defaultdict(list)
+
+    def timed(name, analyze):
+        async def run(state):
+            started = time.perf_counter()
+            try:
+                return await analyze(state)
+            finally:
+                timings[name].append(time.perf_counter() - started)
+
+        return run
+
+    for attribute in AGENT_ATTRIBUTES:
+        agent = getattr(service, attribute, None)
+        if agent is not None:
+            agent.analyze = timed(agent.name, agent.analyze)
+
+    service.workflow = service.create_review_graph(service.fuse_concept_fix)
+    if service.express_agent is not None:
+        service.express_workflow = service.create_express_graph()
+    return timings
+
+
+async def run_load(args: argparse.Namespace) -> None:
+    client = FakeTogetherClient(
+        LatencyModel(args.latency_median, args.latency_sigma),
+        error_rate=args.error_rate,
+        seed=args.seed,
+    )
+    service = build_review_service(client)
+    timings = instrument(service)
+
+    app = create_app()
+    app.state.http_session = await create_http_session()
+    app.state.review_service = service
+
+    variants = make_variants(args.requests, args.fail_ratio, args.seed)
+    latencies: List[float] = []
+    statuses: Dict[int, int] = defaultdict(int)
+    queue: asyncio.Queue = asyncio.Queue()
+    for request in variants:
+        request["mode"] = args.mode
+        queue.put_nowait(request)
+
+    transport = httpx.ASGITransport(app=app)
+    async with httpx.AsyncClient(
+        transport=transport, base_url="http://bench", timeout=None
+    ) as http:
+
+        async def worker():
+            while not queue.empty():
+                request = queue.get_nowait()
+                started = time.perf_counter()
+                response = await http.post("/api/v1/review_code", json=request)
+                latencies.append(time.perf_counter() - started)
+                statuses[response.status_code] += 1
+
+        started = time.perf_counter()
+        await asyncio.gather(*(worker() for _ in range(args.concurrency)))
+        elapsed = time.perf_counter() - started
+
+    await app.state.http_session.close()
+
+    completions = client.chat.completions
+    print(
+        f"requests: {len(latencies)}  concurrency: {args.concurrency}  "
+        f"mode: {args.mode}  statuses: {dict(statuses)}"
+    )
+    print(f"throughput: {len(latencies) / elapsed:.1f} req/s over {elapsed:.1f}s")
+    print(
+        "latency  p50 {:.3f}s  p95 {:.3f}s  p99 {:.3f}s  max {:.3f}s".format(
+            percentile(latencies, 0.50),
+            percentile(latencies, 0.95),
+            percentile(latencies, 0.99),
+            max(latencies, default=0.0),
+        )
+    )
+    print(
+        f"\n{'node':<14}{'runs':>6}{'mean':>9}{'p95':>9}{'model calls':>13}{'errors':>8}"
+    )
+    for node, samples in sorted(timings.items()):
+        print(
+            f"{node:<14}{len(samples):>6}{statistics.fmean(samples):>8.3f}s"
+            f"{percentile(samples, 0.95):>8.3f}s"
+            f"{completions.calls[node]:>13}{completions.errors[node]:>8}"
+        )
+    print(f"\nparse stats: {parse_stats.snapshot()}")
+
+
+def parse_args() -> argparse.Namespace:
+    parser = argparse.ArgumentParser(description=__doc__.split("\n\n")[0])
+    parser.add_argument("--requests", type=int, default=100)
+    parser.add_argument("--concurrency", type=int, default=8)
+    parser.add_argument("--mode", choices=["full", "express"], default="full")
+    parser.add_argument("--latency-median", type=float, default=0.5)
+    parser.add_argument("--latency-sigma", type=float, default=0.4)
+    parser.add_argument("--error-rate", type=float, default=0.0)
+    parser.add_argument(
+        "--fail-ratio", type=float, default=0.5, help="share of tests made to fail"
+    )
+    parser.add_argument("--seed", type=int, default=0)
+    return parser.parse_args()
+
+
+if __name__ == "__main__":
+    asyncio.run(run_load(parse_args()))
@@ -0,0 +1,68 @@
+"""Measure the per-request setup overhead of the review endpoint.
+
+Compares the old behaviour (a new Together client, agents, compiled graph and
+HTTP session on every request) with the process-lifetime singletons built by
+the app lifespan. No model calls are made, so TLS handshakes saved by the
+shared keep-alive pool come on top of the numbers reported here.
+
+Usage (from the review-agent directory):
+    python -m benchmarks.request_overhead [iterations]
+"""
+
+import asyncio
+import logging
+import os
+import sys
+import time
+from types import SimpleNamespace
+
+os.environ.setdefault("TOGETHER_API_KEY", "benchmark")
+logging.disable(logging.CRITICAL)
+
+from app.api.review_code_deps import (  # noqa: E402
+    build_review_service,
+    create_http_session,
+    get_review_service,
+    get_together_client,
+)
+
+
+async def per_request_setup() -> None:
+    """What each POST used to pay before the first model call."""
+    session = await create_http_session()
+    build_review_service(get_together_client())
+    await session.close()
+
+
+async def singleton_lookup(request) -> None:
+    """What each POST pays now."""
+    await get_review_service(request)
+
+
+async def measure(fn, iterations: int, *args) -> float:
+    start = time.perf_counter()
+    for _ in range(iterations):
+        await fn(*args)
+    return (time.perf_counter() - start) / iterations
+
+
+async def main(iterations: int) -> None:
+    http_session = await create_http_session()
+    app_state = SimpleNamespace(
+        http_session=http_session,
+        review_service=build_review_service(get_together_client()),
+    )
+    request = SimpleNamespace(app=SimpleNamespace(state=app_state))
+
+    before = await measure(per_request_setup, iterations)
+    after = await measure(singleton_lookup, iterations, request)
+    await http_session.close()
+
+    print(f"iterations: {iterations}")
+    print(f"before (per-request build): {before * 1e3:9.3f} ms/request")
+    print(f"after  (lifespan singletons): {after * 1e3:9.3f} ms/request")
+    print(f"speedup: {before / after:,.0f}x")
+
+
+if __name__ == "__main__":
+    asyncio.run(main(int(sys.argv[1]) if len(sys.argv) > 1 else 200))
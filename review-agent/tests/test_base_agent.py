@@ -0,0 +1,51 @@
+import unittest
+from types import SimpleNamespace
+
+from app.agents.base_agent import LLMAgent
+from app.utils.llm_resilience import CallPolicy
+from app.utils.prompt_budget import count_message_tokens
+from app.utils.provider_scheduler import ProviderScheduler
+
+
+class RecordingScheduler(ProviderScheduler):
+    def __init__(self):
+        super().__init__(tokens_per_minute=600000)
+        self.acquired = []
+        self.settled = []
+
+    async def acquire(self, agent, tokens):
+        self.acquired.append((agent, tokens))
+        return await super().acquire(agent, tokens)
+
+    def settle(self, estimated, actual):
+        self.settled.append((estimated, actual))
+        super().settle(estimated, actual)
+
+
+class FakeCompletions:
+    async def create(self, **request):
+        return SimpleNamespace(
+            choices=[SimpleNamespace(message=SimpleNamespace(content='{"a": 1}'))],
+            usage=SimpleNamespace(prompt_tokens=30, completion_tokens=20),
+        )
+
+
+class SchedulerChargeTest(unittest.IsolatedAsyncioTestCase):
+    async def test_charges_prompt_and_output_budget(self):
+        scheduler = RecordingScheduler()
+        agent = LLMAgent(
+            SimpleNamespace(chat=SimpleNamespace(completions=FakeCompletions())),
+            "model",
+            call_policy=CallPolicy(scheduler=scheduler),
+        )
+        messages = [{"role": "user", "content": "x" * 350}]
+
+        await agent.complete_json(messages, max_output_tokens=512)
+
+        estimate = count_message_tokens(messages) + 512
+        self.assertEqual(scheduler.acquired, [("agent", estimate)])
+        self.assertEqual(scheduler.settled, [(estimate, 50)])
+
+
+if __name__ == "__main__":
+    unittest.main()
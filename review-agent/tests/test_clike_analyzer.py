@@ -0,0 +1,110 @@
+import unittest
+
+from app.analysis.clike_analyzer import analyze_clike, tokenize
+
+
+class TokenizeTest(unittest.TestCase):
+    def test_quote_on_preprocessor_line_is_not_a_literal(self):
+        code = "#error don't build this\n#warning it's old\nint main() { return 0; }\n"
+        tokens, unterminated = tokenize(code)
+        self.assertIsNone(unterminated)
+        self.assertEqual(tokens[0].text, "int")
+        self.assertEqual(tokens[0].line, 3)
+        self.assertEqual(
+            [f for f in analyze_clike(code) if f["kind"] == "syntax_error"], []
+        )
+
+    def test_unterminated_string_in_code_is_reported(self):
+        _, unterminated = tokenize('int main() {\n  puts("hi);\n}\n')
+        self.assertIsNotNone(unterminated)
+        self.assertEqual(unterminated.line, 2)
+
+    def test_unterminated_comment_on_preprocessor_line_is_reported(self):
+        _, unterminated = tokenize("#include <stdio.h> /* never closed\nint x;\n")
+        self.assertIsNotNone(unterminated)
+
+    def assert_literals(self, code, *literals):
+        tokens, unterminated = tokenize(code)
+        self.assertIsNone(unterminated)
+        self.assertEqual(
+            [t.text for t in tokens if t.kind == "literal"], list(literals)
+        )
+        self.assertEqual(
+            [f for f in analyze_clike(code) if f["kind"] == "syntax_error"], []
+        )
+        return tokens
+
+    def test_raw_strings(self):
+        self.assert_literals('auto s = R"(a " b)";', 'R"(a " b)"')
+        self.assert_literals('auto s = u8R"xy(a )" b)xy";', 'u8R"xy(a )" b)xy"')
+        tokens = self.assert_literals('auto s = R"(\n\')\n)";\nint x;', 'R"(\n\')\n)"')
+        self.assertEqual(tokens[-1].line, 4)
+
+    def test_digit_separators_and_numbers(self):
+        tokens = self.assert_literals("long n = 1'000'000 + 0x1p+3 + 1e-5 + .5;")
+        numbers = [t.text for t in tokens if t.kind == "number"]
+        self.assertEqual(numbers, ["1'000'000", "0x1p+3", "1e-5", ".5"])
+
+    def test_prefixed_and_escaped_literals(self):
+        self.assert_literals(
+            "auto w = L\"a \\\" b\"; char c = u8'a'; char q = '\\'';",
+            'L"a \\" b"',
+            "u8'a'",
+            "'\\''",
+        )
+
+    def test_java_text_block(self):
+        tokens = self.assert_literals(
+            'String t = """\n  it\'s "quoted"\n  """;\nint z;',
+            '"""\n  it\'s "quoted"\n  """',
+        )
+        self.assertEqual(tokens[-2].line, 4)
+
+
+def unused_names(code: str):
+    return [
+        f["message"].split("'")[1]
+        for f in analyze_clike(code)
+        if f["kind"] == "unused_variable"
+    ]
+
+
+class UnusedVariableTest(unittest.TestCase):
+    def test_unused_local_is_reported(self):
+        code = "int main() {\n  int unused = 3;\n  return 0;\n}\n"
+        self.assertEqual(unused_names(code), ["unused"])
+
+    def test_struct_members_are_not_reported(self):
+        code = "struct P { int x; int y; };\nint main() { return 0; }\n"
+        self.assertEqual(unused_names(code), [])
+
+    def test_struct_inside_a_function_is_not_reported(self):
+        code = "int main() {\n  struct P { int x; };\n  return 0;\n}\n"
+        self.assertEqual(unused_names(code), [])
+
+    def test_java_fields_and_parameters_are_not_reported(self):
+        code = (
+            "public class Main {\n"
+            "  private int size;\n"
+            "  public static void main(String args[]) throws Exception {\n"
+            "    System.out.println(1);\n"
+            "  }\n"
+            "}\n"
+        )
+        self.assertEqual(unused_names(code), [])
+
+    def test_globals_are_not_reported(self):
+        self.assertEqual(unused_names("int counter;\nint main() { return 0; }\n"), [])
+
+    def test_for_loop_variable_and_updates_count_as_uses(self):
+        code = (
+            "int main() {\n"
+            "  int count = 0;\n"
+            "  for (int i = 0; i < 3; i++) { count++; }\n"
+            "}\n"
+        )
+        self.assertEqual(unused_names(code), [])
+
+
+if __name__ == "__main__":
+    unittest.main()
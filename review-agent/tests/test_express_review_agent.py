@@ -0,0 +1,60 @@
+import json
+import unittest
+from types import SimpleNamespace
+
+from app.agents.express_review_agent import ExpressReviewAgent
+
+CODE = "def f(x):\n    return x * 2\n"
+
+
+class FakeCompletions:
+    def __init__(self):
+        self.prompts = []
+
+    async def create(self, **request):
+        self.prompts.append(request["messages"][-1]["content"])
+        content = json.dumps(
+            {"logic_issues": [], "improvement_notes": [], "overview": "Looks close."}
+        )
+        return SimpleNamespace(
+            choices=[SimpleNamespace(message=SimpleNamespace(content=content))],
+            usage=None,
+        )
+
+
+def failing_tests(count: int):
+    # Distinct shapes, so every test is its own cluster.
+    return [
+        {"id": i, "input": "w" * i, "expected": "a" * i, "actual": "b" * (2 * i + 1)}
+        for i in range(1, count + 1)
+    ]
+
+
+async def review(cases, token_budget: int):
+    completions = FakeCompletions()
+    agent = ExpressReviewAgent(
+        SimpleNamespace(chat=SimpleNamespace(completions=completions)),
+        "model",
+        token_budget=token_budget,
+    )
+    state = {"code": CODE, "sandbox_results": cases, "static_issues": []}
+    return await agent.analyze(state), completions.prompts[0]
+
+
+class ExpressTestPackingTest(unittest.IsolatedAsyncioTestCase):
+    async def test_all_tests_sent_when_they_fit(self):
+        update, prompt = await review(failing_tests(12), token_budget=4000)
+        # More than the old fixed cap of 10 clusters.
+        self.assertIn("ID: 12 |", prompt)
+        self.assertNotIn("skipped_stages", update)
+        self.assertEqual(update["overview"], "Looks close.")
+
+    async def test_tests_beyond_the_budget_are_flagged(self):
+        update, prompt = await review(failing_tests(40), token_budget=1200)
+        self.assertIn("ID: 1 |", prompt)
+        self.assertNotIn("ID: 40 |", prompt)
+        self.assertEqual(update["skipped_stages"], ["express_tests"])
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,61 @@
+import unittest
+
+from app.utils.failure_clustering import (
+    cluster_failing_tests,
+    failure_signature,
+    value_shape,
+)
+
+
+def case(id, input, expected, actual):
+    return {"id": id, "input": input, "expected": expected, "actual": actual}
+
+
+def cluster_ids(cases):
+    return [[c["id"] for c in cluster] for cluster in cluster_failing_tests(cases)]
+
+
+class ValueShapeTest(unittest.TestCase):
+    def test_repeated_lines_collapse(self):
+        self.assertEqual(value_shape("3\n1 2 3"), value_shape("4\n5 6 7 8"))
+        self.assertEqual(value_shape("1\n2\n3"), ("num+",))
+        self.assertNotEqual(value_shape(""), value_shape("0"))
+
+
+class ClusteringTest(unittest.TestCase):
+    def test_crashes_on_different_input_shapes_are_separate_bugs(self):
+        # Division by zero on a bare count vs. an index error on a list.
+        cases = [
+            case(0, "0", "0", "ZeroDivisionError: division by zero"),
+            case(1, "3\n1 2 3", "6", "IndexError: list index out of range"),
+            case(2, "4\n5 6 7 8", "26", "IndexError: list index out of range"),
+        ]
+        self.assertNotEqual(failure_signature(cases[0]), failure_signature(cases[1]))
+        self.assertEqual(cluster_ids(cases), [[0], [1, 2]])
+
+    def test_empty_output_on_no_input_vs_text_input(self):
+        cases = [
+            case(0, "", "Nothing to do", ""),
+            case(1, "hello world", "HELLO WORLD", ""),
+        ]
+        self.assertEqual(cluster_ids(cases), [[0], [1]])
+
+    def test_truncation_missing_different_kinds_of_output(self):
+        # One program stops before the summary line, the other before a number.
+        cases = [
+            case(0, "1 2 3", "1 2 3\nDone", "1 2 3"),
+            case(1, "1 2 3", "Sum: 6", "Sum:"),
+        ]
+        self.assertEqual(cluster_ids(cases), [[0], [1]])
+
+    def test_equivalent_failures_still_cluster(self):
+        cases = [
+            case(0, "2 3", "5", "6"),
+            case(1, "10 20", "30", "20"),
+            case(2, "7 8", "15", "16"),
+        ]
+        self.assertEqual(cluster_ids(cases), [[0, 2], [1]])
+
+
+if __name__ == "__main__":
+    unittest.main()
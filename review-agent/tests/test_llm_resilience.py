@@ -0,0 +1,183 @@
+import asyncio
+import time
+import unittest
+
+from app.utils.deadline import DeadlineExceeded, current_deadline
+from app.utils.llm_resilience import (
+    CallPolicy,
+    CircuitBreaker,
+    CircuitOpenError,
+    is_retryable,
+)
+
+
+def failing(exc: BaseException):
+    async def call():
+        raise exc
+
+    return call
+
+
+async def ok():
+    return "ok"
+
+
+class CircuitBreakerTest(unittest.IsolatedAsyncioTestCase):
+    def setUp(self):
+        self.breaker = CircuitBreaker(failure_threshold=2, reset_timeout=0.05)
+        self.policy = CallPolicy(
+            max_attempts=1, base_delay=0, circuit_breaker=self.breaker
+        )
+
+    async def open_circuit(self):
+        for _ in range(2):
+            with self.assertRaises(ConnectionError):
+                await self.policy.call(failing(ConnectionError("down")))
+        self.assertEqual(self.breaker.state, "open")
+
+    async def test_opens_then_fails_fast(self):
+        await self.open_circuit()
+        with self.assertRaises(CircuitOpenError):
+            await self.policy.call(ok)
+
+    async def test_failed_trial_reopens_then_recovers(self):
+        await self.open_circuit()
+        time.sleep(0.06)
+        self.assertEqual(self.breaker.state, "half_open")
+
+        # A non-retryable error during the trial still settles it.
+        with self.assertRaises(ValueError):
+            await self.policy.call(failing(ValueError("bad request")))
+        self.assertEqual(self.breaker.state, "open")
+        self.assertFalse(self.breaker._trial_in_flight)
+
+        time.sleep(0.06)
+        self.assertEqual(await self.policy.call(ok), "ok")
+        self.assertEqual(self.breaker.state, "closed")
+
+    async def test_cancelled_trial_is_released(self):
+        await self.open_circuit()
+        time.sleep(0.06)
+
+        async def hang():
+            await asyncio.sleep(10)
+
+        task = asyncio.create_task(self.policy.call(hang))
+        await asyncio.sleep(0.01)
+        task.cancel()
+        with self.assertRaises(asyncio.CancelledError):
+            await task
+        self.assertFalse(self.breaker._trial_in_flight)
+
+        time.sleep(0.06)
+        self.assertEqual(await self.policy.call(ok), "ok")
+        self.assertEqual(self.breaker.state, "closed")
+
+    async def test_non_retryable_error_does_not_count_when_closed(self):
+        with self.assertRaises(ValueError):
+            await self.policy.call(failing(ValueError("bad request")))
+        self.assertEqual(self.breaker.failures, 0)
+
+
+class HedgingTest(unittest.IsolatedAsyncioTestCase):
+    def setUp(self):
+        self.policy = CallPolicy(max_attempts=1, hedge=True, hedge_min_delay=0.01)
+        self.started = []
+
+    def slow_then_fast(self):
+        async def call():
+            self.started.append(time.monotonic())
+            try:
+                await asyncio.sleep(1 if len(self.started) == 1 else 0)
+            except asyncio.CancelledError:
+                self.started.append("cancelled")
+                raise
+            return len(self.started)
+
+        return call
+
+    async def test_no_hedge_until_latency_is_known(self):
+        self.assertIsNone(self.policy.hedge_delay())
+        self.assertEqual(await self.policy.call(ok), "ok")
+
+    async def test_slow_call_is_hedged_and_loser_cancelled(self):
+        for _ in range(20):
+            self.policy.latency.record(0.01)
+        self.assertEqual(self.policy.hedge_delay(), 0.01)
+
+        started = time.monotonic()
+        self.assertEqual(await self.policy.call(self.slow_then_fast()), 2)
+        self.assertLess(time.monotonic() - started, 0.5)
+        await asyncio.sleep(0)
+        self.assertEqual(self.started[-1], "cancelled")
+
+    async def test_hedge_failure_falls_back_to_primary(self):
+        for _ in range(20):
+            self.policy.latency.record(0.01)
+        calls = 0
+
+        async def call():
+            nonlocal calls
+            calls += 1
+            if calls == 1:
+                await asyncio.sleep(0.05)
+                return "primary"
+            raise ConnectionError("hedge failed")
+
+        self.assertEqual(await self.policy.call(call), "primary")
+        self.assertEqual(calls, 2)
+
+
+class DeadlineTest(unittest.IsolatedAsyncioTestCase):
+    def set_deadline(self, seconds: float):
+        token = current_deadline.set(time.time() + seconds)
+        self.addCleanup(current_deadline.reset, token)
+
+    async def test_no_call_once_the_deadline_has_passed(self):
+        self.set_deadline(-1)
+        called = False
+
+        async def call():
+            nonlocal called
+            called = True
+
+        with self.assertRaises(DeadlineExceeded):
+            await CallPolicy().call(call, label="logic")
+        self.assertFalse(called)
+
+    async def test_deadline_is_never_retried(self):
+        self.assertTrue(is_retryable(asyncio.TimeoutError()))
+        self.assertFalse(is_retryable(DeadlineExceeded()))
+
+        breaker = CircuitBreaker(failure_threshold=1)
+        policy = CallPolicy(max_attempts=3, base_delay=0, circuit_breaker=breaker)
+        calls = 0
+
+        async def nested_call_out_of_time():
+            nonlocal calls
+            calls += 1
+            raise DeadlineExceeded("inner call not started")
+
+        with self.assertRaises(DeadlineExceeded):
+            await policy.call(nested_call_out_of_time)
+        self.assertEqual(calls, 1)
+        self.assertEqual(breaker.state, "closed")
+
+    async def test_attempt_timeout_is_capped_by_the_deadline(self):
+        breaker = CircuitBreaker(failure_threshold=1)
+        policy = CallPolicy(timeout=10, max_attempts=3, circuit_breaker=breaker)
+        self.set_deadline(0.05)
+
+        async def hang():
+            await asyncio.sleep(10)
+
+        started = time.monotonic()
+        with self.assertRaises(TimeoutError):
+            await policy.call(hang)
+        self.assertLess(time.monotonic() - started, 0.5)
+        # Cut short by the deadline, not a sign of a slow provider.
+        self.assertEqual(breaker.state, "closed")
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,88 @@
+import unittest
+from types import SimpleNamespace
+
+from app.agents.base_agent import LLMAgent
+from app.utils.llm_resilience import CallPolicy
+from app.utils.model_router import ModelRouter
+
+
+def degraded_router(**kwargs):
+    router = ModelRouter("big", "small", min_samples=4, probe_every=3, **kwargs)
+    for _ in range(4):
+        router.record("big", 0.1, ok=False)
+    return router
+
+
+class ModelRouterTest(unittest.TestCase):
+    def test_single_model(self):
+        router = ModelRouter("big")
+        router.record("big", 1.0, ok=False)
+        self.assertEqual(router.choose(), "big")
+        self.assertIsNone(router.failover("big"))
+
+    def test_needs_min_samples_before_degrading(self):
+        router = ModelRouter("big", "small", min_samples=4)
+        for _ in range(3):
+            router.record("big", 0.1, ok=False)
+        self.assertEqual(router.choose(), "big")
+
+    def test_errors_route_to_fallback_with_periodic_probes(self):
+        router = degraded_router()
+        self.assertTrue(router.primary_degraded())
+        self.assertEqual(
+            [router.choose() for _ in range(6)],
+            ["small", "small", "big", "small", "small", "big"],
+        )
+
+    def test_slow_primary_is_degraded(self):
+        router = ModelRouter("big", "small", latency_slo=1.0, min_samples=4)
+        for _ in range(4):
+            router.record("big", 2.0, ok=True)
+        self.assertEqual(router.choose(), "small")
+
+    def test_recovers_after_successful_probes(self):
+        router = degraded_router()
+        for _ in range(5):
+            router.record("big", 0.1, ok=True)
+        self.assertFalse(router.primary_degraded())
+        self.assertEqual(router.choose(), "big")
+
+    def test_failover_only_from_primary(self):
+        router = ModelRouter("big", "small")
+        self.assertEqual(router.failover("big"), "small")
+        self.assertIsNone(router.failover("small"))
+
+
+class FlakyCompletions:
+    def __init__(self, failing_model: str):
+        self.failing_model = failing_model
+        self.models = []
+
+    async def create(self, **request):
+        self.models.append(request["model"])
+        if request["model"] == self.failing_model:
+            raise ConnectionError("provider down")
+        return SimpleNamespace(
+            choices=[SimpleNamespace(message=SimpleNamespace(content="ok"))],
+            usage=None,
+        )
+
+
+class AgentFailoverTest(unittest.IsolatedAsyncioTestCase):
+    async def test_failed_primary_call_is_retried_on_the_fallback(self):
+        completions = FlakyCompletions("big")
+        agent = LLMAgent(
+            SimpleNamespace(chat=SimpleNamespace(completions=completions)),
+            "big",
+            call_policy=CallPolicy(max_attempts=1),
+            model_router=ModelRouter("big", "small"),
+        )
+        self.assertEqual(
+            await agent.complete([{"role": "user", "content": "hi"}]), "ok"
+        )
+        self.assertEqual(completions.models, ["big", "small"])
+        self.assertEqual(agent.model_router.stats["big"].error_rate(), 1.0)
+
+
+if __name__ == "__main__":
+    unittest.main()
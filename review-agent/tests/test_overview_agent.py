@@ -0,0 +1,40 @@
+import unittest
+
+from app.agents.overview_agent import OverviewAgent, build_review_items
+from app.agents.pre_analysis_agent import PreAnalysisAgent
+from app.models.review_state import create_initial_state
+
+
+async def overview_for(code: str, language: str):
+    state = create_initial_state(code, [], "", [], language=language)
+    state.update(await PreAnalysisAgent().analyze(state))
+    # No model is reachable: these paths must not call one.
+    state.update(await OverviewAgent(None, "model").analyze(state))
+    return state
+
+
+class ReviewItemsTest(unittest.IsolatedAsyncioTestCase):
+    async def test_parse_error_is_reported_as_is(self):
+        state = await overview_for("def f(:\n    pass\n", "python")
+        self.assertEqual([item["type"] for item in state["review_items"]], ["Error"])
+        self.assertIn("syntax error", state["overview"])
+
+    async def test_static_hints_are_not_shown_verbatim(self):
+        code = "def f():\n    unused = 1\n    return 2\n"
+        state = create_initial_state(code, [], "", [], language="python")
+        state.update(await PreAnalysisAgent().analyze(state))
+        self.assertEqual(state["static_issues"][0]["kind"], "unused_variable")
+        state["deadline"] = 0  # template overview, no model call
+        update = await OverviewAgent(None, "model").analyze(state)
+        self.assertEqual(update["review_items"], [])
+
+    def test_agent_findings_become_items(self):
+        notes = [{"issue": "Name it better", "code_snippet": "x", "fix_suggestion": ""}]
+        items = build_review_items({}, notes)
+        self.assertEqual(
+            [(i["type"], i["issue"]) for i in items], [("Warning", "Name it better")]
+        )
+
+
+if __name__ == "__main__":
+    unittest.main()
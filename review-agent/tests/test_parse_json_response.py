@@ -0,0 +1,59 @@
+import unittest
+
+from app.utils.parse_json_response import IncrementalJSONParser, parse_json_response
+
+COMPLETE = (
+    '{"items": [{"line": 1, "note": "a \\"quoted\\" }"}, {"line": 2}], "ok": true}'
+)
+
+
+def parse_chunks(*chunks):
+    parser = IncrementalJSONParser()
+    for chunk in chunks:
+        parser.feed(chunk)
+    return parser
+
+
+class IncrementalJSONParserTest(unittest.TestCase):
+    def test_plain_object(self):
+        parser = parse_chunks(COMPLETE)
+        self.assertFalse(parser.truncated)
+        self.assertEqual(parser.result()["items"][1], {"line": 2})
+
+    def test_chunked_feed_matches_whole_feed(self):
+        whole = parse_chunks(COMPLETE).result()
+        for size in (1, 2, 7):
+            chunks = [COMPLETE[i : i + size] for i in range(0, len(COMPLETE), size)]
+            self.assertEqual(parse_chunks(*chunks).result(), whole)
+
+    def test_ignores_preamble_and_fences(self):
+        parser = parse_chunks("Here you go:\n```json\n", COMPLETE, "\n```\nDone.")
+        self.assertFalse(parser.truncated)
+        self.assertTrue(parser.result()["ok"])
+
+    def test_drops_trailing_commas(self):
+        self.assertEqual(
+            parse_chunks('{"a": [1, 2, ], "b": 3, }').result(), {"a": [1, 2], "b": 3}
+        )
+
+    def test_truncated_array_keeps_complete_elements(self):
+        parser = parse_chunks('{"items": [{"line": 1}, {"line": 2, "note": "cut')
+        self.assertTrue(parser.truncated)
+        self.assertEqual(parser.result(), {"items": [{"line": 1}]})
+
+    def test_truncated_inside_first_value(self):
+        self.assertEqual(parse_chunks('{"a": 1, "b": "unfini').result(), {"a": 1})
+
+    def test_mismatched_closer_ends_the_object(self):
+        parser = parse_chunks('{"items": [{"line": 1}, {"line": 2}}, "more": 1}')
+        self.assertTrue(parser.complete)
+        self.assertTrue(parser.truncated)
+        self.assertEqual(parser.result(), {"items": [{"line": 1}, {"line": 2}]})
+
+    def test_no_object(self):
+        self.assertIsNone(parse_chunks("no json here").result())
+        self.assertIsNone(parse_json_response("[1, 2]", agent="test"))
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,41 @@
+import unittest
+
+from app.agents.pre_analysis_agent import PreAnalysisAgent
+from app.models.review_state import create_initial_state
+from app.services.review_code_service import route_after_pre_analysis
+
+
+async def pre_analyze(code: str, language: str):
+    state = create_initial_state(code, [], "", [], language=language)
+    state.update(await PreAnalysisAgent().analyze(state))
+    return state
+
+
+class PreAnalysisRoutingTest(unittest.IsolatedAsyncioTestCase):
+    async def test_python_syntax_error_skips_the_agents(self):
+        state = await pre_analyze("def f(:\n    pass\n", "Python")
+        self.assertTrue(state["has_errors"])
+        self.assertEqual(route_after_pre_analysis(state), "overview")
+
+    async def test_valid_python_is_reviewed(self):
+        state = await pre_analyze("def f():\n    return 1\n", "python3")
+        self.assertFalse(state["has_errors"])
+        self.assertEqual(route_after_pre_analysis(state), ["logic", "improve"])
+
+    async def test_clike_syntax_findings_are_only_hints(self):
+        # A tokenizer finding (real or not) must not stop the model review.
+        state = await pre_analyze('int main() {\n  puts("hi);\n}\n', "C++")
+        self.assertEqual(state["static_issues"][0]["kind"], "syntax_error")
+        self.assertFalse(state["has_errors"])
+        self.assertEqual(route_after_pre_analysis(state), ["logic", "improve"])
+
+    async def test_valid_cpp_literals_are_not_syntax_errors(self):
+        code = 'int main() {\n  auto s = R"(a " b)";\n  long n = 1\'000;\n}\n'
+        state = await pre_analyze(code, "cpp")
+        self.assertEqual(
+            [f for f in state["static_issues"] if f["kind"] == "syntax_error"], []
+        )
+
+
+if __name__ == "__main__":
+    unittest.main()
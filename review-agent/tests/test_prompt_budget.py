@@ -0,0 +1,55 @@
+import unittest
+
+from app.utils.prompt_budget import (
+    CHARS_PER_TOKEN,
+    count_tokens,
+    get_token_budget,
+    pack_batches,
+    truncate_text,
+)
+
+
+class PackBatchesTest(unittest.TestCase):
+    def test_packs_in_order_within_budget(self):
+        batches, fill = pack_batches([4, 3, 3, 5, 1], cost=lambda n: n, budget=7)
+        self.assertEqual(batches, [[4, 3], [3], [5, 1]])
+        self.assertAlmostEqual(fill, 16 / 21)
+
+    def test_oversized_item_gets_its_own_batch(self):
+        batches, _ = pack_batches([2, 20, 2], cost=lambda n: n, budget=5)
+        self.assertEqual(batches, [[2], [20], [2]])
+
+    def test_max_items(self):
+        batches, _ = pack_batches([1] * 5, cost=lambda n: n, budget=100, max_items=2)
+        self.assertEqual([len(b) for b in batches], [2, 2, 1])
+
+    def test_empty(self):
+        self.assertEqual(pack_batches([], cost=len, budget=10), ([], 0.0))
+
+
+class TruncateTextTest(unittest.TestCase):
+    def test_short_text_is_unchanged(self):
+        self.assertEqual(truncate_text("hello", 10), "hello")
+
+    def test_keeps_head_and_tail_and_marks_the_cut(self):
+        text = "".join(str(i % 10) for i in range(1000))
+        cut = truncate_text(text, 50)
+        self.assertLessEqual(len(cut), 50 * CHARS_PER_TOKEN)
+        self.assertTrue(cut.startswith(text[:50]))
+        self.assertTrue(cut.endswith(text[-20:]))
+        self.assertIn("[truncated", cut)
+        self.assertEqual(truncate_text(text, 50), cut)
+
+    def test_budget_smaller_than_the_marker(self):
+        self.assertIn("[truncated", truncate_text("x" * 100, 1))
+
+
+class TokenCountTest(unittest.TestCase):
+    def test_estimates(self):
+        self.assertEqual(count_tokens(""), 0)
+        self.assertEqual(count_tokens("x" * 7), 2)
+        self.assertGreater(get_token_budget("unknown-model"), 0)
+
+
+if __name__ == "__main__":
+    unittest.main()
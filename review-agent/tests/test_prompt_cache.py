@@ -0,0 +1,86 @@
+import asyncio
+import unittest
+
+from app.utils.prompt_cache import PromptCache
+
+REQUEST = {"model": "m", "messages": [{"role": "user", "content": "hi"}]}
+
+
+class PromptCacheTest(unittest.IsolatedAsyncioTestCase):
+    async def test_concurrent_identical_requests_share_one_call(self):
+        cache = PromptCache()
+        calls = 0
+
+        async def call():
+            nonlocal calls
+            calls += 1
+            await asyncio.sleep(0.01)
+            return "answer"
+
+        results = await asyncio.gather(
+            *(cache.get_or_call(dict(REQUEST), call) for _ in range(5))
+        )
+        self.assertEqual(results, ["answer"] * 5)
+        self.assertEqual(calls, 1)
+        self.assertEqual(await cache.get_or_call(REQUEST, call), "answer")
+        self.assertEqual(calls, 1)
+        self.assertEqual(cache.stats()["misses"], 1)
+
+    async def test_failures_reach_waiters_and_are_not_memoized(self):
+        cache = PromptCache()
+
+        async def fail():
+            await asyncio.sleep(0.01)
+            raise ConnectionError("down")
+
+        results = await asyncio.gather(
+            cache.get_or_call(REQUEST, fail),
+            cache.get_or_call(REQUEST, fail),
+            return_exceptions=True,
+        )
+        self.assertTrue(all(isinstance(r, ConnectionError) for r in results))
+
+        async def ok():
+            return "recovered"
+
+        self.assertEqual(await cache.get_or_call(REQUEST, ok), "recovered")
+
+    async def test_waiter_survives_cancelled_leader(self):
+        cache = PromptCache()
+        calls = 0
+
+        async def call():
+            nonlocal calls
+            calls += 1
+            await asyncio.sleep(0.05)
+            return "answer"
+
+        leader = asyncio.create_task(cache.get_or_call(REQUEST, call))
+        await asyncio.sleep(0)
+        waiter = asyncio.create_task(cache.get_or_call(REQUEST, call))
+        await asyncio.sleep(0.01)
+        leader.cancel()  # e.g. a losing hedge or a disconnected client
+
+        self.assertEqual(await waiter, "answer")
+        self.assertEqual(calls, 2)
+
+    async def test_lru_eviction(self):
+        cache = PromptCache(max_entries=2)
+        for key in ("a", "b", "c"):
+            cache.put(key, key)
+        self.assertIsNone(cache.get("a"))
+        self.assertEqual(cache.get("c"), "c")
+
+    async def test_discard_forces_a_new_call(self):
+        cache = PromptCache()
+
+        async def call():
+            return "x"
+
+        await cache.get_or_call(REQUEST, call)
+        cache.discard(REQUEST)
+        self.assertEqual(cache.stats()["entries"], 0)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,74 @@
+import asyncio
+import time
+import unittest
+
+from app.utils.deadline import DeadlineExceeded, current_deadline
+from app.utils.provider_scheduler import ProviderScheduler, current_review
+
+
+class ProviderSchedulerTest(unittest.IsolatedAsyncioTestCase):
+    def setUp(self):
+        # One request every 10ms, no burst.
+        self.scheduler = ProviderScheduler(requests_per_minute=6000, burst_seconds=0.01)
+        self.order = []
+
+    async def call(self, review: str, agent: str = "security", name: str = ""):
+        current_review.set(review)
+        await self.scheduler.acquire(agent, 0)
+        self.order.append(name or review)
+
+    async def test_round_robin_across_reviews(self):
+        tasks = [asyncio.create_task(self.call("a")) for _ in range(4)]
+        await asyncio.sleep(0)
+        tasks += [asyncio.create_task(self.call("b")) for _ in range(2)]
+        await asyncio.gather(*tasks)
+        # "a" got the free slot; after that the reviews take turns.
+        self.assertEqual(self.order, ["a", "a", "b", "a", "b", "a"])
+
+    async def test_critical_agents_go_first(self):
+        tasks = [asyncio.create_task(self.call("a", "security")) for _ in range(3)]
+        await asyncio.sleep(0)
+        tasks.append(asyncio.create_task(self.call("b", "logic", name="critical")))
+        await asyncio.sleep(0)
+        self.assertEqual(self.scheduler.queued(), {"critical": 1, "optional": 2})
+        await asyncio.gather(*tasks)
+        self.assertEqual(self.order[:2], ["a", "critical"])
+
+    async def test_gives_up_its_place_at_the_deadline(self):
+        scheduler = ProviderScheduler(requests_per_minute=1)
+        await scheduler.acquire("logic", 0)  # spends the only request this minute
+        token = current_deadline.set(time.time() + 0.02)
+        try:
+            with self.assertRaises(DeadlineExceeded):
+                await scheduler.acquire("logic", 0)
+        finally:
+            current_deadline.reset(token)
+        self.assertEqual(scheduler.queued(), {"critical": 0, "optional": 0})
+
+    async def test_cancelled_waiter_leaves_the_queue(self):
+        scheduler = ProviderScheduler(requests_per_minute=1)
+        await scheduler.acquire("logic", 0)
+        task = asyncio.create_task(scheduler.acquire("logic", 0))
+        await asyncio.sleep(0)
+        task.cancel()
+        with self.assertRaises(asyncio.CancelledError):
+            await task
+        self.assertEqual(scheduler.queued(), {"critical": 0, "optional": 0})
+
+    async def test_settle_refunds_and_charges_token_budget(self):
+        scheduler = ProviderScheduler(tokens_per_minute=6000)  # 100 tokens/s
+        await scheduler.acquire("logic", 100)
+        scheduler.settle(estimated=100, actual=40)
+        self.assertAlmostEqual(scheduler.tokens.level, 60, delta=1)
+        scheduler.settle(estimated=100, actual=300)
+        # Usage beyond the estimate is a debt the next call waits out.
+        self.assertGreater(scheduler.tokens.time_until(1), 1)
+
+    async def test_disabled_scheduler_never_waits(self):
+        scheduler = ProviderScheduler()
+        self.assertFalse(scheduler.enabled)
+        self.assertEqual(await scheduler.acquire("logic", 10**6), 0.0)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,74 @@
+import unittest
+
+from app.analysis.python_analyzer import analyze_python
+
+
+def kinds(code: str, kind: str):
+    return [f for f in analyze_python(code) if f["kind"] == kind]
+
+
+def unused_names(code: str):
+    return [f["message"].split("'")[1] for f in kinds(code, "unused_variable")]
+
+
+class UnusedVariableTest(unittest.TestCase):
+    def test_plain_unused_local_is_reported(self):
+        self.assertEqual(unused_names("def f():\n    x = 1\n    return 2\n"), ["x"])
+
+    def test_tuple_unpacking_is_not_reported(self):
+        self.assertEqual(unused_names("def f():\n    a, b = 1, 2\n    return a\n"), [])
+
+    def test_counter_updated_in_place_is_in_use(self):
+        code = "def f(xs):\n    count = 0\n    for x in xs:\n        count += 1\n"
+        self.assertEqual(unused_names(code), [])
+
+    def test_loop_with_and_except_names_are_not_reported(self):
+        code = (
+            "def f(path):\n"
+            "    for i in range(3):\n"
+            "        pass\n"
+            "    with open(path) as fh:\n"
+            "        pass\n"
+            "    try:\n"
+            "        pass\n"
+            "    except ValueError as e:\n"
+            "        pass\n"
+        )
+        self.assertEqual(unused_names(code), [])
+
+    def test_module_level_and_nested_use(self):
+        code = (
+            "TOTAL = 0\n"
+            "def outer():\n"
+            "    seen = set()\n"
+            "    def inner(x):\n"
+            "        return x in seen\n"
+            "    return inner\n"
+        )
+        self.assertEqual(unused_names(code), [])
+
+    def test_global_assignment_is_not_reported(self):
+        code = "def f():\n    global total\n    total = 1\n"
+        self.assertEqual(unused_names(code), [])
+
+
+class PythonFindingsTest(unittest.TestCase):
+    def test_syntax_error_is_the_only_finding(self):
+        findings = analyze_python("def f(:\n    x = 1\n")
+        self.assertEqual([f["kind"] for f in findings], ["syntax_error"])
+        self.assertEqual(findings[0]["location"]["start_line"], 1)
+
+    def test_off_by_one_bounds(self):
+        code = (
+            "def f(xs):\n"
+            "    for i in range(len(xs) + 1):\n"
+            "        print(xs[i])\n"
+            "    return xs[len(xs)]\n"
+        )
+        self.assertEqual(
+            [f["location"]["start_line"] for f in kinds(code, "off_by_one")], [2, 4]
+        )
+
+
+if __name__ == "__main__":
+    unittest.main()
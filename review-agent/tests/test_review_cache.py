@@ -0,0 +1,88 @@
+import os
+import tempfile
+import time
+import unittest
+
+from app.models.review_state import create_initial_state
+from app.services.review_cache import ReviewCache
+
+CASES = [{"id": 1, "input": "2", "expected": "4", "actual": "5"}]
+
+
+def initial_state(**overrides):
+    state = create_initial_state("print(1)", CASES, "Double it", ["loops", "io"])
+    state.update(overrides)
+    return state
+
+
+def finished_state():
+    state = initial_state()
+    state["logic_issues"] = {1: {"issue": "off by one", "evidence": 1}}
+    state["overview"] = "One error."
+    return state
+
+
+class MakeKeyTest(unittest.TestCase):
+    def test_key_ignores_order_of_concepts_and_case_ids(self):
+        other = initial_state(
+            expected_concepts=["io", "loops"],
+            sandbox_results=[dict(CASES[0], id=7)],
+        )
+        self.assertEqual(
+            ReviewCache.make_key(initial_state()), ReviewCache.make_key(other)
+        )
+
+    def test_key_changes_with_anything_that_changes_the_review(self):
+        key = ReviewCache.make_key(initial_state())
+        for change in (
+            {"code": "print(2)"},
+            {"language": "python"},
+            {"review_mode": "express"},
+            {"assignment_requirements": "Triple it"},
+            {"sandbox_results": [dict(CASES[0], actual="6")]},
+        ):
+            with self.subTest(change=change):
+                self.assertNotEqual(ReviewCache.make_key(initial_state(**change)), key)
+
+
+class ReviewCacheTest(unittest.IsolatedAsyncioTestCase):
+    async def test_returns_copies(self):
+        cache = ReviewCache()
+        await cache.put("k", finished_state())
+        hit = await cache.get("k")
+        hit["overview"] = "changed"
+        self.assertEqual((await cache.get("k"))["overview"], "One error.")
+        self.assertIsNone(await cache.get("other"))
+        self.assertEqual((cache.hits, cache.misses), (2, 1))
+
+    async def test_entries_expire(self):
+        cache = ReviewCache(ttl_seconds=0.05)
+        await cache.put("k", finished_state())
+        time.sleep(0.06)
+        self.assertIsNone(await cache.get("k"))
+        self.assertEqual(cache.stats()["entries"], 0)
+
+    async def test_lru_eviction(self):
+        cache = ReviewCache(max_entries=2)
+        for key in ("a", "b", "c"):
+            await cache.put(key, finished_state())
+        self.assertIsNone(await cache.get("a"))
+        self.assertIsNotNone(await cache.get("c"))
+
+    async def test_sqlite_tier_survives_a_restart(self):
+        with tempfile.TemporaryDirectory() as tmp:
+            path = os.path.join(tmp, "cache.db")
+            await ReviewCache(db_path=path).put("k", finished_state())
+
+            restarted = ReviewCache(db_path=path)
+            hit = await restarted.get("k")
+            # Issue ids come back as ints, not JSON's string keys.
+            self.assertEqual(list(hit["logic_issues"]), [1])
+            self.assertEqual(restarted.stats()["entries"], 1)
+
+            expired = ReviewCache(db_path=path, ttl_seconds=0)
+            self.assertIsNone(await expired.get("k"))
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,24 @@
+import os
+import unittest
+from unittest import mock
+
+from app.api.review_code_deps import get_concept_fix_agent, get_fix_hint_agent
+
+
+class AgentSettingsTest(unittest.TestCase):
+    def test_concept_fix_concurrency_has_its_own_setting(self):
+        env = {
+            "CONCEPT_FIX_AGENT_MAX_CONCURRENCY": "2",
+            "FIX_HINT_AGENT_MAX_CONCURRENCY": "7",
+        }
+        with mock.patch.dict(os.environ, env):
+            self.assertEqual(get_concept_fix_agent(None).max_concurrency, 2)
+            self.assertEqual(get_fix_hint_agent(None).max_concurrency, 7)
+
+    def test_falls_back_to_the_shared_setting(self):
+        with mock.patch.dict(os.environ, {"LLM_MAX_CONCURRENCY": "3"}):
+            self.assertEqual(get_concept_fix_agent(None).max_concurrency, 3)
+
+
+if __name__ == "__main__":
+    unittest.main()
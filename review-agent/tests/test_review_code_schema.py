@@ -0,0 +1,30 @@
+import json
+import unittest
+from pathlib import Path
+
+from pydantic import ValidationError
+
+from app.api.review_code_schema import MAX_BATCH_REVIEWS, BatchReviewRequest
+
+TEST_REQUEST = Path(__file__).resolve().parent.parent / "test_request.json"
+
+
+class BatchReviewRequestTest(unittest.TestCase):
+    def setUp(self):
+        self.review = json.loads(TEST_REQUEST.read_text())
+
+    def test_size_limits(self):
+        BatchReviewRequest(reviews=[self.review] * MAX_BATCH_REVIEWS)
+        for size in (0, MAX_BATCH_REVIEWS + 1):
+            with self.subTest(size=size), self.assertRaises(ValidationError):
+                BatchReviewRequest(reviews=[self.review] * size)
+
+    def test_reviews_must_share_the_assignment(self):
+        other = json.loads(json.dumps(self.review))
+        other["assignment"]["content"] = "Something else"
+        with self.assertRaises(ValidationError):
+            BatchReviewRequest(reviews=[self.review, other])
+
+
+if __name__ == "__main__":
+    unittest.main()
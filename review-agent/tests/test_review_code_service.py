@@ -0,0 +1,109 @@
+import json
+import unittest
+from pathlib import Path
+
+from app.api.review_code_deps import build_review_service
+from app.api.review_code_route import build_initial_state
+from app.api.review_code_schema import ReviewRequest
+from benchmarks.fake_llm import FakeTogetherClient, LatencyModel
+
+TEST_REQUEST = Path(__file__).resolve().parent.parent / "test_request.json"
+
+
+def submission(variant: int = 0):
+    request = json.loads(TEST_REQUEST.read_text())
+    request["student_submission"]["code"] += f"\n// submission {variant}\n"
+    return build_initial_state(ReviewRequest(**request))
+
+
+class ServiceTestCase(unittest.IsolatedAsyncioTestCase):
+    def setUp(self):
+        self.client = FakeTogetherClient(LatencyModel(median=0), seed=1)
+        self.service = build_review_service(self.client)
+
+    def model_calls(self) -> int:
+        return sum(self.client.chat.completions.calls.values())
+
+
+class StreamReviewTest(ServiceTestCase):
+    async def stream(self, state, use_cache=True):
+        return [
+            (node, update)
+            async for node, update in self.service.stream_review(state, use_cache)
+        ]
+
+    async def test_yields_each_node_then_the_final_state(self):
+        events = await self.stream(submission())
+        nodes = [node for node, _ in events]
+        self.assertEqual(nodes[0], "pre_analysis")
+        self.assertEqual(nodes[-2:], ["overview", "final"])
+        self.assertIn("logic", nodes)
+
+        final = events[-1][1]
+        self.assertTrue(final["overview"])
+        # Partial issue updates are sent as the whole merged issues.
+        for node, update in events[:-1]:
+            for issue in (update.get("logic_issues") or {}).values():
+                self.assertIn("issue", issue, node)
+
+    async def test_cache_hit_yields_only_the_final_state(self):
+        first = await self.stream(submission())
+        calls = self.model_calls()
+
+        events = await self.stream(submission())
+        self.assertEqual([node for node, _ in events], ["final"])
+        self.assertEqual(events[0][1]["overview"], first[-1][1]["overview"])
+        self.assertEqual(self.model_calls(), calls)
+
+        bypassed = await self.stream(submission(), use_cache=False)
+        self.assertGreater(len(bypassed), 1)
+
+
+class ReviewBatchTest(ServiceTestCase):
+    def setUp(self):
+        super().setUp()
+        self.fresh_runs = []
+        review_code = self.service.review_code
+
+        async def counting_review_code(state, use_cache=True):
+            self.fresh_runs.append(use_cache)
+            return await review_code(state, use_cache)
+
+        self.service.review_code = counting_review_code
+
+    async def batch(self, states, use_cache=True):
+        results = {}
+        async for index, result in self.service.review_batch(states, use_cache):
+            results[index] = result
+        return [results[i] for i in range(len(states))]
+
+    async def test_duplicates_are_reviewed_once_and_get_copies(self):
+        results = await self.batch([submission(0), submission(1), submission(0)])
+        self.assertEqual(len(self.fresh_runs), 2)
+        self.assertEqual(results[0]["overview"], results[2]["overview"])
+        self.assertIsNot(results[0], results[2])
+
+    async def test_bypass_cache_is_applied_per_item(self):
+        states = [submission(0), submission(1), submission(2)]
+        await self.batch(states)
+        hits = self.service.review_cache.hits
+
+        await self.batch(states, [True, False, True])
+        self.assertEqual(self.fresh_runs[3:], [True, False, True])
+        self.assertEqual(self.service.review_cache.hits, hits + 2)
+
+    async def test_duplicate_group_bypasses_if_any_member_does(self):
+        await self.batch([submission(0), submission(0)], [True, False])
+        self.assertEqual(self.fresh_runs, [False])
+
+    async def test_failures_are_yielded_per_index(self):
+        async def failing_review_code(state, use_cache=True):
+            raise RuntimeError("graph failed")
+
+        self.service.review_code = failing_review_code
+        results = await self.batch([submission(0), submission(0)])
+        self.assertTrue(all(isinstance(r, RuntimeError) for r in results))
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,101 @@
+import asyncio
+import os
+import tempfile
+import time
+import unittest
+
+from app.services.review_jobs import QueueFullError, ReviewJobQueue
+
+
+async def echo(payload):
+    return {"echo": payload}
+
+
+class CallbackPolicyTest(unittest.TestCase):
+    def test_callbacks_are_off_without_an_allowlist(self):
+        jobs = ReviewJobQueue(echo)
+        with self.assertRaises(ValueError):
+            jobs.check_callback("http://169.254.169.254/latest/meta-data")
+
+    def test_only_allowlisted_http_hosts(self):
+        jobs = ReviewJobQueue(echo, callback_hosts={"backend"})
+        jobs.check_callback("https://backend/hooks/review")
+        for url in ("http://evil.example/x", "ftp://backend/x", "/relative"):
+            with self.assertRaises(ValueError):
+                jobs.check_callback(url)
+
+
+class ReviewJobQueueTest(unittest.IsolatedAsyncioTestCase):
+    async def test_job_runs_and_is_pollable(self):
+        jobs = ReviewJobQueue(echo, workers=1)
+        await jobs.start()
+        try:
+            job = await jobs.submit({"n": 1})
+            self.assertEqual(job["status"], "queued")
+            for _ in range(100):
+                job = await jobs.get(job["job_id"])
+                if job["status"] == "done":
+                    break
+                await asyncio.sleep(0.01)
+            self.assertEqual(job["review"], {"echo": {"n": 1}})
+        finally:
+            await jobs.stop()
+
+    async def test_full_queue_rejects(self):
+        jobs = ReviewJobQueue(echo, max_queue=1)  # not started: nothing drains
+        await jobs.submit({})
+        with self.assertRaises(QueueFullError):
+            await jobs.submit({})
+
+    async def wait_for_status(self, jobs, job_id, status):
+        for _ in range(200):
+            job = await jobs.get(job_id)
+            if job["status"] == status:
+                return job
+            await asyncio.sleep(0.01)
+        self.fail(f"job {job_id} never reached {status}")
+
+    async def test_long_running_job_does_not_block_pruning(self):
+        release = asyncio.Event()
+
+        async def run(payload):
+            if payload.get("stuck"):
+                await release.wait()
+            return payload
+
+        jobs = ReviewJobQueue(run, workers=2, ttl_seconds=0.05)
+        await jobs.start()
+        try:
+            stuck = await jobs.submit({"stuck": True})
+            quick = await jobs.submit({})
+            await self.wait_for_status(jobs, quick["job_id"], "done")
+            time.sleep(0.06)
+            await jobs.submit({})  # prunes
+            self.assertIsNone(await jobs.get(quick["job_id"]))
+            self.assertEqual((await jobs.get(stuck["job_id"]))["status"], "running")
+        finally:
+            release.set()
+            await jobs.stop()
+
+    async def test_sqlite_tier_keeps_jobs_by_finish_time(self):
+        async def slow(payload):
+            await asyncio.sleep(0.1)  # longer than the TTL
+            return payload
+
+        with tempfile.TemporaryDirectory() as tmp:
+            path = os.path.join(tmp, "jobs.db")
+            jobs = ReviewJobQueue(slow, workers=1, ttl_seconds=0.05, db_path=path)
+            await jobs.start()
+            try:
+                job = await jobs.submit({})
+                await self.wait_for_status(jobs, job["job_id"], "done")
+            finally:
+                await jobs.stop()
+
+            # Created more than a TTL ago but only just finished: still there.
+            restarted = ReviewJobQueue(slow, ttl_seconds=0.05, db_path=path)
+            self.assertEqual((await restarted.get(job["job_id"]))["status"], "done")
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,62 @@
+import unittest
+
+from app.utils.snippet_locator import SnippetIndex, resolve_locations
+
+CODE = """def total(xs):
+    s = 0
+    for x in xs:
+        s += x
+    return s
+
+def twice(xs):
+    s = 0
+    for x in xs:
+        s += x
+    return s * 2
+"""
+
+
+class SnippetIndexTest(unittest.TestCase):
+    def setUp(self):
+        self.index = SnippetIndex(CODE)
+
+    def test_exact_span_with_exclusive_end(self):
+        self.assertEqual(
+            self.index.resolve("return s * 2"),
+            {"start_line": 11, "start_col": 5, "end_line": 11, "end_col": 17},
+        )
+
+    def test_whitespace_is_ignored(self):
+        location = self.index.resolve("for x in xs:\ns+=x")
+        self.assertEqual((location["start_line"], location["end_line"]), (3, 4))
+
+    def test_repeated_snippet_resolves_near_the_hint(self):
+        self.assertEqual(self.index.resolve("s += x")["start_line"], 4)
+        self.assertEqual(self.index.resolve("s += x", near_line=9)["start_line"], 10)
+
+    def test_elided_middle_matches_first_and_last_lines(self):
+        location = self.index.resolve("def twice(xs):\n    ...\n    return s * 2")
+        self.assertEqual((location["start_line"], location["end_line"]), (7, 11))
+
+    def test_short_needles_and_misses(self):
+        self.assertEqual(self.index.resolve("s*2")["start_line"], 11)
+        self.assertIsNone(self.index.resolve("while True:"))
+        self.assertIsNone(self.index.resolve("   "))
+
+
+class ResolveLocationsTest(unittest.TestCase):
+    def test_overwrites_found_locations_and_keeps_the_rest(self):
+        model_guess = {"start_line": 99, "end_line": 99}
+        items = [
+            {"code_snippet": "return s * 2", "location": {"start_line": 1}},
+            {"code_snippet": "print(s)", "location": model_guess},
+            {"code_snippet": None},
+        ]
+        self.assertEqual(resolve_locations(CODE, items), 1)
+        self.assertEqual(items[0]["location"]["start_line"], 11)
+        self.assertIs(items[1]["location"], model_guess)
+        self.assertNotIn("location", items[2])
+
+
+if __name__ == "__main__":
+    unittest.main()
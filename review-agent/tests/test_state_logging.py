@@ -0,0 +1,59 @@
+import logging
+import unittest
+
+from app.utils import state_logging
+from app.utils.provider_scheduler import current_review
+from app.utils.state_logging import configure_state_logging, log_state
+
+
+class ListHandler(logging.Handler):
+    def __init__(self):
+        super().__init__()
+        self.messages = []
+
+    def emit(self, record):
+        self.messages.append(record.getMessage())
+
+
+class LogStateTest(unittest.TestCase):
+    def setUp(self):
+        saved = (state_logging.sample_rate, state_logging.max_chars)
+        self.addCleanup(configure_state_logging, *saved)
+        self.logger = logging.getLogger("test_state_logging")
+        self.logger.setLevel(logging.DEBUG)
+        self.logger.propagate = False
+        self.handler = ListHandler()
+        self.logger.addHandler(self.handler)
+        self.addCleanup(self.logger.removeHandler, self.handler)
+
+    def logged_stages(self, review: str) -> int:
+        token = current_review.set(review)
+        try:
+            before = len(self.handler.messages)
+            for stage in ("logic", "improve", "overview"):
+                log_state(self.logger, stage, {"stage": stage})
+            return len(self.handler.messages) - before
+        finally:
+            current_review.reset(token)
+
+    def test_sampling_is_decided_per_review(self):
+        configure_state_logging(0.5, 2000)
+        counts = [self.logged_stages(f"review-{i}") for i in range(40)]
+        self.assertTrue(set(counts) <= {0, 3})
+        self.assertIn(0, counts)
+        self.assertIn(3, counts)
+
+    def test_rate_bounds(self):
+        configure_state_logging(0.0, 2000)
+        self.assertEqual(self.logged_stages("review"), 0)
+        configure_state_logging(1.0, 2000)
+        self.assertEqual(self.logged_stages("review"), 3)
+
+    def test_long_state_is_capped(self):
+        configure_state_logging(1.0, 50)
+        log_state(self.logger, "state", {"code": "x" * 1000, "n": list(range(100))})
+        self.assertIn("more chars]", self.handler.messages[-1])
+
+
+if __name__ == "__main__":
+    unittest.main()